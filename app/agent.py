@@ -1,23 +1,54 @@
-import sqlite3
-from typing import TypedDict, Optional
-from langgraph.graph import StateGraph, END
-from langchain_openai import ChatOpenAI
+from typing import Dict, TypedDict, Optional, List
+from langgraph.constants import END
 from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import StrOutputParser
-import yaml
+import asyncio
+import contextvars
 import os
+import threading
+import time
 from dotenv import load_dotenv
 
 # --- Local Imports ---
 # Ensure these tools are in the specified paths
-from app.tools.db_matcher import KeywordDBMatcherTool
+from app.tools.db_matcher import KeywordDBIndex, KeywordDBMatcherTool
+from app.category_config import CATEGORIES_PATH, CategoryConfig, CategorySnapshot
 from app.tools.regex_matcher import RegexMatcherTool
+from app.tools.fuzzy_matcher import FuzzyMatcherTool
+from app.tools.similarity_matcher import SimilarityIndex, SimilarityMatcherTool
 from app.tools.text_normalizer import normalize_text
+from app.db import get_connection
+from app.llm_cache import LLMCache, cache_fingerprint
+from app.result_cache import ResultCache
+from app.llm_batcher import LLMMicroBatcher, LLM_BATCH_MAX_SIZE, LLM_BATCH_PROMPT_TEMPLATE
+from app.log import get_logger
+from app.metrics import BUDGET_EXHAUSTED, LLM_CACHE_LOOKUPS, LLM_SPECULATIONS, STAGE_SECONDS, TokenUsageCallback, instrument_tier
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 
 # --- Environment Setup ---
 # Load environment variables from a .env file (for OPENAI_API_KEY)
 load_dotenv()
 
+# Per-description traces are sampled; warnings and errors are always logged
+logger = get_logger(__name__, sampled=True)
+
+# Default latency budget per request (0 disables it). A request still waiting on the LLM
+# when its budget runs out is answered "Unknown" with zero confidence.
+CATEGORIZE_BUDGET_SECONDS = float(os.getenv("CATEGORIZE_BUDGET_SECONDS", "10"))
+# Default budget of a batch call. The LLM misses of a batch wait on each other, so no single
+# per-request budget fits every batch size; by default batches wait for every answer.
+CATEGORIZE_BATCH_BUDGET_SECONDS = float(os.getenv("CATEGORIZE_BATCH_BUDGET_SECONDS", "0"))
+# Start the LLM call as soon as the DB and regex tiers miss, while the fuzzy and similarity tiers run
+LLM_SPECULATIVE_DISPATCH = os.getenv("LLM_SPECULATIVE_DISPATCH", "1") == "1"
+
+# Reasonings of results that depend on the moment (a failed or too slow LLM call), never cached
+LLM_FAILED_REASONING = "LLM categorization failed"
+BUDGET_EXHAUSTED_REASONING = "Latency budget exhausted before the LLM answered"
+
+# Confidence of a keyword DB match and of a categories.yaml (regex) match
+DB_MATCH_CONFIDENCE = 1.0
+REGEX_MATCH_CONFIDENCE = 0.8
+
 # --- AgentState Definition ---
 class AgentState(TypedDict):
     """
@@ -29,105 +60,287 @@ class AgentState(TypedDict):
         category: The final determined category.
         reasoning: Explanation of the matching method.
         confidence_score: A score indicating the certainty of the match.
+        deadline: time.monotonic() by which the request must answer (None for no budget).
+        speculative_llm: The LLM call started early by speculative_llm_node, if any.
     """
     input_text: str
     user_id: Optional[str]
     category: Optional[str]
     reasoning: Optional[str]
     confidence_score: Optional[float]
+    deadline: Optional[float]
+    speculative_llm: Optional[Future]
 
 
 # --- Tool and LLM Initialization ---
 
-def initialize_llm_and_regex_tool():
-    """Initializes and returns the LLM chain and Regex Tool."""
-    # Regex Tool
-    try:
-        config_path = os.path.join(os.path.dirname(__file__), 'config', 'categories.yaml')
-        with open(config_path, 'r') as f:
-            category_map = yaml.safe_load(f)
-    except FileNotFoundError:
-        print(f"Error: categories.yaml not found at {config_path}. Please ensure it exists.")
-        category_map = {}
-    regex_tool = RegexMatcherTool(category_map=category_map)
-
-    # LLM Chain
-    llm = ChatOpenAI(model="gpt-4o-mini", temperature=0) # Automatically uses OPENAI_API_KEY from .env
-    categories_list = list(category_map.keys()) + ["Unknown"]
-    
-    llm_prompt = PromptTemplate.from_template(
-        """You are an expert expense categorization assistant.
+LLM_PROMPT_TEMPLATE = """You are an expert expense categorization assistant.
         Your task is to categorize the given expense description into one of the following categories: {categories}.
         Respond with only the category name and nothing else. If none of the categories seem to fit, respond with "Unknown".
 
         Expense Description: "{expense_description}"
         Category:"""
-    )
+
+def initialize_llm():
+    """Initializes and returns the single-description and batch LLM chains."""
+    # Imported here: langchain_openai (and openai) are slow to import and only needed for LLM calls
+    from langchain_openai import ChatOpenAI
+
+    llm = ChatOpenAI(model="gpt-4o-mini", temperature=0, callbacks=[TokenUsageCallback()]) # Automatically uses OPENAI_API_KEY from .env
+    llm_prompt = PromptTemplate.from_template(LLM_PROMPT_TEMPLATE)
     llm_chain = llm_prompt | llm | StrOutputParser()
-    return regex_tool, llm_chain, categories_list
+    batch_llm_chain = PromptTemplate.from_template(LLM_BATCH_PROMPT_TEMPLATE) | llm | StrOutputParser()
+    return llm_chain, batch_llm_chain
+
+def build_category_snapshot(version: int, content_hash: str, category_map: Dict[str, List[str]]) -> CategorySnapshot:
+    """Compiles the regex and fuzzy matchers, the category list and the LLM cache for one categories.yaml."""
+    categories = list(category_map.keys()) + ["Unknown"]
+    return CategorySnapshot(
+        version=version,
+        content_hash=content_hash,
+        category_map=category_map,
+        categories=categories,
+        regex_tool=RegexMatcherTool(category_map=category_map),
+        fuzzy_tool=FuzzyMatcherTool(category_map=category_map, keyword_index=keyword_db_index),
+        # LLM answers are cached per normalized text; the fingerprint changes with categories.yaml or the prompt
+        llm_cache=LLMCache(fingerprint=cache_fingerprint(categories, LLM_PROMPT_TEMPLATE)),
+    )
+
+# In-memory keyword index, loaded on first use and refreshed whenever keyword_category changes
+keyword_db_index = KeywordDBIndex(connection_factory=get_connection)
+
+# categories.yaml and everything compiled from it; app.main starts the background watcher
+category_config = CategoryConfig(CATEGORIES_PATH, build_category_snapshot)
+
+# The LLM chains, the micro-batcher and the compiled graphs are created on first use
+# (see get_llm_batcher, get_graph and warm_up), so importing this module stays cheap.
+# Once created they are plain module globals: llm_chain, batch_llm_chain, llm_batcher,
+# graph and async_graph, and can be replaced (e.g. with fakes in benchmarks).
+_lazy_lock = threading.Lock()
+
+def get_llm_batcher() -> LLMMicroBatcher:
+    """Returns the shared micro-batcher, which coalesces concurrent LLM misses into one numbered prompt."""
+    global llm_chain, batch_llm_chain, llm_batcher
+    if "llm_batcher" not in globals():
+        with _lazy_lock:
+            if "llm_batcher" not in globals():
+                llm_chain, batch_llm_chain = initialize_llm()
+                llm_batcher = LLMMicroBatcher(llm_chain, batch_llm_chain, category_config.current().categories)
+    return llm_batcher
+
+# Labeled examples for the local similarity tier; new keywords and confident results are added as they arrive
+similarity_index = SimilarityIndex(category_map=category_config.current().category_map, connection_factory=get_connection)
+similarity_tool = SimilarityMatcherTool(index=similarity_index)
+
+def reload_similarity_examples(snapshot: CategorySnapshot):
+    """Rebuilds the similarity examples after categories.yaml changes."""
+    similarity_index.category_map = snapshot.category_map
+    similarity_index.refresh()
+
+category_config.add_listener(reload_similarity_examples)
+
+def purge_stale_llm_answers(snapshot: CategorySnapshot):
+    """Deletes LLM answers cached under an earlier categories.yaml or prompt."""
+    purged = snapshot.llm_cache.purge_other_fingerprints()
+    if purged:
+        logger.info("Purged %d LLM cache entries from earlier categories or prompts.", purged)
+
+category_config.add_listener(purge_stale_llm_answers)
+
+# Final results per (user_id, normalized text). agent_api invalidates a user's entries when their
+# keywords change, and everything when global keywords change; a categories.yaml reload clears it too.
+result_cache = ResultCache()
+
+def clear_result_cache(snapshot: CategorySnapshot):
+    result_cache.clear()
+
+category_config.add_listener(clear_result_cache)
 
-# Initialize tools globally so they are created only once
-regex_tool, llm_chain, CATEGORIES = initialize_llm_and_regex_tool()
+def is_cacheable(result: dict) -> bool:
+    return bool(result.get("category")) and result.get("reasoning") not in (LLM_FAILED_REASONING, BUDGET_EXHAUSTED_REASONING)
 
 
 # --- Node and Router Functions ---
 
+@instrument_tier("db")
 def db_matcher_node(state: AgentState) -> dict:
     """
     Attempts to categorize using the high-confidence database tool.
-    Initializes db_tool with user_id from state.
+    Initializes db_tool with user_id from state, backed by the shared keyword index.
     """
-    print("---1. DB MATCHER---")
-    conn = sqlite3.connect("data/keywords.db", check_same_thread=False)
-    db_tool = KeywordDBMatcherTool(conn=conn, user_id=state.get("user_id"))
+    db_tool = KeywordDBMatcherTool(index=keyword_db_index, user_id=state.get("user_id"))
     category = db_tool.get_best_match(state["input_text"])
-    conn.close() # Close connection after use
     if category:
-        print(f"Result: Found category '{category}'")
+        logger.debug("DB matcher: found category '%s'", category)
         return {
             "category": category,
             "reasoning": "Matched using DB",
-            "confidence_score": 1.0
+            "confidence_score": DB_MATCH_CONFIDENCE
         }
-    print("Result: No match found.")
-    return {}
+    logger.debug("DB matcher: no match found.")
+    return {"category": None}
 
+@instrument_tier("regex")
 def regex_matcher_node(state: AgentState) -> dict:
     """Attempts to categorize using the medium-confidence regex tool."""
-    print("---2. REGEX MATCHER---")
-    category = regex_tool.get_best_match(state["input_text"])
+    category = category_config.active().regex_tool.get_best_match(state["input_text"])
     if category:
-        print(f"Result: Found category '{category}'")
+        logger.debug("Regex matcher: found category '%s'", category)
         return {
             "category": category,
             "reasoning": "Matched using Regex",
-            "confidence_score": 0.8
+            "confidence_score": REGEX_MATCH_CONFIDENCE
         }
-    print("Result: No match found.")
-    return {}
+    logger.debug("Regex matcher: no match found.")
+    return {"category": None}
 
+@instrument_tier("fuzzy")
+def fuzzy_matcher_node(state: AgentState) -> dict:
+    """Attempts to categorize misspelled or abbreviated keywords within a small edit distance."""
+    match = category_config.active().fuzzy_tool.match(state["input_text"])
+    if match:
+        logger.debug("Fuzzy matcher: found category '%s' ('%s' ~ '%s')", match.category, match.term, match.keyword)
+        return {
+            "category": match.category,
+            "reasoning": f"Matched using fuzzy keyword ('{match.term}' ~ '{match.keyword}')",
+            "confidence_score": round(0.75 * match.score, 2)
+        }
+    logger.debug("Fuzzy matcher: no match found.")
+    return {"category": None}
+
+@instrument_tier("similarity")
+def similarity_matcher_node(state: AgentState) -> dict:
+    """Attempts to categorize by similarity to known, labeled descriptions, without calling the LLM."""
+    match = similarity_tool.match(state["input_text"], state.get("user_id"))
+    if match:
+        category, score = match
+        logger.debug("Similarity matcher: found category '%s' (similarity %.2f)", category, score)
+        return {
+            "category": category,
+            "reasoning": f"Matched using similarity ({score:.2f})",
+            "confidence_score": round(0.7 * score, 2)
+        }
+    logger.debug("Similarity matcher: no match found.")
+    return {"category": None}
+
+def remaining_budget(state: AgentState) -> Optional[float]:
+    """Seconds left before the request's deadline, or None if it has no budget."""
+    deadline = state.get("deadline")
+    return None if deadline is None else deadline - time.monotonic()
+
+def budget_exhausted_result() -> dict:
+    BUDGET_EXHAUSTED.inc()
+    logger.warning("Latency budget exhausted before the LLM answered. Defaulting to Unknown.")
+    return {"category": "Unknown", "reasoning": BUDGET_EXHAUSTED_REASONING,
+            "confidence_score": 0.0, "speculative_llm": None}
+
+def speculative_llm_node(state: AgentState) -> dict:
+    """
+    Starts the LLM call for a description the DB and regex tiers missed, so it
+    runs while the weaker fuzzy and similarity tiers are tried. The call waits
+    in the micro-batcher's collection window first, so when one of those tiers
+    matches it is usually cancelled (see finish_request) before anything is sent.
+    """
+    remaining = remaining_budget(state)
+    if not LLM_SPECULATIVE_DISPATCH or (remaining is not None and remaining <= 0):
+        return {"speculative_llm": None}
+    snapshot = category_config.active()
+    try:
+        if snapshot.llm_cache.get(state["input_text"]) is not None:
+            return {"speculative_llm": None}
+        return {"speculative_llm": get_llm_batcher().submit(state["input_text"], snapshot.categories)}
+    except Exception as e:
+        # The LLM tier tries again and answers "Unknown" if it fails too
+        logger.error("Error starting speculative LLM call: %s", e)
+        return {"speculative_llm": None}
+
+def llm_result(llm_category: str, categories: List[str]) -> dict:
+    """Turns the LLM's raw answer into a state update, rejecting unknown categories."""
+    if llm_category in categories:
+        logger.debug("LLM categorizer: found category '%s'", llm_category)
+        return {
+            "category": llm_category,
+            "reasoning": "Matched using LLM",
+            "confidence_score": 0.6 if llm_category != "Unknown" else 0.0
+        }
+    else:
+        logger.warning("LLM returned an invalid category ('%s'). Defaulting to Unknown.", llm_category)
+        return {"category": "Unknown", "reasoning": f"LLM returned invalid category: {llm_category}", "confidence_score": 0.0}
+
+@instrument_tier("llm")
 def llm_categorizer_node(state: AgentState) -> dict:
     """Fallback to LLM for categorization."""
-    print("---3. LLM CATEGORIZER---")
+    snapshot = category_config.active()
     try:
-        llm_category = llm_chain.invoke({
-            "expense_description": state["input_text"],
-            "categories": ", ".join(CATEGORIES)
-        })
-        
-        if llm_category in CATEGORIES:
-            print(f"Result: Found category '{llm_category}'")
-            return {
-                "category": llm_category,
-                "reasoning": "Matched using LLM",
-                "confidence_score": 0.6 if llm_category != "Unknown" else 0.0
-            }
-        else:
-            print(f"Result: LLM returned an invalid category ('{llm_category}'). Defaulting to Unknown.")
-            return {"category": "Unknown", "reasoning": f"LLM returned invalid category: {llm_category}", "confidence_score": 0.0}
+        llm_category = snapshot.llm_cache.get(state["input_text"])
+        LLM_CACHE_LOOKUPS.inc(result="miss" if llm_category is None else "hit")
+        if llm_category is None:
+            remaining = remaining_budget(state)
+            if remaining is not None and remaining <= 0:
+                return budget_exhausted_result()
+            future = state.get("speculative_llm")
+            if future is not None:
+                LLM_SPECULATIONS.inc(outcome="used")
+            else:
+                future = get_llm_batcher().submit(state["input_text"], snapshot.categories)
+            try:
+                llm_category = future.result(timeout=remaining)
+            except FutureTimeoutError:
+                future.cancel()
+                return budget_exhausted_result()
+            if llm_category in snapshot.categories:
+                snapshot.llm_cache.put(state["input_text"], llm_category)
+        return {**llm_result(llm_category, snapshot.categories), "speculative_llm": None}
     except Exception as e:
-        print(f"Error during LLM categorization: {e}")
-        return {"category": "Unknown", "reasoning": "LLM categorization failed", "confidence_score": 0.0}
+        logger.error("Error during LLM categorization: %s", e)
+        return {"category": "Unknown", "reasoning": LLM_FAILED_REASONING, "confidence_score": 0.0}
+
+# --- Async Nodes ---
+# The DB, regex, fuzzy and similarity tiers only touch in-memory indexes, so their async versions run inline.
+# The LLM tier awaits the micro-batcher and moves cache I/O off the event loop.
+
+async def adb_matcher_node(state: AgentState) -> dict:
+    return db_matcher_node(state)
+
+async def aregex_matcher_node(state: AgentState) -> dict:
+    return regex_matcher_node(state)
+
+async def afuzzy_matcher_node(state: AgentState) -> dict:
+    return fuzzy_matcher_node(state)
+
+async def asimilarity_matcher_node(state: AgentState) -> dict:
+    return similarity_matcher_node(state)
+
+async def aspeculative_llm_node(state: AgentState) -> dict:
+    return await asyncio.to_thread(speculative_llm_node, state)
+
+@instrument_tier("llm")
+async def allm_categorizer_node(state: AgentState) -> dict:
+    """Async fallback to LLM for categorization."""
+    snapshot = category_config.active()
+    try:
+        llm_category = await asyncio.to_thread(snapshot.llm_cache.get, state["input_text"])
+        LLM_CACHE_LOOKUPS.inc(result="miss" if llm_category is None else "hit")
+        if llm_category is None:
+            remaining = remaining_budget(state)
+            if remaining is not None and remaining <= 0:
+                return budget_exhausted_result()
+            future = state.get("speculative_llm")
+            if future is not None:
+                LLM_SPECULATIONS.inc(outcome="used")
+            else:
+                future = get_llm_batcher().submit(state["input_text"], snapshot.categories)
+            try:
+                # On timeout wait_for cancels the wrapper, which cancels a call that has not been sent yet
+                llm_category = await asyncio.wait_for(asyncio.wrap_future(future), remaining)
+            except asyncio.TimeoutError:
+                return budget_exhausted_result()
+            if llm_category in snapshot.categories:
+                await asyncio.to_thread(snapshot.llm_cache.put, state["input_text"], llm_category)
+        return {**llm_result(llm_category, snapshot.categories), "speculative_llm": None}
+    except Exception as e:
+        logger.error("Error during LLM categorization: %s", e)
+        return {"category": "Unknown", "reasoning": LLM_FAILED_REASONING, "confidence_score": 0.0}
 
 def router(state: AgentState) -> str:
     """Decision point to determine the next step based on the current state."""
@@ -155,14 +368,21 @@ def router(state: AgentState) -> str:
     return END
 
 # --- Graph Definition ---
-def build_graph():
+def build_graph(db_node=db_matcher_node, regex_node=regex_matcher_node, llm_node=llm_categorizer_node,
+                similarity_node=similarity_matcher_node, fuzzy_node=fuzzy_matcher_node,
+                speculative_node=speculative_llm_node):
     """Builds and compiles the conditional LangGraph state machine."""
+    from langgraph.graph import StateGraph
+
     categorizer = StateGraph(AgentState)
 
     # Add nodes
-    categorizer.add_node("db_matcher", db_matcher_node)
-    categorizer.add_node("regex_matcher", regex_matcher_node)
-    categorizer.add_node("llm_categorizer", llm_categorizer_node)
+    categorizer.add_node("db_matcher", db_node)
+    categorizer.add_node("regex_matcher", regex_node)
+    categorizer.add_node("llm_speculation", speculative_node)
+    categorizer.add_node("fuzzy_matcher", fuzzy_node)
+    categorizer.add_node("similarity_matcher", similarity_node)
+    categorizer.add_node("llm_categorizer", llm_node)
 
     # Define the graph's flow
     categorizer.set_entry_point("db_matcher")
@@ -175,6 +395,18 @@ def build_graph():
     )
     categorizer.add_conditional_edges(
         "regex_matcher",
+        lambda s: END if s.get("category") else "llm_speculation",
+        {"llm_speculation": "llm_speculation", END: END}
+    )
+    # Only the heuristic tiers are left, so the LLM call starts now and runs alongside them
+    categorizer.add_edge("llm_speculation", "fuzzy_matcher")
+    categorizer.add_conditional_edges(
+        "fuzzy_matcher",
+        lambda s: END if s.get("category") else "similarity_matcher",
+        {"similarity_matcher": "similarity_matcher", END: END}
+    )
+    categorizer.add_conditional_edges(
+        "similarity_matcher",
         lambda s: END if s.get("category") else "llm_categorizer",
         {"llm_categorizer": "llm_categorizer", END: END}
     )
@@ -183,17 +415,219 @@ def build_graph():
     
     return categorizer.compile()
 
-# Compile once globally for reuse
-graph = build_graph()
+def get_graph():
+    """Returns the sync graph, compiling it once on first use."""
+    global graph
+    if "graph" not in globals():
+        with _lazy_lock:
+            if "graph" not in globals():
+                graph = build_graph()
+    return graph
+
+def get_async_graph():
+    """Returns the graph with async nodes, compiling it once on first use."""
+    global async_graph
+    if "async_graph" not in globals():
+        with _lazy_lock:
+            if "async_graph" not in globals():
+                async_graph = build_graph(adb_matcher_node, aregex_matcher_node, allm_categorizer_node, asimilarity_matcher_node,
+                                          afuzzy_matcher_node, aspeculative_llm_node)
+    return async_graph
+
+_LAZY_GLOBALS = {
+    "graph": get_graph,
+    "async_graph": get_async_graph,
+    "llm_batcher": get_llm_batcher,
+    "llm_chain": lambda: (get_llm_batcher(), llm_chain)[1],
+    "batch_llm_chain": lambda: (get_llm_batcher(), batch_llm_chain)[1],
+}
+
+def __getattr__(name: str):
+    # Lets `agent.graph`, `agent.llm_batcher` etc. keep working for callers outside this module
+    if name in _LAZY_GLOBALS:
+        return _LAZY_GLOBALS[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def warm_up(include_llm: bool = True):
+    """
+    Does the deferred startup work up front: compiles both graphs, loads the
+    categories, keyword, fuzzy and similarity indexes, purges stale LLM cache
+    entries and (optionally) builds the LLM client, so the first request does
+    not pay for it.
+    """
+    get_graph()
+    get_async_graph()
+    snapshot = category_config.current()
+    purge_stale_llm_answers(snapshot)
+    keyword_db_index.snapshot()
+    snapshot.fuzzy_tool.refresh()
+    len(similarity_index)
+    if include_llm:
+        get_llm_batcher()
 
 # --- Main Execution Block ---
-def run_categorizer(input_text: str, user_id: Optional[str] = None) -> dict:
-    """Normalizes input text and runs it through the categorization graph."""
-    normalized_input_text = normalize_text(input_text)
-    input_state: AgentState = {"input_text": normalized_input_text}
-    result = graph.invoke(input_state)
+def normalize(input_text: str) -> str:
+    """normalize_text, timed as the "normalize" stage."""
+    with STAGE_SECONDS.time(stage="normalize"):
+        return normalize_text(input_text)
+
+def request_deadline(budget_seconds: Optional[float] = None, default: Optional[float] = None) -> Optional[float]:
+    """
+    Deadline for a request given its budget. Without one, default applies
+    (CATEGORIZE_BUDGET_SECONDS if that is None too); a budget of 0 means none.
+    """
+    if budget_seconds is None:
+        budget_seconds = CATEGORIZE_BUDGET_SECONDS if default is None else default
+    return time.monotonic() + budget_seconds if budget_seconds > 0 else None
+
+def finish_request(result: dict) -> dict:
+    """
+    Cancels a speculative LLM call that a later tier made unnecessary and drops
+    the internal deadline and speculative_llm keys from the final state.
+    """
+    future = result.pop("speculative_llm", None)
+    result.pop("deadline", None)
+    if future is not None:
+        LLM_SPECULATIONS.inc(outcome="cancelled" if future.cancel() else "discarded")
+    return result
+
+def run_fast_path(state: AgentState, nodes) -> AgentState:
+    """
+    Runs graph nodes as plain function calls, following the graph's edges: each
+    update is merged into the state and the first node that sets a category ends
+    the run. Returns the merged state, so a hit looks exactly like graph.invoke's.
+    """
+    for node in nodes:
+        state = {**state, **node(state)}
+        if state.get("category"):
+            break
+    return state
+
+def cache_result(result: dict, token) -> dict:
+    """Stores a finished result in the result cache (unless it is transient) and returns it."""
+    if is_cacheable(result):
+        result_cache.put(result["user_id"], result["input_text"], result, token)
     return result
 
+def run_categorizer(input_text: str, user_id: Optional[str] = None, budget_seconds: Optional[float] = None) -> dict:
+    """
+    Normalizes input text and categorizes it. The local tiers are called directly
+    instead of through the compiled graph (whose per-invoke bookkeeping costs far
+    more than a DB or regex lookup), and the LLM tier only runs if they all miss.
+    The result is identical to get_graph().invoke's.
+    """
+    deadline = request_deadline(budget_seconds)
+    normalized_input_text = normalize(input_text)
+    cached = result_cache.get(user_id, normalized_input_text)
+    if cached is not None:
+        return cached
+    token = result_cache.token(user_id)
+    state: AgentState = {"input_text": normalized_input_text, "user_id": user_id, "deadline": deadline}
+    # Every node of this request sees the same categories.yaml snapshot, even across a reload
+    with category_config.pin():
+        state = run_fast_path(state, (db_matcher_node, regex_matcher_node, speculative_llm_node,
+                                      fuzzy_matcher_node, similarity_matcher_node))
+        if not state.get("category"):
+            state = {**state, **llm_categorizer_node(state)}
+    return cache_result(finish_request(state), token)
+
+async def arun_categorizer(input_text: str, user_id: Optional[str] = None, budget_seconds: Optional[float] = None) -> dict:
+    """Async run_categorizer: cache I/O and the LLM call are awaited so the event loop stays free."""
+    deadline = request_deadline(budget_seconds)
+    normalized_input_text = normalize(input_text)
+    cached = result_cache.get(user_id, normalized_input_text)
+    if cached is not None:
+        return cached
+    token = result_cache.token(user_id)
+    state: AgentState = {"input_text": normalized_input_text, "user_id": user_id, "deadline": deadline}
+    with category_config.pin():
+        state = run_fast_path(state, (db_matcher_node, regex_matcher_node))
+        if not state.get("category"):
+            state = {**state, **await aspeculative_llm_node(state)}
+            state = run_fast_path(state, (fuzzy_matcher_node, similarity_matcher_node))
+        if not state.get("category"):
+            state = {**state, **await allm_categorizer_node(state)}
+    return cache_result(finish_request(state), token)
+
+def run_deterministic_tiers(state: AgentState) -> dict:
+    """
+    Runs the DB, regex, fuzzy and similarity tiers as plain function calls.
+    Returns the update of the first tier that matched, or {"category": None}.
+    """
+    for node in (db_matcher_node, regex_matcher_node, fuzzy_matcher_node, similarity_matcher_node):
+        update = node(state)
+        if update.get("category"):
+            break
+    return update
+
+def run_categorizer_batch(input_texts: List[str], user_id: Optional[str] = None,
+                          budget_seconds: Optional[float] = None) -> List[dict]:
+    """
+    Categorizes many descriptions at once, returning one result per input in order.
+    Inputs that normalize to the same text are categorized once, and cached results
+    are reused. The local tiers
+    (DB, regex, fuzzy, similarity) run over the unique texts first, and only what they miss
+    goes to the LLM. The whole batch shares one latency budget, CATEGORIZE_BATCH_BUDGET_SECONDS
+    (none) unless budget_seconds is given.
+    """
+    deadline = request_deadline(budget_seconds, CATEGORIZE_BATCH_BUDGET_SECONDS)
+    normalized_texts = [normalize(text) for text in input_texts]
+    token = result_cache.token(user_id)
+    with category_config.pin():
+        results = {}
+        llm_pending = []
+        for text in dict.fromkeys(normalized_texts):
+            cached = result_cache.get(user_id, text)
+            if cached is not None:
+                results[text] = cached
+                continue
+            state: AgentState = {"input_text": text, "user_id": user_id, "deadline": deadline}
+            update = run_deterministic_tiers(state)
+            if update.get("category"):
+                results[text] = {**state, **update}
+            else:
+                llm_pending.append(state)
+
+        # Dispatch the LLM misses concurrently so the micro-batcher can coalesce them.
+        # Workers run in copies of this context so they keep the pinned snapshot.
+        if llm_pending:
+            context = contextvars.copy_context()
+            with ThreadPoolExecutor(max_workers=min(len(llm_pending), LLM_BATCH_MAX_SIZE)) as executor:
+                updates = executor.map(lambda state: context.copy().run(llm_categorizer_node, state), llm_pending)
+                for state, update in zip(llm_pending, updates):
+                    results[state["input_text"]] = {**state, **update}
+
+    finished = {text: cache_result(finish_request(result), token) for text, result in results.items()}
+    return [dict(finished[text]) for text in normalized_texts]
+
+async def arun_categorizer_batch(input_texts: List[str], user_id: Optional[str] = None,
+                                 budget_seconds: Optional[float] = None) -> List[dict]:
+    """Async run_categorizer_batch: the LLM misses are awaited together."""
+    deadline = request_deadline(budget_seconds, CATEGORIZE_BATCH_BUDGET_SECONDS)
+    normalized_texts = [normalize(text) for text in input_texts]
+    token = result_cache.token(user_id)
+    with category_config.pin():
+        results = {}
+        llm_pending = []
+        for text in dict.fromkeys(normalized_texts):
+            cached = result_cache.get(user_id, text)
+            if cached is not None:
+                results[text] = cached
+                continue
+            state: AgentState = {"input_text": text, "user_id": user_id, "deadline": deadline}
+            update = run_deterministic_tiers(state)
+            if update.get("category"):
+                results[text] = {**state, **update}
+            else:
+                llm_pending.append(state)
+
+        updates = await asyncio.gather(*(allm_categorizer_node(state) for state in llm_pending))
+        for state, update in zip(llm_pending, updates):
+            results[state["input_text"]] = {**state, **update}
+
+    finished = {text: cache_result(finish_request(result), token) for text, result in results.items()}
+    return [dict(finished[text]) for text in normalized_texts]
+
 if __name__ == "__main__":
     test_inputs = [
         "Uber ride to airport GHS 25.50",
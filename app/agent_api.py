@@ -1,101 +1,178 @@
-from fastapi import APIRouter, HTTPException
-from app.models import CategorizeRequest, CategorizeResponse, FeedbackRequest, Session, Interaction, CategorizedExpense, KeywordCategory, KeywordAddRequest
-from app.agent import run_categorizer
+from fastapi import APIRouter, HTTPException, Response, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from app.models import CategorizeRequest, CategorizeResponse, BatchCategorizeRequest, BatchCategorizeResponse, FeedbackRequest, Session, Interaction, CategorizedExpense, KeywordCategory, KeywordAddRequest
+from app.models import CategoryCount, MethodCount, DailyCategoryCount, CategoryAmount, CorrectionCount
+from app import analytics
+from app.history import CATEGORIZED_EXPENSES, DEFAULT_PAGE_SIZE, INTERACTIONS, MAX_PAGE_SIZE, HistoryTable, decode_cursor, fetch_page, iter_rows
+from app.agent import arun_categorizer, arun_categorizer_batch, category_config, keyword_db_index, result_cache, similarity_index
+from app.tools.text_normalizer import normalize_text
+from app.db import get_connection, transaction
+from app.audit_log import audit_log
+from app.export import EXPORT_FORMATS, check_filters, stream_export
+from app.retention import ARCHIVED_TABLES, iter_archive
+from app.statement_import import categorize_statement, iter_statement_rows
+from app.log import get_logger
+from app.metrics import timed_db_operation
+import io
+import json
 import sqlite3
 import uuid
-from datetime import datetime
+from typing import Literal, Optional
+from datetime import datetime, timedelta, timezone
 
 router = APIRouter()
 
-# Database connection for feedback storage
-def get_db_connection():
-    conn = sqlite3.connect("data/keywords.db")
-    conn.row_factory = sqlite3.Row
-    return conn
+logger = get_logger(__name__, sampled=True)
 
+# All helpers below share the pooled, per-thread connection from app.db.
+# Query strings are kept identical between calls so their prepared statements are reused.
+# Audit rows (logs, interactions, session activity) go through the write-behind audit_log queue.
+# Each helper's latency is recorded in db_operation_duration_seconds.
+
+def keywords_changed(user_id: str = None):
+    """Reloads the keyword index and drops the cached results a change to user_id's (or the global) keywords can affect."""
+    keyword_db_index.refresh()
+    if user_id is None:
+        result_cache.clear()
+    else:
+        result_cache.invalidate_user(user_id)
+
+@timed_db_operation
 def update_keyword_db(keyword: str, category: str, user_id: str = None):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    # Check if the keyword already exists for this category and user
-    cursor.execute("SELECT * FROM keyword_category WHERE keyword = ? AND category = ? AND (user_id = ? OR (user_id IS NULL AND ? IS NULL))", (keyword, category, user_id, user_id))
-    if cursor.fetchone() is None:
-        cursor.execute("INSERT INTO keyword_category (keyword, category, user_id) VALUES (?, ?, ?)", (keyword, category, user_id))
-        conn.commit()
-        print(f"Added '{keyword}' to category '{category}' for user '{user_id}' in DB.")
+    with transaction() as conn:
+        cursor = conn.cursor()
+        # Check if the keyword already exists for this category and user
+        # IS matches NULL (global) and per-user rows alike and can still use idx_keyword_category_user
+        cursor.execute("SELECT 1 FROM keyword_category WHERE user_id IS ? AND keyword = ? AND category = ?", (user_id, keyword, category))
+        added = cursor.fetchone() is None
+        if added:
+            cursor.execute("INSERT INTO keyword_category (keyword, category, user_id) VALUES (?, ?, ?)", (keyword, category, user_id))
+    if added:
+        keywords_changed(user_id)
+        if user_id is None:
+            similarity_index.add(keyword, category)
+        logger.info("Added '%s' to category '%s' for user '%s' in DB.", keyword, category, user_id)
     else:
-        print(f"Keyword '{keyword}' already exists for category '{category}' and user '{user_id}'. No update needed.")
-    conn.close()
-
-def log_categorization(input_text: str, category: str, matching_method: str, confidence_score: float):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute(
-        "INSERT INTO categorization_log (input_text, final_category, matching_method, confidence_score) VALUES (?, ?, ?, ?)",
-        (input_text, category, matching_method, confidence_score)
+        logger.debug("Keyword '%s' already exists for category '%s' and user '%s'. No update needed.", keyword, category, user_id)
+
+def add_similarity_examples(rows: list[tuple], user_id: str = None):
+    """
+    Adds confident (input_text, category, confidence_score) results to the similarity tier as labeled
+    examples. Runs the index update on the calling thread, so async handlers call it through a thread.
+    """
+    similarity_index.add_many(
+        ((normalize_text(text), category) for text, category, confidence_score in rows
+         if category != "Unknown" and confidence_score is not None and confidence_score >= similarity_index.min_log_confidence),
+        user_id=user_id, learned=True
+    )
+
+@timed_db_operation
+def log_categorization(input_text: str, category: str, matching_method: str, confidence_score: float, user_id: str = None):
+    audit_log.submit(
+        "INSERT INTO categorization_log (input_text, final_category, matching_method, confidence_score, user_id) VALUES (?, ?, ?, ?, ?)",
+        (input_text, category, matching_method, confidence_score, user_id)
     )
-    conn.commit()
-    conn.close()
-    print(f"Logged categorization: {input_text} -> {category} ({matching_method}, {confidence_score})")
+    add_similarity_examples([(input_text, category, confidence_score)], user_id)
+    logger.debug("Logged categorization: %s -> %s (%s, %s)", input_text, category, matching_method, confidence_score)
 
+@timed_db_operation
 def create_session(user_id: str = None, metadata: str = None):
     session_id = str(uuid.uuid4())
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute(
-        "INSERT INTO sessions (session_id, user_id, metadata) VALUES (?, ?, ?)",
-        (session_id, user_id, metadata)
-    )
-    conn.commit()
-    conn.close()
+    with transaction() as conn:
+        conn.execute(
+            "INSERT INTO sessions (session_id, user_id, metadata) VALUES (?, ?, ?)",
+            (session_id, user_id, metadata)
+        )
     return session_id
 
+@timed_db_operation
 def update_session_last_active(session_id: str):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute(
+    audit_log.submit(
         "UPDATE sessions SET last_active_time = CURRENT_TIMESTAMP WHERE session_id = ?",
-        (session_id,)
+        (session_id,),
+        coalesce=True
     )
-    conn.commit()
-    conn.close()
 
+@timed_db_operation
 def log_interaction(session_id: str, interaction_type: str, input_data: str = None, output_data: str = None):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute(
+    audit_log.submit(
         "INSERT INTO interactions (session_id, interaction_type, input_data, output_data) VALUES (?, ?, ?, ?)",
         (session_id, interaction_type, input_data, output_data)
     )
-    conn.commit()
-    conn.close()
     update_session_last_active(session_id)
 
+@timed_db_operation
 def log_categorized_expense(session_id: str, description: str, amount: float, category: str, confidence_score: float, raw_input: str):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute(
+    audit_log.submit(
         "INSERT INTO categorized_expenses (session_id, description, amount, category, confidence_score, raw_input) VALUES (?, ?, ?, ?, ?, ?)",
         (session_id, description, amount, category, confidence_score, raw_input)
     )
-    conn.commit()
-    conn.close()
     update_session_last_active(session_id)
 
+@timed_db_operation
+def log_categorization_batch(session_id: str, input_texts: list[str], results: list[dict], user_id: str = None):
+    """Writes the interaction, log and expense rows for a whole batch in one transaction."""
+    categories = [result["category"] or "Unknown" for result in results]
+    with transaction() as conn:
+        conn.execute(
+            "INSERT INTO interactions (session_id, interaction_type, input_data, output_data) VALUES (?, ?, ?, ?)",
+            (session_id, "categorize_batch_request", str(input_texts), None)
+        )
+        conn.executemany(
+            "INSERT INTO categorization_log (input_text, final_category, matching_method, confidence_score, user_id) VALUES (?, ?, ?, ?, ?)",
+            [
+                (text, category, result.get("matching_method", "Unknown"), result.get("confidence_score", 0.0), user_id)
+                for text, category, result in zip(input_texts, categories, results)
+            ]
+        )
+        conn.executemany(
+            "INSERT INTO categorized_expenses (session_id, description, amount, category, confidence_score, raw_input) VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (session_id, text, 0.0, category, result.get("confidence_score", 0.0), text)
+                for text, category, result in zip(input_texts, categories, results)
+            ]
+        )
+        conn.execute(
+            "INSERT INTO interactions (session_id, interaction_type, input_data, output_data) VALUES (?, ?, ?, ?)",
+            (session_id, "categorize_batch_response", None, str(results))
+        )
+        conn.execute(
+            "UPDATE sessions SET last_active_time = CURRENT_TIMESTAMP WHERE session_id = ?",
+            (session_id,)
+        )
+    add_similarity_examples([
+        (text, category, result.get("confidence_score")) for text, category, result in zip(input_texts, categories, results)
+    ], user_id)
+
+def budget_seconds(budget_ms: int = None):
+    return None if budget_ms is None else budget_ms / 1000
+
+def to_categorize_response(result: dict) -> CategorizeResponse:
+    return CategorizeResponse(
+        category=result["category"] or "Unknown",
+        reasoning=result["reasoning"] or "No reasoning provided",
+        confidence_score=result.get("confidence_score"),
+        matching_method=result.get("matching_method")
+    )
+
 @router.post("/categorize", response_model=CategorizeResponse)
-def categorize_expense(req: CategorizeRequest, session_id: str = None, user_id: str = None):
+async def categorize_expense(req: CategorizeRequest, session_id: str = None, user_id: str = None):
     if not session_id:
-        session_id = create_session(user_id=user_id or "default_user") # Use provided user_id or default
+        session_id = await run_in_threadpool(create_session, user_id=user_id or "default_user") # Use provided user_id or default
     
     log_interaction(session_id, "categorize_request", input_data=req.input_text)
 
-    result = run_categorizer(req.input_text, user_id=user_id)
+    result = await arun_categorizer(req.input_text, user_id=user_id, budget_seconds=budget_seconds(req.budget_ms))
 
-    # Log the categorization event
-    log_categorization(
+    # Log the categorization event; adding it to the similarity index is too much work for the event loop
+    await run_in_threadpool(
+        log_categorization,
         req.input_text,
         result["category"] or "Unknown",
         result.get("matching_method", "Unknown"),
-        result.get("confidence_score", 0.0)
+        result.get("confidence_score", 0.0),
+        user_id
     )
 
     log_categorized_expense(
@@ -109,32 +186,61 @@ def categorize_expense(req: CategorizeRequest, session_id: str = None, user_id:
     
     log_interaction(session_id, "categorize_response", output_data=str(result))
 
-    return CategorizeResponse(
-        category=result["category"] or "Unknown",
-        reasoning=result["reasoning"] or "No reasoning provided",
-        confidence_score=result.get("confidence_score"),
-        matching_method=result.get("matching_method")
-    )
+    return to_categorize_response(result)
+
+@router.post("/categorize/batch", response_model=BatchCategorizeResponse)
+async def categorize_expense_batch(req: BatchCategorizeRequest, session_id: str = None, user_id: str = None):
+    if not session_id:
+        session_id = await run_in_threadpool(create_session, user_id=user_id or "default_user")
+
+    results = await arun_categorizer_batch(req.descriptions, user_id=user_id, budget_seconds=budget_seconds(req.budget_ms))
+    await run_in_threadpool(log_categorization_batch, session_id, req.descriptions, results, user_id)
+
+    return BatchCategorizeResponse(results=[to_categorize_response(result) for result in results])
+
+@router.post("/categorize/statement")
+def categorize_statement_upload(file: UploadFile, session_id: str = None, user_id: str = None):
+    """
+    Categorizes an uploaded CSV or OFX bank statement and streams one JSON
+    object per row back as NDJSON while the file is being parsed, followed
+    by a summary record.
+    """
+    if not session_id:
+        session_id = create_session(user_id=user_id or "default_user")
+
+    def ndjson_results():
+        lines = io.TextIOWrapper(file.file, encoding="utf-8-sig", errors="replace", newline="")
+        for result in categorize_statement(iter_statement_rows(lines), user_id=user_id):
+            if "summary" not in result:
+                log_categorization(result["description"], result["category"], "Unknown", result["confidence_score"], user_id)
+                log_categorized_expense(
+                    session_id,
+                    description=result["description"],
+                    amount=result["amount"],
+                    category=result["category"],
+                    confidence_score=result["confidence_score"],
+                    raw_input=result["description"]
+                )
+            yield json.dumps(result) + "\n"
+
+    return StreamingResponse(ndjson_results(), media_type="application/x-ndjson")
 
 @router.post("/feedback")
 def submit_feedback(feedback: FeedbackRequest, session_id: str = None, user_id: str = None):
     if session_id:
         log_interaction(session_id, "feedback_submission", input_data=str(feedback))
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute(
-            "INSERT INTO feedback (input_text, predicted_category, corrected_category, reasoning, confidence_score) VALUES (?, ?, ?, ?, ?)",
-            (
-                feedback.input_text,
-                feedback.predicted_category,
-                feedback.corrected_category,
-                feedback.reasoning,
-                feedback.confidence_score,
-            ),
-        )
-        conn.commit()
-        conn.close()
+        with transaction() as conn:
+            conn.execute(
+                "INSERT INTO feedback (input_text, predicted_category, corrected_category, reasoning, confidence_score) VALUES (?, ?, ?, ?, ?)",
+                (
+                    feedback.input_text,
+                    feedback.predicted_category,
+                    feedback.corrected_category,
+                    feedback.reasoning,
+                    feedback.confidence_score,
+                ),
+            )
 
         # Update keyword DB based on feedback, now with user_id
         # Only update if confidence was low and correction was made
@@ -144,65 +250,102 @@ def submit_feedback(feedback: FeedbackRequest, session_id: str = None, user_id:
 
         return {"message": "Feedback received and stored successfully!"}
     except Exception as e:
-        print(f"Error storing feedback: {e}")
+        logger.error("Error storing feedback: %s", e)
         raise HTTPException(status_code=500, detail=f"Failed to store feedback: {e}")
 
 @router.post("/sessions", response_model=Session)
 def start_new_session(user_id: str = None, metadata: str = None):
-    print(f"DEBUG: Backend received request to start new session for user_id: {user_id}")
+    logger.debug("Backend received request to start new session for user_id: %s", user_id)
     session_id = create_session(user_id, metadata)
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM sessions WHERE session_id = ?", (session_id,))
-    session_data = cursor.fetchone()
-    conn.close()
+    session_data = get_connection().execute("SELECT * FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
     if session_data:
-        print(f"DEBUG: Session created successfully: {session_id}")
+        logger.debug("Session created successfully: %s", session_id)
         return Session(**session_data)
-    print("DEBUG: Failed to create session in backend.")
+    logger.error("Failed to create session in backend.")
     raise HTTPException(status_code=500, detail="Failed to create session.")
 
 @router.get("/sessions/{session_id}", response_model=Session)
 def get_session(session_id: str):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM sessions WHERE session_id = ?", (session_id,))
-    session_data = cursor.fetchone()
-    conn.close()
+    audit_log.flush()
+    session_data = get_connection().execute("SELECT * FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
     if session_data:
         return Session(**session_data)
     raise HTTPException(status_code=404, detail="Session not found.")
 
+def history_response(history: HistoryTable, model, response: Response, session_id: str, limit: Optional[int],
+                     cursor: Optional[str], since: Optional[datetime], until: Optional[datetime], format: str):
+    """
+    One page of a session's history as JSON, with the next page's cursor in the
+    X-Next-Cursor header, or (format=ndjson) every remaining row streamed as NDJSON.
+    """
+    audit_log.flush()
+    if limit is not None and not 1 <= limit <= MAX_PAGE_SIZE:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {MAX_PAGE_SIZE}.")
+    if cursor:
+        try:
+            decode_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    if format == "ndjson":
+        rows = iter_rows(get_connection, history, session_id, cursor, since, until, limit)
+        return StreamingResponse((json.dumps(row, default=str) + "\n" for row in rows), media_type="application/x-ndjson")
+
+    rows, next_cursor = fetch_page(get_connection(), history, session_id, limit or DEFAULT_PAGE_SIZE, cursor, since, until)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return [model(**row) for row in rows]
+
 @router.get("/interactions/{session_id}", response_model=list[Interaction])
-def get_interactions(session_id: str):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM interactions WHERE session_id = ? ORDER BY timestamp ASC", (session_id,))
-    interactions_data = cursor.fetchall()
-    conn.close()
-    return [Interaction(**interaction) for interaction in interactions_data]
+def get_interactions(session_id: str, response: Response, limit: Optional[int] = None, cursor: Optional[str] = None,
+                     since: Optional[datetime] = None, until: Optional[datetime] = None,
+                     format: Literal["json", "ndjson"] = "json"):
+    return history_response(INTERACTIONS, Interaction, response, session_id, limit, cursor, since, until, format)
 
 @router.get("/categorized_expenses/{session_id}", response_model=list[CategorizedExpense])
-def get_categorized_expenses(session_id: str):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM categorized_expenses WHERE session_id = ? ORDER BY timestamp ASC", (session_id,))
-    expenses_data = cursor.fetchall()
-    conn.close()
-    return [CategorizedExpense(**expense) for expense in expenses_data]
+def get_categorized_expenses(session_id: str, response: Response, limit: Optional[int] = None, cursor: Optional[str] = None,
+                             since: Optional[datetime] = None, until: Optional[datetime] = None,
+                             format: Literal["json", "ndjson"] = "json"):
+    return history_response(CATEGORIZED_EXPENSES, CategorizedExpense, response, session_id, limit, cursor, since, until, format)
+
+@router.get("/archive/{table}")
+def get_archived_rows(table: Literal["interactions", "categorization_log", "categorized_expenses"], session_id: Optional[str] = None,
+                      since: Optional[datetime] = None, until: Optional[datetime] = None):
+    """Rows the retention job moved out of SQLite, read from the Parquet archive and streamed as NDJSON."""
+    if session_id is not None and table == "categorization_log":
+        raise HTTPException(status_code=400, detail="categorization_log rows have no session_id.")
+    rows = iter_archive(ARCHIVED_TABLES[table].table, since, until, session_id)
+    return StreamingResponse((json.dumps(row, default=str) + "\n" for row in rows), media_type="application/x-ndjson")
+
+@router.get("/export/{table}")
+def export_table(table: Literal["categorized_expenses", "categorization_log"], format: Literal["parquet", "arrow"] = "parquet",
+                 user_id: Optional[str] = None, session_id: Optional[str] = None,
+                 since: Optional[datetime] = None, until: Optional[datetime] = None):
+    """Streams the table as Parquet or an Arrow IPC stream, encoded one chunk of rows at a time."""
+    try:
+        check_filters(table, user_id, session_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    audit_log.flush()
+    media_type, extension = EXPORT_FORMATS[format]
+    return StreamingResponse(
+        stream_export(get_connection, table, format, user_id, session_id, since, until),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{table}.{extension}"'},
+    )
 
 @router.post("/keywords", response_model=KeywordCategory)
 def add_keyword(keyword_data: KeywordAddRequest):
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute(
-            "INSERT INTO keyword_category (user_id, keyword, category) VALUES (?, ?, ?)",
-            (keyword_data.user_id, keyword_data.keyword, keyword_data.category)
-        )
-        conn.commit()
-        keyword_id = cursor.lastrowid
-        conn.close()
+        with transaction() as conn:
+            cursor = conn.execute(
+                "INSERT INTO keyword_category (user_id, keyword, category) VALUES (?, ?, ?)",
+                (keyword_data.user_id, keyword_data.keyword, keyword_data.category)
+            )
+            keyword_id = cursor.lastrowid
+        keywords_changed(keyword_data.user_id)
+        if keyword_data.user_id is None:
+            similarity_index.add(keyword_data.keyword, keyword_data.category)
         return KeywordCategory(id=keyword_id, **keyword_data.dict())
     except sqlite3.IntegrityError:
         raise HTTPException(status_code=400, detail="Keyword already exists for this user or globally.")
@@ -211,16 +354,54 @@ def add_keyword(keyword_data: KeywordAddRequest):
 
 @router.get("/keywords", response_model=list[KeywordCategory])
 def get_keywords(user_id: str = None):
-    conn = get_db_connection()
-    cursor = conn.cursor()
+    cursor = get_connection().cursor()
     if user_id:
         cursor.execute("SELECT id, user_id, keyword, category FROM keyword_category WHERE user_id = ? OR user_id IS NULL", (user_id,))
     else:
         cursor.execute("SELECT id, user_id, keyword, category FROM keyword_category WHERE user_id IS NULL")
     keywords_data = cursor.fetchall()
-    conn.close()
     return [KeywordCategory(**keyword) for keyword in keywords_data]
 
+@router.get("/llm_cache/stats")
+def get_llm_cache_stats():
+    return category_config.current().llm_cache.stats()
+
+@router.get("/result_cache/stats")
+def get_result_cache_stats():
+    return result_cache.stats()
+
+# Analytics read the trigger-maintained rollups in app.analytics, never the history tables themselves
+
+def analytics_connection() -> sqlite3.Connection:
+    audit_log.flush()
+    return get_connection()
+
+def since_day(days: int = None):
+    """First UTC day (YYYY-MM-DD) of a window of the last `days` days, or None for all time."""
+    if days is None:
+        return None
+    return (datetime.now(timezone.utc).date() - timedelta(days=max(days, 1) - 1)).isoformat()
+
+@router.get("/analytics/categories", response_model=list[CategoryCount])
+def get_category_counts(days: int = None):
+    return analytics.category_counts(analytics_connection(), since_day(days))
+
+@router.get("/analytics/methods", response_model=list[MethodCount])
+def get_method_counts(days: int = None):
+    return analytics.method_counts(analytics_connection(), since_day(days))
+
+@router.get("/analytics/daily", response_model=list[DailyCategoryCount])
+def get_daily_counts(days: int = 30):
+    return analytics.daily_counts(analytics_connection(), since_day(days))
+
+@router.get("/analytics/amounts", response_model=list[CategoryAmount])
+def get_amount_totals():
+    return analytics.amount_totals(analytics_connection())
+
+@router.get("/analytics/corrections", response_model=list[CorrectionCount])
+def get_correction_counts():
+    return analytics.correction_counts(analytics_connection())
+
 @router.get("/categorize")
 def categorize_example():
     return {"message": "Send a POST request with input_text to categorize."}
@@ -0,0 +1,64 @@
+"""
+Analytics rollups maintained by SQLite triggers.
+
+Every insert into categorization_log, categorized_expenses and feedback also
+bumps a small rollup row, so dashboards read a table whose size depends on the
+number of categories (and days), never on the length of the history. The
+rollups only count inserts: rows later removed from the source tables (e.g.
+by retention) stay counted.
+
+The rollup tables and their triggers are created by the 0003_analytics_rollups
+migration (see app.migrations).
+"""
+import sqlite3
+from typing import List, Optional
+
+
+def category_counts(conn: sqlite3.Connection, since: Optional[str] = None) -> List[dict]:
+    """Categorizations per category, optionally from day `since` (YYYY-MM-DD) on."""
+    rows = conn.execute(
+        "SELECT category, SUM(count) AS count FROM categorization_daily WHERE day >= COALESCE(?, '') "
+        "GROUP BY category ORDER BY count DESC, category",
+        (since,)
+    ).fetchall()
+    return [{"category": category, "count": count} for category, count in rows]
+
+
+def method_counts(conn: sqlite3.Connection, since: Optional[str] = None) -> List[dict]:
+    """Categorizations per matching method, optionally from day `since` on."""
+    rows = conn.execute(
+        "SELECT matching_method, SUM(count) AS count FROM categorization_daily WHERE day >= COALESCE(?, '') "
+        "GROUP BY matching_method ORDER BY count DESC, matching_method",
+        (since,)
+    ).fetchall()
+    return [{"matching_method": method, "count": count} for method, count in rows]
+
+
+def daily_counts(conn: sqlite3.Connection, since: Optional[str] = None) -> List[dict]:
+    """Categorizations per day and category, oldest day first."""
+    rows = conn.execute(
+        "SELECT day, category, SUM(count) AS count FROM categorization_daily WHERE day >= COALESCE(?, '') "
+        "GROUP BY day, category ORDER BY day, category",
+        (since,)
+    ).fetchall()
+    return [{"day": day, "category": category, "count": count} for day, category, count in rows]
+
+
+def amount_totals(conn: sqlite3.Connection) -> List[dict]:
+    """Categorized expense count and amount sum per category."""
+    rows = conn.execute(
+        "SELECT category, count, total_amount FROM expense_category_totals ORDER BY total_amount DESC, category"
+    ).fetchall()
+    return [{"category": category, "count": count, "total_amount": total} for category, count, total in rows]
+
+
+def correction_counts(conn: sqlite3.Connection) -> List[dict]:
+    """How often each predicted category was corrected to each other category."""
+    rows = conn.execute(
+        "SELECT predicted_category, corrected_category, count FROM correction_pairs "
+        "ORDER BY count DESC, predicted_category, corrected_category"
+    ).fetchall()
+    return [
+        {"predicted_category": predicted, "corrected_category": corrected, "count": count}
+        for predicted, corrected, count in rows
+    ]
@@ -0,0 +1,144 @@
+import atexit
+import os
+import queue
+import sqlite3
+import threading
+import time
+from typing import Callable, List, Optional, Tuple
+
+from app.db import get_connection
+from app.log import get_logger
+from app.metrics import DB_OPERATION_SECONDS
+
+logger = get_logger(__name__)
+
+# Flush when this many writes are pending, or when the oldest has waited this long
+AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "200"))
+AUDIT_FLUSH_INTERVAL_MS = int(os.getenv("AUDIT_FLUSH_INTERVAL_MS", "100"))
+
+_FLUSH = object()
+_STOP = object()
+
+AuditWrite = Tuple[str, tuple, bool]
+
+
+class AuditLogWriter:
+    """
+    Write-behind queue for audit rows (interactions, logs, session activity).
+
+    Callers enqueue statements and return immediately. A background thread
+    drains the queue and writes each batch in a single transaction, grouping
+    consecutive rows for the same statement into one executemany call. If the
+    batch fails, its rows are retried one transaction each, so a bad row only
+    loses itself.
+    Writes submitted with coalesce=True (e.g. session last-active updates)
+    are only applied once per batch.
+    """
+
+    def __init__(self, connection_factory: Callable[[], sqlite3.Connection] = get_connection,
+                 batch_size: int = AUDIT_BATCH_SIZE, flush_interval_ms: int = AUDIT_FLUSH_INTERVAL_MS):
+        self.connection_factory = connection_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="audit-log-writer", daemon=True)
+                self._thread.start()
+
+    def submit(self, sql: str, params: tuple = (), coalesce: bool = False):
+        """Queues one statement to be written by the background thread."""
+        self._ensure_started()
+        self._queue.put((sql, params, coalesce))
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Blocks until every write submitted before this call is committed."""
+        if self._thread is None or not self._thread.is_alive():
+            return True
+        done = threading.Event()
+        self._queue.put((_FLUSH, done))
+        return done.wait(timeout)
+
+    def close(self, timeout: Optional[float] = None):
+        """Writes everything still queued and stops the background thread."""
+        thread = self._thread
+        if thread is None or not thread.is_alive():
+            return
+        self._queue.put((_STOP, None))
+        thread.join(timeout)
+
+    def _run(self):
+        batch: List[AuditWrite] = []
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if item is None or item[0] is _FLUSH or item[0] is _STOP:
+                if batch:
+                    self._write(batch)
+                    batch, deadline = [], None
+                if item is not None and item[0] is _FLUSH:
+                    item[1].set()
+                if item is not None and item[0] is _STOP:
+                    return
+                continue
+
+            batch.append(item)
+            if deadline is None:
+                deadline = time.monotonic() + self.flush_interval
+            if len(batch) >= self.batch_size:
+                self._write(batch)
+                batch, deadline = [], None
+
+    def _write(self, batch: List[AuditWrite]):
+        """Writes one batch in a single transaction."""
+        groups: List[Tuple[str, list]] = []
+        coalesced = set()
+        for sql, params, coalesce in batch:
+            if coalesce:
+                if (sql, params) in coalesced:
+                    continue
+                coalesced.add((sql, params))
+            if groups and groups[-1][0] == sql:
+                groups[-1][1].append(params)
+            else:
+                groups.append((sql, [params]))
+
+        conn = self.connection_factory()
+        try:
+            with DB_OPERATION_SECONDS.time(operation="audit_log_write"):
+                for sql, rows in groups:
+                    conn.executemany(sql, rows)
+                conn.commit()
+        except Exception as e:
+            conn.rollback()
+            logger.warning("Failed to write a batch of %d audit rows (%s); retrying them one at a time.", len(batch), e)
+            self._write_each(conn, groups)
+
+    def _write_each(self, conn: sqlite3.Connection, groups: List[Tuple[str, list]]):
+        """Writes every row in its own transaction, so one bad row only loses itself."""
+        failed, error = 0, None
+        for sql, rows in groups:
+            for params in rows:
+                try:
+                    conn.execute(sql, params)
+                    conn.commit()
+                except Exception as e:
+                    conn.rollback()
+                    failed, error = failed + 1, e
+        if failed:
+            logger.error("Failed to write %d audit rows: %s", failed, error)
+
+
+audit_log = AuditLogWriter()
+atexit.register(audit_log.close)
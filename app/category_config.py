@@ -0,0 +1,159 @@
+import hashlib
+import os
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+import yaml
+
+from app.config.settings import CategoryKeywordLoader
+from app.llm_cache import LLMCache
+from app.log import get_logger
+from app.tools.fuzzy_matcher import FuzzyMatcherTool
+from app.tools.regex_matcher import RegexMatcherTool
+
+CATEGORIES_PATH = os.getenv("CATEGORIES_PATH", os.path.join(os.path.dirname(__file__), "config", "categories.yaml"))
+# How often the background watcher checks categories.yaml for changes
+CATEGORY_RELOAD_INTERVAL_SECONDS = float(os.getenv("CATEGORY_RELOAD_INTERVAL_SECONDS", "5"))
+
+logger = get_logger(__name__)
+
+
+class CategorySnapshot(NamedTuple):
+    """Everything compiled from one version of categories.yaml."""
+    version: int
+    content_hash: str
+    category_map: Dict[str, List[str]]
+    categories: List[str]
+    regex_tool: RegexMatcherTool
+    fuzzy_tool: FuzzyMatcherTool
+    llm_cache: LLMCache
+
+
+SnapshotBuilder = Callable[[int, str, Dict[str, List[str]]], CategorySnapshot]
+
+
+class CategoryConfig:
+    """
+    Hot-reloadable categories.yaml.
+
+    reload() checks the file's mtime and size, then its content hash, and
+    when the content changed validates it with CategoryKeywordLoader and
+    compiles a new CategorySnapshot with `build`. The new snapshot is swapped
+    in with a single assignment; an invalid file is logged and the previous
+    snapshot stays in place. start() runs reload() on a background thread.
+
+    Requests pin the snapshot they started with (see pin()), so a swap never
+    changes the categories, matchers or prompt under an in-flight request.
+    """
+
+    def __init__(self, path: str, build: SnapshotBuilder,
+                 interval_seconds: float = CATEGORY_RELOAD_INTERVAL_SECONDS):
+        self.path = path
+        self.build = build
+        self.interval_seconds = interval_seconds
+        self._loader = CategoryKeywordLoader(path)
+        self._lock = threading.Lock()
+        self._snapshot: Optional[CategorySnapshot] = None
+        self._stat: Optional[Tuple[int, int]] = None
+        self._listeners: List[Callable[[CategorySnapshot], None]] = []
+        self._active: ContextVar[Optional[CategorySnapshot]] = ContextVar(f"categories:{path}", default=None)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def current(self) -> CategorySnapshot:
+        """Returns the latest snapshot, loading the file on first use."""
+        snapshot = self._snapshot
+        if snapshot is None:
+            self.reload()
+            snapshot = self._snapshot
+        return snapshot
+
+    def active(self) -> CategorySnapshot:
+        """Returns the snapshot pinned by the current request, or the latest one."""
+        return self._active.get() or self.current()
+
+    @contextmanager
+    def pin(self, snapshot: Optional[CategorySnapshot] = None) -> Iterator[CategorySnapshot]:
+        """Pins snapshot (by default the active one) for everything run in this context."""
+        snapshot = snapshot or self.active()
+        token = self._active.set(snapshot)
+        try:
+            yield snapshot
+        finally:
+            self._active.reset(token)
+
+    def add_listener(self, listener: Callable[[CategorySnapshot], None]):
+        """Registers a callback run on the reloading thread after every swap."""
+        self._listeners.append(listener)
+
+    def reload(self, force: bool = False) -> bool:
+        """
+        Re-reads the file if it changed and swaps in a new snapshot.
+        Returns True if a new snapshot was swapped in.
+        """
+        with self._lock:
+            try:
+                stat = os.stat(self.path)
+            except FileNotFoundError:
+                if self._snapshot is None:
+                    logger.error("categories.yaml not found at %s. Please ensure it exists.", self.path)
+                    self._swap("", {})
+                    return True
+                logger.error("categories.yaml disappeared from %s; keeping version %d.", self.path, self._snapshot.version)
+                return False
+
+            key = (stat.st_mtime_ns, stat.st_size)
+            if key == self._stat and not force:
+                return False
+            self._stat = key
+
+            with open(self.path, "rb") as f:
+                content = f.read()
+            content_hash = hashlib.sha256(content).hexdigest()
+            if self._snapshot is not None and content_hash == self._snapshot.content_hash:
+                return False
+
+            try:
+                category_map = self._loader.parse(content.decode("utf-8"))
+            except (ValueError, yaml.YAMLError) as e:
+                if self._snapshot is None:
+                    raise
+                logger.error("Invalid categories.yaml (%s); keeping version %d.", e, self._snapshot.version)
+                return False
+
+            self._swap(content_hash, category_map)
+            return True
+
+    def _swap(self, content_hash: str, category_map: Dict[str, List[str]]):
+        version = self._snapshot.version + 1 if self._snapshot else 1
+        snapshot = self.build(version, content_hash, category_map)
+        self._snapshot = snapshot
+        logger.info("Loaded categories.yaml version %d with %d categories.", version, len(category_map))
+        for listener in self._listeners:
+            try:
+                listener(snapshot)
+            except Exception as e:
+                logger.error("Category reload listener failed: %s", e)
+
+    def start(self):
+        """Starts the background watcher (idempotent)."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch, name="category-config-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _watch(self):
+        while not self._stop.wait(self.interval_seconds):
+            try:
+                self.reload()
+            except Exception as e:
+                logger.error("Checking categories.yaml failed: %s", e)
@@ -7,7 +7,11 @@ class CategoryKeywordLoader:
 
     def load(self) -> Dict[str, List[str]]:
         with open(self.config_path, 'r') as file:
-            data = yaml.safe_load(file)
+            return self.parse(file.read())
+
+    def parse(self, content: str) -> Dict[str, List[str]]:
+        """Parses and validates YAML content in the categories.yaml format."""
+        data = yaml.safe_load(content)
         if not isinstance(data, dict):
             raise ValueError('YAML root must be a dictionary of categories.')
         for category, keywords in data.items():
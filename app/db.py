@@ -0,0 +1,95 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Iterator, List
+
+# Path to the shared application database
+DB_PATH = os.getenv("KEYWORDS_DB_PATH", os.path.join("data", "keywords.db"))
+
+# Connection tuning, overridable through the environment
+BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+CACHED_STATEMENTS = int(os.getenv("SQLITE_CACHED_STATEMENTS", "256"))
+
+
+class ConnectionPool:
+    """
+    Hands out one long-lived SQLite connection per thread.
+
+    Connections are opened lazily, switched to WAL so readers never block the
+    writer, and keep a cache of prepared statements keyed by SQL text, so
+    helpers that reuse the same query string skip re-parsing it.
+    """
+
+    def __init__(self, db_path: str, busy_timeout_ms: int = BUSY_TIMEOUT_MS,
+                 synchronous: str = SYNCHRONOUS, cached_statements: int = CACHED_STATEMENTS):
+        self.db_path = db_path
+        self.busy_timeout_ms = busy_timeout_ms
+        self.synchronous = synchronous
+        self.cached_statements = cached_statements
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections: List[sqlite3.Connection] = []
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.busy_timeout_ms / 1000,
+            check_same_thread=False,
+            cached_statements=self.cached_statements,
+        )
+        conn.row_factory = sqlite3.Row
+        if self.db_path != ":memory:":
+            conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(f"PRAGMA synchronous={self.synchronous}")
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+        return conn
+
+    def connection(self) -> sqlite3.Connection:
+        """Returns the calling thread's connection, opening it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Yields the thread's connection and commits on success, rolling back on error."""
+        conn = self.connection()
+        try:
+            yield conn
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+
+    def close_all(self):
+        """Closes every connection handed out so far."""
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
+
+
+pool = ConnectionPool(DB_PATH)
+
+
+def get_connection() -> sqlite3.Connection:
+    """Returns the calling thread's pooled connection. Do not close it."""
+    return pool.connection()
+
+
+def transaction():
+    """Context manager wrapping a unit of work on the pooled connection."""
+    return pool.transaction()
+
+
+def configure(db_path: str):
+    """Points the shared pool at another database file, closing existing connections."""
+    pool.close_all()
+    pool.db_path = db_path
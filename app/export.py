@@ -0,0 +1,225 @@
+"""
+Streaming columnar export of categorized_expenses and categorization_log.
+
+Rows are read EXPORT_CHUNK_SIZE at a time with keyset pagination on
+(timestamp, id), converted to an Arrow record batch and written as one
+Parquet row group or Arrow IPC stream message, and the encoded bytes are
+handed on before the next chunk is read. Memory stays bounded by one chunk
+however large the export, and the same generator backs both the API's
+streaming response and the CLI.
+
+    python -m app.export categorized_expenses --format parquet -o expenses.parquet --user-id alice
+    python -m app.export categorization_log --format arrow --since 2024-05-01 -o log.arrows
+"""
+import argparse
+import os
+import sqlite3
+import sys
+from datetime import datetime
+from typing import TYPE_CHECKING, Callable, Dict, Iterator, List, Optional, Tuple
+
+from app.history import CATEGORIZATION_LOG, CATEGORIZED_EXPENSES, HistoryTable, to_db_timestamp
+from app.retention import arrow_schema
+
+# pyarrow is imported where it is used, so importing this module (as the API does) stays cheap
+if TYPE_CHECKING:
+    import pyarrow as pa
+
+# Rows per record batch (and Parquet row group)
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "10000"))
+EXPORT_COMPRESSION = os.getenv("EXPORT_COMPRESSION", "zstd")
+
+EXPORT_TABLES: Dict[str, HistoryTable] = {
+    history.table: history for history in (CATEGORIZED_EXPENSES, CATEGORIZATION_LOG)
+}
+
+# format: (media type, file extension)
+EXPORT_FORMATS = {
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrows"),
+}
+
+_DB_TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+class _ChunkSink:
+    """Write-only file object that hands out whatever was written since the last drain()."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data, self._chunks = b"".join(self._chunks), []
+        return data
+
+
+def check_filters(table: str, user_id: Optional[str] = None, session_id: Optional[str] = None):
+    """Raises ValueError for a table that cannot be exported or filters it has no columns for."""
+    if table not in EXPORT_TABLES:
+        raise ValueError(f"Unknown export table: {table!r}")
+    if session_id is not None and table == CATEGORIZATION_LOG.table:
+        raise ValueError("categorization_log rows have no session; filter it by user or date.")
+
+
+def _scopes(conn: sqlite3.Connection, table: str, user_id: Optional[str],
+            session_id: Optional[str]) -> List[Optional[Tuple[str, str]]]:
+    """
+    The (column, value) scopes to export one after another; [None] means the
+    whole table in time order. categorization_log rows carry their user_id,
+    categorized_expenses rows are found through the user's sessions.
+    """
+    if table == CATEGORIZATION_LOG.table:
+        return [("user_id", user_id) if user_id is not None else None]
+    if user_id is None:
+        return [("session_id", session_id) if session_id is not None else None]
+    sessions = [row[0] for row in conn.execute(
+        "SELECT session_id FROM sessions WHERE user_id = ? ORDER BY start_time, session_id", (user_id,)
+    )]
+    if session_id is not None:
+        sessions = [session_id] if session_id in sessions else []
+    return [("session_id", session) for session in sessions]
+
+
+def _fetch_chunk(conn: sqlite3.Connection, history: HistoryTable, columns: str, scope: Optional[Tuple[str, str]],
+                 after: Tuple[str, int], since: Optional[str], until: Optional[str], limit: int) -> List[tuple]:
+    condition = f"{scope[0]} = ? AND " if scope is not None else ""
+    params = (scope[1],) if scope is not None else ()
+    # Walks idx_<table>_session_time for one session, idx_categorization_log_user_time for
+    # one user's log and idx_<table>_timestamp otherwise
+    return [tuple(row) for row in conn.execute(
+        f"SELECT {columns} FROM {history.table} WHERE {condition}(timestamp, {history.id_column}) > (?, ?) "
+        f"AND timestamp >= COALESCE(?, '') AND (? IS NULL OR timestamp < ?) "
+        f"ORDER BY timestamp, {history.id_column} LIMIT ?",
+        params + (after[0], after[1], since, until, until, limit)
+    )]
+
+
+def _to_batch(rows: List[tuple], schema: "pa.Schema") -> "pa.RecordBatch":
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    arrays = []
+    for i, field in enumerate(schema):
+        values = [row[i] for row in rows]
+        if pa.types.is_timestamp(field.type):
+            arrays.append(pc.strptime(pa.array(values, type=pa.string()), format=_DB_TIMESTAMP_FORMAT, unit="s"))
+        else:
+            arrays.append(pa.array(values, type=field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def export_schema(conn: sqlite3.Connection, table: str) -> "pa.Schema":
+    """Columns of an export: the table's, with DATETIME columns as timestamp[s]."""
+    return arrow_schema(conn, EXPORT_TABLES[table], timestamps=True)
+
+
+def iter_batches(connection_factory: Callable[[], sqlite3.Connection], table: str, user_id: Optional[str] = None,
+                 session_id: Optional[str] = None, since: Optional[datetime] = None, until: Optional[datetime] = None,
+                 chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator["pa.RecordBatch"]:
+    """
+    Yields the matching rows as record batches of up to chunk_size rows.
+    The connection is looked up per chunk because a streaming response may
+    resume on a different worker thread.
+    """
+    check_filters(table, user_id, session_id)
+    history = EXPORT_TABLES[table]
+    schema = export_schema(connection_factory(), table)
+    columns = ", ".join(schema.names)
+    timestamp, row_id = schema.get_field_index("timestamp"), schema.get_field_index(history.id_column)
+    since, until = to_db_timestamp(since), to_db_timestamp(until)
+    for scope in _scopes(connection_factory(), table, user_id, session_id):
+        after = ("", -1)
+        while True:
+            rows = _fetch_chunk(connection_factory(), history, columns, scope, after, since, until, chunk_size)
+            if rows:
+                yield _to_batch(rows, schema)
+            if len(rows) < chunk_size:
+                break
+            after = (rows[-1][timestamp], rows[-1][row_id])
+
+
+def encode(batches: Iterator["pa.RecordBatch"], schema: "pa.Schema", format: str = "parquet",
+           compression: str = EXPORT_COMPRESSION) -> Iterator[bytes]:
+    """Encodes batches as one Parquet file (a row group per batch) or an Arrow IPC stream, chunk by chunk."""
+    import pyarrow.ipc as ipc
+    import pyarrow.parquet as pq
+
+    sink = _ChunkSink()
+    if format == "parquet":
+        writer = pq.ParquetWriter(sink, schema, compression=compression)
+    elif format == "arrow":
+        writer = ipc.new_stream(sink, schema)
+    else:
+        raise ValueError(f"Unknown export format: {format!r}")
+    try:
+        for batch in batches:
+            writer.write_batch(batch)
+            data = sink.drain()
+            if data:
+                yield data
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def stream_export(connection_factory: Callable[[], sqlite3.Connection], table: str, format: str = "parquet",
+                  user_id: Optional[str] = None, session_id: Optional[str] = None, since: Optional[datetime] = None,
+                  until: Optional[datetime] = None, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[bytes]:
+    """The encoded bytes of an export, produced one chunk of rows at a time."""
+    check_filters(table, user_id, session_id)
+    schema = export_schema(connection_factory(), table)
+    batches = iter_batches(connection_factory, table, user_id, session_id, since, until, chunk_size)
+    return encode(batches, schema, format)
+
+
+def main(argv: List[str] = None) -> int:
+    from app import db
+
+    parser = argparse.ArgumentParser(prog="python -m app.export", description="Exports a table as Parquet or Arrow IPC.")
+    parser.add_argument("table", choices=sorted(EXPORT_TABLES))
+    parser.add_argument("-o", "--output", required=True, help="file to write, or - for stdout")
+    parser.add_argument("--format", choices=sorted(EXPORT_FORMATS), default="parquet")
+    parser.add_argument("--db", default=db.DB_PATH, help=f"database file (default: {db.DB_PATH})")
+    parser.add_argument("--user-id")
+    parser.add_argument("--session-id")
+    parser.add_argument("--since", type=datetime.fromisoformat, help="ISO timestamp, inclusive")
+    parser.add_argument("--until", type=datetime.fromisoformat, help="ISO timestamp, exclusive")
+    parser.add_argument("--chunk-size", type=int, default=EXPORT_CHUNK_SIZE)
+    args = parser.parse_args(argv)
+
+    try:
+        check_filters(args.table, args.user_id, args.session_id)
+    except ValueError as e:
+        parser.error(str(e))
+    db.configure(args.db)
+    chunks = stream_export(db.get_connection, args.table, args.format, args.user_id, args.session_id,
+                           args.since, args.until, args.chunk_size)
+    if args.output == "-":
+        for chunk in chunks:
+            sys.stdout.buffer.write(chunk)
+    else:
+        with open(args.output, "wb") as f:
+            for chunk in chunks:
+                f.write(chunk)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+"""
+Keyset pagination over per-session history tables.
+
+Pages are ordered by (timestamp, id) and continue strictly after an opaque
+cursor that encodes the last row returned, so every page costs the same
+indexed range scan no matter how deep into the history it is.
+"""
+import base64
+import binascii
+import json
+from datetime import datetime, timezone
+from typing import Callable, Iterator, List, NamedTuple, Optional, Tuple
+
+import sqlite3
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+# Rows fetched per query while streaming a whole history
+STREAM_CHUNK_SIZE = 500
+
+
+class HistoryTable(NamedTuple):
+    table: str
+    id_column: str
+
+
+INTERACTIONS = HistoryTable("interactions", "interaction_id")
+CATEGORIZED_EXPENSES = HistoryTable("categorized_expenses", "expense_id")
+CATEGORIZATION_LOG = HistoryTable("categorization_log", "id")
+
+
+def encode_cursor(timestamp: str, row_id: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps([timestamp, row_id]).encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    """Returns the (timestamp, id) a cursor points at; raises ValueError if it is malformed."""
+    try:
+        timestamp, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (ValueError, TypeError, binascii.Error) as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+    if not isinstance(timestamp, str) or not isinstance(row_id, int):
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    return timestamp, row_id
+
+
+def to_db_timestamp(value: Optional[datetime]) -> Optional[str]:
+    """Formats a datetime like SQLite's CURRENT_TIMESTAMP (UTC, "YYYY-MM-DD HH:MM:SS")."""
+    if value is None:
+        return None
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def fetch_page(conn: sqlite3.Connection, history: HistoryTable, session_id: str, limit: int,
+               cursor: Optional[str] = None, since: Optional[datetime] = None,
+               until: Optional[datetime] = None) -> Tuple[List[sqlite3.Row], Optional[str]]:
+    """
+    Returns up to `limit` rows of a session after `cursor`, with timestamp in
+    [since, until), and the cursor of the next page (None on the last page).
+    """
+    after = decode_cursor(cursor) if cursor else ("", -1)
+    # The same SQL text for every page, so the pool's statement cache keeps it prepared
+    rows = conn.execute(
+        f"SELECT * FROM {history.table} WHERE session_id = ? AND (timestamp, {history.id_column}) > (?, ?) "
+        f"AND timestamp >= COALESCE(?, '') AND (? IS NULL OR timestamp < ?) "
+        f"ORDER BY timestamp, {history.id_column} LIMIT ?",
+        (session_id, after[0], after[1], to_db_timestamp(since), to_db_timestamp(until), to_db_timestamp(until), limit + 1)
+    ).fetchall()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(last["timestamp"], last[history.id_column])
+
+
+def iter_rows(connection_factory: Callable[[], sqlite3.Connection], history: HistoryTable, session_id: str,
+              cursor: Optional[str] = None, since: Optional[datetime] = None, until: Optional[datetime] = None,
+              limit: Optional[int] = None, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[dict]:
+    """
+    Yields a session's rows one page of chunk_size at a time, so memory stays
+    constant however long the history is. The connection is looked up per page
+    because a streaming response may resume on a different worker thread.
+    """
+    remaining = limit
+    while remaining is None or remaining > 0:
+        size = chunk_size if remaining is None else min(chunk_size, remaining)
+        rows, cursor = fetch_page(connection_factory(), history, session_id, size, cursor, since, until)
+        for row in rows:
+            yield dict(row)
+        if remaining is not None:
+            remaining -= len(rows)
+        if cursor is None:
+            return
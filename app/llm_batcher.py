@@ -0,0 +1,181 @@
+import asyncio
+import os
+import re
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Tuple
+
+from app.log import get_logger
+
+logger = get_logger(__name__)
+
+# How long the batcher waits for more descriptions after the first one arrives
+LLM_BATCH_WINDOW_MS = int(os.getenv("LLM_BATCH_WINDOW_MS", "25"))
+LLM_BATCH_MAX_SIZE = int(os.getenv("LLM_BATCH_MAX_SIZE", "20"))
+# Number of batches that can wait on the LLM at the same time
+LLM_BATCH_CONCURRENCY = int(os.getenv("LLM_BATCH_CONCURRENCY", "32"))
+
+LLM_BATCH_PROMPT_TEMPLATE = """You are an expert expense categorization assistant.
+        Your task is to categorize each of the numbered expense descriptions below into one of the following categories: {categories}.
+        Respond with exactly one line per description, in the same order, formatted as "<number>. <category name>" and nothing else.
+        If none of the categories seem to fit a description, use "Unknown" for it.
+
+        Expense Descriptions:
+        {expense_descriptions}
+        Categories:"""
+
+_NUMBERED_LINE = re.compile(r'^\s*(\d+)\s*[.):\-]\s*(.+?)\s*$')
+
+
+def format_batch(descriptions: List[str]) -> str:
+    """Renders descriptions as the numbered list used in the batch prompt."""
+    return "\n".join(f'{i}. "{text}"' for i, text in enumerate(descriptions, start=1))
+
+
+def parse_batch_response(response: str, expected: int) -> Optional[List[str]]:
+    """
+    Parses a "<number>. <category>" per line response.
+    Returns the answers in order, or None unless exactly 1..expected were answered.
+    """
+    answers: Dict[int, str] = {}
+    for line in response.splitlines():
+        match = _NUMBERED_LINE.match(line)
+        if match:
+            answers[int(match.group(1))] = match.group(2).strip().strip('"\'')
+    if sorted(answers) != list(range(1, expected + 1)):
+        return None
+    return [answers[i] for i in range(1, expected + 1)]
+
+
+class LLMMicroBatcher:
+    """
+    Coalesces concurrent LLM categorizations into a single numbered prompt.
+
+    The batcher runs its own event loop on a background thread. Pending
+    descriptions are collected for up to window_ms (or until max_batch_size
+    arrive) and sent as one batch prompt with the chain's ainvoke, so many
+    batches can wait on the LLM without holding a thread each. Each answer is
+    validated against the category list; answers that are not a known
+    category, and whole batches whose response cannot be parsed, are retried
+    with the single-description chain.
+
+    Each description may carry its own category list (e.g. the categories.yaml
+    snapshot its request started with); descriptions are only batched together
+    with others that use the same list.
+
+    A future cancelled while it is still collecting (e.g. a speculative call
+    a cheaper tier made unnecessary) is dropped before its batch is sent.
+
+    Sync callers block on categorize(); async callers await acategorize().
+    """
+
+    def __init__(self, single_chain, batch_chain, categories: List[str],
+                 window_ms: int = LLM_BATCH_WINDOW_MS, max_batch_size: int = LLM_BATCH_MAX_SIZE,
+                 concurrency: int = LLM_BATCH_CONCURRENCY):
+        self.single_chain = single_chain
+        self.batch_chain = batch_chain
+        self.categories = categories
+        self.window = window_ms / 1000
+        self.max_batch_size = max_batch_size
+        self.concurrency = concurrency
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional["asyncio.Queue[Tuple[str, Tuple[str, ...], Future]]"] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                started = threading.Event()
+                self._thread = threading.Thread(target=self._run, args=(started,), name="llm-micro-batcher", daemon=True)
+                self._thread.start()
+                started.wait()
+
+    def submit(self, text: str, categories: Optional[List[str]] = None) -> Future:
+        """
+        Queues a normalized description, offered the given categories (the
+        batcher's own list by default); the future resolves to the LLM's raw answer.
+        """
+        self._ensure_started()
+        future: Future = Future()
+        item = (text, tuple(categories if categories is not None else self.categories), future)
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, item)
+        return future
+
+    def categorize(self, text: str, categories: Optional[List[str]] = None) -> str:
+        """Blocking helper returning the LLM's answer for one description."""
+        return self.submit(text, categories).result()
+
+    async def acategorize(self, text: str, categories: Optional[List[str]] = None) -> str:
+        """Awaitable helper returning the LLM's answer for one description."""
+        return await asyncio.wrap_future(self.submit(text, categories))
+
+    def _run(self, started: threading.Event):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._queue = asyncio.Queue()
+        started.set()
+        self._loop.run_until_complete(self._collect())
+
+    async def _collect(self):
+        limit = asyncio.Semaphore(self.concurrency)
+        tasks = set()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            groups: Dict[Tuple[str, ...], List[Tuple[str, Future]]] = {}
+            for text, categories, future in batch:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                groups.setdefault(categories, []).append((text, future))
+            for categories, group in groups.items():
+                await limit.acquire()
+                task = asyncio.create_task(self._dispatch(group, list(categories)))
+                tasks.add(task)
+                task.add_done_callback(lambda done: (tasks.discard(done), limit.release()))
+
+    def _single_inputs(self, texts: List[str], categories: List[str]) -> List[dict]:
+        return [
+            {"expense_description": text, "categories": ", ".join(categories)}
+            for text in texts
+        ]
+
+    async def _dispatch(self, batch: List[Tuple[str, Future]], categories: List[str]):
+        texts = [text for text, _ in batch]
+        answers: List[Optional[str]] = [None] * len(batch)
+        if len(batch) > 1:
+            try:
+                response = await self.batch_chain.ainvoke({
+                    "expense_descriptions": format_batch(texts),
+                    "categories": ", ".join(categories)
+                })
+                parsed = parse_batch_response(response, len(batch))
+                if parsed is None:
+                    logger.warning("Could not parse batch LLM response for %d descriptions. Falling back to single calls.", len(batch))
+                else:
+                    answers = [answer if answer in categories else None for answer in parsed]
+            except Exception as e:
+                logger.warning("Batch LLM call failed (%s). Falling back to single calls.", e)
+
+        retry = [i for i, answer in enumerate(answers) if answer is None]
+        if retry:
+            outputs = await self.single_chain.abatch(self._single_inputs([texts[i] for i in retry], categories), return_exceptions=True)
+            for i, output in zip(retry, outputs):
+                answers[i] = output
+
+        for (_, future), answer in zip(batch, answers):
+            if isinstance(answer, Exception):
+                future.set_exception(answer)
+            else:
+                future.set_result(answer)
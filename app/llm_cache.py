@@ -0,0 +1,146 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+from app.db import get_connection
+
+LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+LLM_CACHE_MAX_ROWS = int(os.getenv("LLM_CACHE_MAX_ROWS", "100000"))
+LLM_CACHE_MEMORY_SIZE = int(os.getenv("LLM_CACHE_MEMORY_SIZE", "4096"))
+
+# Trim the table back to max_rows after this many inserts
+_EVICTION_CHECK_EVERY = 100
+
+
+def cache_fingerprint(categories: List[str], prompt_template: str) -> str:
+    """Hashes everything besides the input text that determines the LLM's answer."""
+    digest = hashlib.sha256()
+    digest.update("\x1f".join(categories).encode("utf-8"))
+    digest.update(b"\x1e")
+    digest.update(prompt_template.encode("utf-8"))
+    return digest.hexdigest()
+
+
+class LLMCache:
+    """
+    Persistent cache of LLM categorizations keyed on normalized input text.
+
+    Entries live in the llm_cache SQLite table (created by app.migrations) with
+    an in-memory LRU in front. Keys include a fingerprint of the category list
+    and prompt template, so editing categories.yaml or the prompt makes old
+    answers unreachable; purge_other_fingerprints() deletes them.
+    Entries older than ttl_seconds are ignored and deleted, and the table is
+    trimmed to max_rows oldest-first.
+    """
+
+    def __init__(self, fingerprint: str, connection_factory: Callable[[], sqlite3.Connection] = get_connection,
+                 ttl_seconds: int = LLM_CACHE_TTL_SECONDS, max_rows: int = LLM_CACHE_MAX_ROWS,
+                 memory_size: int = LLM_CACHE_MEMORY_SIZE):
+        self.fingerprint = fingerprint
+        self.connection_factory = connection_factory
+        self.ttl_seconds = ttl_seconds
+        self.max_rows = max_rows
+        self.memory_size = memory_size
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._inserts = 0
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "expired": 0, "evictions": 0}
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.fingerprint}\x00{text}".encode("utf-8")).hexdigest()
+
+    def purge_other_fingerprints(self) -> int:
+        """Deletes the rows cached under any other fingerprint and returns how many there were."""
+        conn = self.connection_factory()
+        purged = conn.execute("DELETE FROM llm_cache WHERE fingerprint != ?", (self.fingerprint,)).rowcount
+        conn.commit()
+        return purged
+
+    def _remember(self, key: str, category: str, created_at: float):
+        with self._lock:
+            self._memory[key] = (category, created_at)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_size:
+                self._memory.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def get(self, text: str) -> Optional[str]:
+        """Returns the cached category for this normalized text, or None."""
+        key = self._key(text)
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if now - entry[1] <= self.ttl_seconds:
+                    self._memory.move_to_end(key)
+                    self._stats["memory_hits"] += 1
+                    return entry[0]
+                del self._memory[key]
+
+        conn = self.connection_factory()
+        row = conn.execute("SELECT category, created_at FROM llm_cache WHERE cache_key = ?", (key,)).fetchone()
+        if row is not None and now - row[1] <= self.ttl_seconds:
+            self._remember(key, row[0], row[1])
+            with self._lock:
+                self._stats["disk_hits"] += 1
+            return row[0]
+
+        if row is not None:
+            conn.execute("DELETE FROM llm_cache WHERE cache_key = ?", (key,))
+            conn.commit()
+        with self._lock:
+            self._stats["misses"] += 1
+            if row is not None:
+                self._stats["expired"] += 1
+        return None
+
+    def put(self, text: str, category: str):
+        """Stores the LLM's category for this normalized text."""
+        key = self._key(text)
+        created_at = time.time()
+        self._remember(key, category, created_at)
+
+        conn = self.connection_factory()
+        conn.execute(
+            "INSERT OR REPLACE INTO llm_cache (cache_key, fingerprint, input_text, category, created_at) VALUES (?, ?, ?, ?, ?)",
+            (key, self.fingerprint, text, category, created_at)
+        )
+        self._inserts += 1
+        if self._inserts % _EVICTION_CHECK_EVERY == 0:
+            self._trim(conn)
+        conn.commit()
+
+    def _trim(self, conn: sqlite3.Connection):
+        """Deletes expired rows, then the oldest rows beyond max_rows."""
+        expired = conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (time.time() - self.ttl_seconds,)).rowcount
+        excess = conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0] - self.max_rows
+        evicted = 0
+        if excess > 0:
+            evicted = conn.execute(
+                "DELETE FROM llm_cache WHERE cache_key IN (SELECT cache_key FROM llm_cache ORDER BY created_at LIMIT ?)",
+                (excess,)
+            ).rowcount
+        with self._lock:
+            self._stats["expired"] += expired
+            self._stats["evictions"] += evicted
+
+    def clear(self):
+        """Drops every cached answer."""
+        with self._lock:
+            self._memory.clear()
+        conn = self.connection_factory()
+        conn.execute("DELETE FROM llm_cache")
+        conn.commit()
+
+    def stats(self) -> Dict[str, float]:
+        """Returns hit/miss counters and the hit ratio since startup."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_entries"] = len(self._memory)
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_ratio"] = (stats["memory_hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        return stats
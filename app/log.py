@@ -0,0 +1,36 @@
+"""
+Logging setup shared by the API and the categorization pipeline.
+
+Hot-path loggers are sampled: every WARNING and above is kept, but only a
+LOG_SAMPLE_RATE share of DEBUG/INFO records, so per-request traces stay
+cheap under load.
+"""
+import logging
+import os
+import random
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "0.01"))
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps every record at WARNING or above and a random `rate` share of the rest."""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno >= logging.WARNING or random.random() < self.rate
+
+
+def get_logger(name: str, sampled: bool = False) -> logging.Logger:
+    logger = logging.getLogger(name)
+    if sampled and not any(isinstance(f, SamplingFilter) for f in logger.filters):
+        logger.addFilter(SamplingFilter(LOG_SAMPLE_RATE))
+    return logger
+
+
+def configure_logging(level: str = LOG_LEVEL):
+    logging.basicConfig(level=level, format=LOG_FORMAT)
@@ -1,13 +1,55 @@
+import os
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
+from app.log import configure_logging, get_logger
 from app.agent_api import router as agent_router
-from app.telegram_api import router as telegram_router
-from app.sms_api import router as sms_router
+from app.db import get_connection, pool
+from app.migrations import migrate
+from app.audit_log import audit_log
+from app.metrics import registry
+from app import agent
+
+# Build the graphs, indexes and LLM client at startup instead of on the first request
+WARM_UP_ON_STARTUP = os.getenv("WARM_UP_ON_STARTUP", "1") == "1"
+
+configure_logging()
+logger = get_logger(__name__)
 
 app = FastAPI(title="Expense Categorizer API")
 
 app.include_router(agent_router, prefix="/api", tags=["Categorization", "Sessions", "Analytics"])
-app.include_router(telegram_router, prefix="/telegram", tags=["Telegram Bot"])
-app.include_router(sms_router, prefix="/sms", tags=["SMS Integration"])
+
+# Channel routers (and their SDKs) are only imported when the channel is configured
+if os.getenv("TELEGRAM_BOT_TOKEN"):
+    from app.telegram_api import router as telegram_router
+    app.include_router(telegram_router, prefix="/telegram", tags=["Telegram Bot"])
+else:
+    logger.info("TELEGRAM_BOT_TOKEN not set; Telegram webhook disabled.")
+
+if all(os.getenv(name) for name in ("TWILIO_ACCOUNT_SID", "TWILIO_AUTH_TOKEN", "TWILIO_PHONE_NUMBER")):
+    from app.sms_api import router as sms_router
+    app.include_router(sms_router, prefix="/sms", tags=["SMS Integration"])
+else:
+    logger.info("Twilio environment variables not set; SMS webhook disabled.")
+
+@app.on_event("startup")
+def start_background_work():
+    # Brings the schema (indexes, analytics rollups) up to date before the first write
+    migrate(get_connection())
+    agent.category_config.start()
+    if WARM_UP_ON_STARTUP:
+        agent.warm_up()
+
+@app.on_event("shutdown")
+def close_db_connections():
+    agent.category_config.stop()
+    audit_log.close()
+    pool.close_all()
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def metrics():
+    """Prometheus scrape endpoint."""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
 
 @app.get("/")
 def root():
@@ -0,0 +1,271 @@
+"""
+In-process metrics rendered in the Prometheus text exposition format.
+
+Counters, gauges and histograms are plain thread-safe objects registered on
+a module-level registry; app.main serves registry.render() on /metrics.
+"""
+import asyncio
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+# Upper bounds (seconds) shared by every latency histogram
+LATENCY_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        return "\n".join(lines + self.samples())
+
+
+class Counter(Metric):
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in values]
+
+
+class Gauge(Metric):
+    """A gauge whose value is computed by a callback when metrics are scraped."""
+    type_name = "gauge"
+
+    def __init__(self, name: str, documentation: str, function: Callable[[], float]):
+        super().__init__(name, documentation)
+        self.function = function
+
+    def samples(self) -> List[str]:
+        return [f"{self.name} {_format_value(float(self.function()))}"]
+
+
+class Histogram(Metric):
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        # label values -> [per-bucket counts, sum, count]
+        self._series: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def count(self, **labels) -> int:
+        series = self._series.get(self._key(labels))
+        return series[2] if series else 0
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            series = sorted((key, [list(s[0]), s[1], s[2]]) for key, s in self._series.items())
+        lines = []
+        for key, (counts, total, count) in series:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+
+registry = MetricsRegistry()
+
+STAGE_SECONDS: Histogram = registry.register(Histogram(
+    "categorizer_stage_duration_seconds", "Time spent in each categorization stage.", ["stage"]
+))
+TIER_RESULTS: Counter = registry.register(Counter(
+    "categorizer_tier_results_total", "Categorization attempts per tier and whether the tier matched.", ["tier", "result"]
+))
+LLM_CACHE_LOOKUPS: Counter = registry.register(Counter(
+    "llm_cache_lookups_total", "LLM cache lookups by result.", ["result"]
+))
+LLM_TOKENS: Counter = registry.register(Counter(
+    "llm_tokens_total", "Tokens reported by the LLM provider.", ["type"]
+))
+LLM_SPECULATIONS: Counter = registry.register(Counter(
+    "llm_speculative_calls_total", "Speculative LLM calls by outcome: used, cancelled before sending, or discarded.", ["outcome"]
+))
+BUDGET_EXHAUSTED: Counter = registry.register(Counter(
+    "categorizer_budget_exhausted_total", "Requests answered Unknown because their latency budget ran out."
+))
+RESULT_CACHE_LOOKUPS: Counter = registry.register(Counter(
+    "result_cache_lookups_total", "Final-result cache lookups by result.", ["result"]
+))
+RESULT_CACHE_EVICTIONS: Counter = registry.register(Counter(
+    "result_cache_evictions_total", "Final results evicted from the result cache to stay within its size."
+))
+RESULT_CACHE_INVALIDATIONS: Counter = registry.register(Counter(
+    "result_cache_invalidations_total", "Result cache invalidations by scope (one user, or everything).", ["scope"]
+))
+DB_OPERATION_SECONDS: Histogram = registry.register(Histogram(
+    "db_operation_duration_seconds", "Time spent in each database helper.", ["operation"]
+))
+
+
+def fallthrough_ratio() -> float:
+    """Share of descriptions the DB tier saw that ended up at the LLM tier."""
+    attempts = TIER_RESULTS.value(tier="db", result="hit") + TIER_RESULTS.value(tier="db", result="miss")
+    if not attempts:
+        return 0.0
+    return (TIER_RESULTS.value(tier="llm", result="hit") + TIER_RESULTS.value(tier="llm", result="miss")) / attempts
+
+
+registry.register(Gauge(
+    "categorizer_fallthrough_ratio", "Share of descriptions that missed every local tier and went to the LLM.",
+    fallthrough_ratio
+))
+
+
+def result_cache_hit_ratio() -> float:
+    hits = RESULT_CACHE_LOOKUPS.value(result="hit")
+    lookups = hits + RESULT_CACHE_LOOKUPS.value(result="miss")
+    return hits / lookups if lookups else 0.0
+
+
+registry.register(Gauge(
+    "result_cache_hit_ratio", "Share of categorization requests answered from the result cache.", result_cache_hit_ratio
+))
+
+
+def instrument_tier(tier: str):
+    """
+    Decorates a graph node (sync or async) so each call records its latency
+    under stage=tier, and a hit if it set a category other than Unknown.
+    """
+    def record(update: dict):
+        matched = update.get("category") not in (None, "Unknown")
+        TIER_RESULTS.inc(tier=tier, result="hit" if matched else "miss")
+
+    def decorator(node):
+        if asyncio.iscoroutinefunction(node):
+            @functools.wraps(node)
+            async def anode(state):
+                with STAGE_SECONDS.time(stage=tier):
+                    update = await node(state)
+                record(update)
+                return update
+            return anode
+
+        @functools.wraps(node)
+        def wrapped(state):
+            with STAGE_SECONDS.time(stage=tier):
+                update = node(state)
+            record(update)
+            return update
+        return wrapped
+
+    return decorator
+
+
+def timed_db_operation(func):
+    """Records the decorated helper's latency under operation=<function name>."""
+    @functools.wraps(func)
+    def wrapped(*args, **kwargs):
+        with DB_OPERATION_SECONDS.time(operation=func.__name__):
+            return func(*args, **kwargs)
+    return wrapped
+
+
+class TokenUsageCallback(BaseCallbackHandler):
+    """LangChain callback that adds each LLM response's token usage to llm_tokens_total."""
+
+    def on_llm_end(self, response, **kwargs):
+        usage: Optional[dict] = (response.llm_output or {}).get("token_usage")
+        if usage:
+            LLM_TOKENS.inc(usage.get("prompt_tokens", 0), type="prompt")
+            LLM_TOKENS.inc(usage.get("completion_tokens", 0), type="completion")
+            return
+        # Providers that do not fill llm_output report usage on the message instead
+        for generations in response.generations:
+            for generation in generations:
+                metadata = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                if metadata:
+                    LLM_TOKENS.inc(metadata.get("input_tokens", 0), type="prompt")
+                    LLM_TOKENS.inc(metadata.get("output_tokens", 0), type="completion")
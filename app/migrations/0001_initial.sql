@@ -1,8 +1,7 @@
--- schema.sql
+-- Tables previously created by data/schema.sql and init_db.py.
+-- IF NOT EXISTS lets databases created by either script adopt the migrations.
 
-DROP TABLE IF EXISTS keyword_category;
-
-CREATE TABLE keyword_category (
+CREATE TABLE IF NOT EXISTS keyword_category (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     user_id TEXT, -- NULL for global keywords
     keyword TEXT NOT NULL,
@@ -10,9 +9,7 @@ CREATE TABLE keyword_category (
     UNIQUE(user_id, keyword)
 );
 
-DROP TABLE IF EXISTS feedback;
-
-CREATE TABLE feedback (
+CREATE TABLE IF NOT EXISTS feedback (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     input_text TEXT NOT NULL,
     predicted_category TEXT,
@@ -22,9 +19,7 @@ CREATE TABLE feedback (
     timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
 );
 
-DROP TABLE IF EXISTS categorization_log;
-
-CREATE TABLE categorization_log (
+CREATE TABLE IF NOT EXISTS categorization_log (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
     input_text TEXT NOT NULL,
@@ -34,9 +29,7 @@ CREATE TABLE categorization_log (
     tags TEXT
 );
 
-DROP TABLE IF EXISTS sessions;
-
-CREATE TABLE sessions (
+CREATE TABLE IF NOT EXISTS sessions (
     session_id TEXT PRIMARY KEY,
     start_time DATETIME DEFAULT CURRENT_TIMESTAMP,
     last_active_time DATETIME DEFAULT CURRENT_TIMESTAMP,
@@ -44,9 +37,7 @@ CREATE TABLE sessions (
     metadata TEXT
 );
 
-DROP TABLE IF EXISTS interactions;
-
-CREATE TABLE interactions (
+CREATE TABLE IF NOT EXISTS interactions (
     interaction_id INTEGER PRIMARY KEY AUTOINCREMENT,
     session_id TEXT NOT NULL,
     timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
@@ -56,9 +47,7 @@ CREATE TABLE interactions (
     FOREIGN KEY (session_id) REFERENCES sessions(session_id)
 );
 
-DROP TABLE IF EXISTS categorized_expenses;
-
-CREATE TABLE categorized_expenses (
+CREATE TABLE IF NOT EXISTS categorized_expenses (
     expense_id INTEGER PRIMARY KEY AUTOINCREMENT,
     session_id TEXT NOT NULL,
     timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
@@ -70,4 +59,11 @@ CREATE TABLE categorized_expenses (
     FOREIGN KEY (session_id) REFERENCES sessions(session_id)
 );
 
-
+-- LLM answers cached by app.llm_cache.LLMCache
+CREATE TABLE IF NOT EXISTS llm_cache (
+    cache_key TEXT PRIMARY KEY,
+    fingerprint TEXT NOT NULL,
+    input_text TEXT NOT NULL,
+    category TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
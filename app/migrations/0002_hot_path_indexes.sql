@@ -0,0 +1,14 @@
+-- Indexes for every query the API runs; tests/test_migrations.py checks the query plans.
+
+-- Global (user_id IS NULL) and per-user keyword listings, covering id, keyword and category
+CREATE INDEX IF NOT EXISTS idx_keyword_category_user ON keyword_category (user_id, keyword, category);
+
+-- Session history pages in (timestamp, id) order
+CREATE INDEX IF NOT EXISTS idx_interactions_session_time ON interactions (session_id, timestamp, interaction_id);
+CREATE INDEX IF NOT EXISTS idx_categorized_expenses_session_time ON categorized_expenses (session_id, timestamp, expense_id);
+
+-- Time-range reads and retention of the categorization log
+CREATE INDEX IF NOT EXISTS idx_categorization_log_timestamp ON categorization_log (timestamp);
+
+-- LLM cache expiry and oldest-first trimming
+CREATE INDEX IF NOT EXISTS idx_llm_cache_created_at ON llm_cache (created_at);
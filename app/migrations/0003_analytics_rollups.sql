@@ -0,0 +1,64 @@
+-- Rollups read by app.analytics and /api/analytics/*, kept current by AFTER INSERT triggers.
+-- Rebuilt from scratch and backfilled from the existing rows, so this is safe on databases
+-- where an earlier version of the application had already installed them.
+
+DROP TRIGGER IF EXISTS categorization_log_rollup;
+DROP TRIGGER IF EXISTS categorized_expenses_rollup;
+DROP TRIGGER IF EXISTS feedback_rollup;
+DROP TABLE IF EXISTS categorization_daily;
+DROP TABLE IF EXISTS expense_category_totals;
+DROP TABLE IF EXISTS correction_pairs;
+
+CREATE TABLE categorization_daily (
+    day TEXT NOT NULL,
+    category TEXT NOT NULL,
+    matching_method TEXT NOT NULL,
+    count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, category, matching_method)
+);
+
+CREATE TABLE expense_category_totals (
+    category TEXT PRIMARY KEY,
+    count INTEGER NOT NULL DEFAULT 0,
+    total_amount REAL NOT NULL DEFAULT 0
+);
+
+CREATE TABLE correction_pairs (
+    predicted_category TEXT NOT NULL,
+    corrected_category TEXT NOT NULL,
+    count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (predicted_category, corrected_category)
+);
+
+CREATE TRIGGER categorization_log_rollup AFTER INSERT ON categorization_log
+BEGIN
+    INSERT INTO categorization_daily (day, category, matching_method, count)
+    VALUES (date(NEW.timestamp), NEW.final_category, COALESCE(NEW.matching_method, 'Unknown'), 1)
+    ON CONFLICT (day, category, matching_method) DO UPDATE SET count = count + 1;
+END;
+
+CREATE TRIGGER categorized_expenses_rollup AFTER INSERT ON categorized_expenses
+BEGIN
+    INSERT INTO expense_category_totals (category, count, total_amount)
+    VALUES (NEW.category, 1, COALESCE(NEW.amount, 0))
+    ON CONFLICT (category) DO UPDATE SET count = count + 1, total_amount = total_amount + excluded.total_amount;
+END;
+
+CREATE TRIGGER feedback_rollup AFTER INSERT ON feedback
+WHEN NEW.predicted_category IS NOT NEW.corrected_category
+BEGIN
+    INSERT INTO correction_pairs (predicted_category, corrected_category, count)
+    VALUES (COALESCE(NEW.predicted_category, 'Unknown'), NEW.corrected_category, 1)
+    ON CONFLICT (predicted_category, corrected_category) DO UPDATE SET count = count + 1;
+END;
+
+INSERT INTO categorization_daily (day, category, matching_method, count)
+SELECT date(timestamp), final_category, COALESCE(matching_method, 'Unknown'), COUNT(*)
+FROM categorization_log GROUP BY 1, 2, 3;
+
+INSERT INTO expense_category_totals (category, count, total_amount)
+SELECT category, COUNT(*), COALESCE(SUM(amount), 0) FROM categorized_expenses GROUP BY category;
+
+INSERT INTO correction_pairs (predicted_category, corrected_category, count)
+SELECT COALESCE(predicted_category, 'Unknown'), corrected_category, COUNT(*)
+FROM feedback WHERE predicted_category IS NOT corrected_category GROUP BY 1, 2;
@@ -0,0 +1,5 @@
+-- Retention (app.retention) walks each audit table oldest-first in (timestamp, id) order.
+-- categorization_log is already covered by idx_categorization_log_timestamp.
+
+CREATE INDEX IF NOT EXISTS idx_interactions_timestamp ON interactions (timestamp, interaction_id);
+CREATE INDEX IF NOT EXISTS idx_categorized_expenses_timestamp ON categorized_expenses (timestamp, expense_id);
@@ -0,0 +1,3 @@
+-- Exports filtered by user (app.export) list the user's sessions, then page each session's rows.
+
+CREATE INDEX IF NOT EXISTS idx_sessions_user ON sessions (user_id, start_time, session_id);
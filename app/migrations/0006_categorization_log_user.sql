@@ -0,0 +1,4 @@
+-- The user each categorization was made for (NULL without a user_id). Similarity examples learned
+-- from a user's results are only matched for that user, since their own keywords may have decided them.
+
+ALTER TABLE categorization_log ADD COLUMN user_id TEXT;
@@ -0,0 +1,3 @@
+-- Exports of one user's categorization log (app.export) page through it in (timestamp, id) order.
+
+CREATE INDEX IF NOT EXISTS idx_categorization_log_user_time ON categorization_log (user_id, timestamp);
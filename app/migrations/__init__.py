@@ -0,0 +1,113 @@
+"""
+Versioned schema migrations.
+
+Each NNNN_name.sql file next to this module is one migration. The database's
+PRAGMA user_version records the last one applied, and migrate() applies every
+later file in order, each in its own transaction together with the version
+bump, so an interrupted run never leaves a half-applied migration behind and
+running it again is a no-op.
+
+    python -m app.migrations                 # migrate KEYWORDS_DB_PATH
+    python -m app.migrations --db other.db
+"""
+import os
+import re
+import sqlite3
+from typing import List, NamedTuple, Optional
+
+from app.log import get_logger
+
+MIGRATIONS_DIR = os.path.dirname(__file__)
+
+_FILENAME = re.compile(r"^(\d{4})_(\w+)\.sql$")
+
+logger = get_logger(__name__)
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    path: str
+
+    def statements(self) -> List[str]:
+        """Splits the file into complete statements (trigger bodies included)."""
+        with open(self.path, encoding="utf-8") as f:
+            lines = f.read().splitlines(keepends=True)
+        statements, current = [], ""
+        for line in lines:
+            current += line
+            if sqlite3.complete_statement(current):
+                statements.append(current.strip())
+                current = ""
+        leftover = [line for line in current.splitlines() if line.strip() and not line.strip().startswith("--")]
+        if leftover:
+            raise ValueError(f"{os.path.basename(self.path)} ends with an incomplete statement")
+        return statements
+
+
+def discover(directory: str = MIGRATIONS_DIR) -> List[Migration]:
+    """Returns the migrations in directory ordered by version; versions must be 1, 2, 3, ..."""
+    migrations = []
+    for filename in os.listdir(directory):
+        match = _FILENAME.match(filename)
+        if match:
+            migrations.append(Migration(int(match.group(1)), match.group(2), os.path.join(directory, filename)))
+    migrations.sort()
+    for expected, migration in enumerate(migrations, start=1):
+        if migration.version != expected:
+            raise ValueError(f"Migration {expected:04d} is missing (found {os.path.basename(migration.path)})")
+    return migrations
+
+
+def current_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def latest_version(directory: str = MIGRATIONS_DIR) -> int:
+    migrations = discover(directory)
+    return migrations[-1].version if migrations else 0
+
+
+def migrate(conn: sqlite3.Connection, target: Optional[int] = None, directory: str = MIGRATIONS_DIR) -> List[int]:
+    """
+    Applies every migration after the database's version up to target (by
+    default the latest) and returns the versions applied. Safe to call from
+    several processes at once: each migration re-checks the version after
+    taking the write lock.
+    """
+    if conn.in_transaction:
+        conn.commit()
+    applied = []
+    for migration in discover(directory):
+        if target is not None and migration.version > target:
+            break
+        if migration.version <= current_version(conn):
+            continue
+        # Statements run one by one because executescript() would commit the open transaction
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if migration.version <= current_version(conn):
+                conn.rollback()
+                continue
+            for statement in migration.statements():
+                conn.execute(statement)
+            conn.execute(f"PRAGMA user_version = {migration.version}")
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        logger.info("Applied migration %04d_%s.", migration.version, migration.name)
+        applied.append(migration.version)
+    return applied
+
+
+def migrate_database(db_path: str, target: Optional[int] = None) -> List[int]:
+    """Opens db_path (creating it and its directory if needed) and migrates it."""
+    directory = os.path.dirname(db_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        return migrate(conn, target)
+    finally:
+        conn.close()
@@ -0,0 +1,23 @@
+import argparse
+import sys
+
+from app.db import DB_PATH
+from app.migrations import migrate_database
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.migrations", description="Brings a database up to the latest schema.")
+    parser.add_argument("--db", default=DB_PATH, help=f"database file (default: {DB_PATH})")
+    parser.add_argument("--target", type=int, help="stop after this migration version")
+    args = parser.parse_args(argv)
+
+    applied = migrate_database(args.db, args.target)
+    if applied:
+        print(f"Applied migrations {', '.join(f'{version:04d}' for version in applied)} to {args.db}")
+    else:
+        print(f"{args.db} is already up to date")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
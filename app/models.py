@@ -1,9 +1,10 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 class CategorizeRequest(BaseModel):
     input_text: str
+    budget_ms: Optional[int] = None  # latency budget; CATEGORIZE_BUDGET_SECONDS when omitted
 
 class CategorizeResponse(BaseModel):
     category: str
@@ -11,6 +12,13 @@ class CategorizeResponse(BaseModel):
     confidence_score: Optional[float]
     matching_method: Optional[str]
 
+class BatchCategorizeRequest(BaseModel):
+    descriptions: List[str]
+    budget_ms: Optional[int] = None  # latency budget for the whole batch; CATEGORIZE_BATCH_BUDGET_SECONDS (none) when omitted
+
+class BatchCategorizeResponse(BaseModel):
+    results: List[CategorizeResponse]
+
 class FeedbackRequest(BaseModel):
     input_text: str
     predicted_category: str
@@ -53,3 +61,26 @@ class KeywordAddRequest(BaseModel):
     user_id: Optional[str] = None
     keyword: str
     category: str
+
+class CategoryCount(BaseModel):
+    category: str
+    count: int
+
+class MethodCount(BaseModel):
+    matching_method: str
+    count: int
+
+class DailyCategoryCount(BaseModel):
+    day: str
+    category: str
+    count: int
+
+class CategoryAmount(BaseModel):
+    category: str
+    count: int
+    total_amount: float
+
+class CorrectionCount(BaseModel):
+    predicted_category: str
+    corrected_category: str
+    count: int
@@ -0,0 +1,100 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Set, Tuple
+
+from app.metrics import RESULT_CACHE_EVICTIONS, RESULT_CACHE_INVALIDATIONS, RESULT_CACHE_LOOKUPS
+
+RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", "10000"))
+
+CacheKey = Tuple[Optional[str], str]
+# (global generation, user generation) a result was computed under; see ResultCache.token()
+Token = Tuple[int, int]
+
+
+class ResultCache:
+    """
+    Bounded in-memory LRU of final categorization results, keyed on
+    (user_id, normalized text).
+
+    Results stay valid until the keywords they could depend on change:
+    invalidate_user() drops one user's entries when their keyword_category rows
+    change, and clear() drops everything when global keywords or
+    categories.yaml change. Callers take a token() before computing a result and
+    pass it to put(), so a result computed across an invalidation is never stored.
+    """
+
+    def __init__(self, max_size: int = RESULT_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries: "OrderedDict[CacheKey, dict]" = OrderedDict()
+        self._by_user: Dict[Optional[str], Set[str]] = {}
+        self._generation = 0
+        self._user_generations: Dict[Optional[str], int] = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, user_id: Optional[str], text: str) -> Optional[dict]:
+        """Returns a copy of the cached result, or None."""
+        key = (user_id, text)
+        with self._lock:
+            result = self._entries.get(key)
+            if result is None:
+                self._stats["misses"] += 1
+            else:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+        RESULT_CACHE_LOOKUPS.inc(result="miss" if result is None else "hit")
+        return dict(result) if result is not None else None
+
+    def token(self, user_id: Optional[str]) -> Token:
+        with self._lock:
+            return self._generation, self._user_generations.get(user_id, 0)
+
+    def put(self, user_id: Optional[str], text: str, result: dict, token: Token) -> bool:
+        """Stores result unless the cache was invalidated since token was taken."""
+        key = (user_id, text)
+        evicted = 0
+        with self._lock:
+            if token != (self._generation, self._user_generations.get(user_id, 0)):
+                return False
+            self._entries[key] = dict(result)
+            self._entries.move_to_end(key)
+            self._by_user.setdefault(user_id, set()).add(text)
+            while len(self._entries) > self.max_size:
+                (old_user, old_text), _ = self._entries.popitem(last=False)
+                self._by_user[old_user].discard(old_text)
+                evicted += 1
+            self._stats["evictions"] += evicted
+        if evicted:
+            RESULT_CACHE_EVICTIONS.inc(evicted)
+        return True
+
+    def invalidate_user(self, user_id: str):
+        """Drops every result cached for user_id."""
+        with self._lock:
+            self._user_generations[user_id] = self._user_generations.get(user_id, 0) + 1
+            for text in self._by_user.pop(user_id, ()):
+                del self._entries[(user_id, text)]
+            self._stats["invalidations"] += 1
+        RESULT_CACHE_INVALIDATIONS.inc(scope="user")
+
+    def clear(self):
+        """Drops every cached result."""
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._by_user.clear()
+            self._stats["invalidations"] += 1
+        RESULT_CACHE_INVALIDATIONS.inc(scope="global")
+
+    def stats(self) -> Dict[str, float]:
+        """Returns hit/miss/eviction counters and the hit ratio since startup."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
@@ -0,0 +1,231 @@
+"""
+Retention for the audit tables.
+
+run_retention() moves rows older than RETENTION_DAYS out of interactions,
+categorization_log and categorized_expenses into compressed Parquet files
+partitioned by day:
+
+    <ARCHIVE_DIR>/<table>/day=YYYY-MM-DD/<first id>-<last id>.parquet
+
+Rows move oldest first in batches of RETENTION_BATCH_SIZE. Each batch is one
+write transaction (select, write its files, delete), so the API's writers
+wait for at most one batch, and a file is named after the ids it holds, so a
+batch interrupted before its delete committed rewrites the same files on the
+next run. Once everything is moved, VACUUM returns the freed pages to the
+filesystem.
+
+The analytics rollups count inserts and are unaffected. Archived rows are
+read back on demand with read_archive() / iter_archive().
+
+    python -m app.retention                      # archive rows older than RETENTION_DAYS
+    python -m app.retention --days 30 --no-vacuum
+"""
+import argparse
+import os
+import sqlite3
+import sys
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional
+
+from app.history import CATEGORIZATION_LOG, CATEGORIZED_EXPENSES, INTERACTIONS, HistoryTable, to_db_timestamp
+from app.log import get_logger
+
+# pyarrow is imported where it is used, so importing this module (as the API does) stays cheap
+if TYPE_CHECKING:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+
+# Rows older than this many days are moved to the archive
+RETENTION_DAYS = int(os.getenv("RETENTION_DAYS", "90"))
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", os.path.join("data", "archive"))
+# Rows moved (and deleted) per write transaction
+RETENTION_BATCH_SIZE = int(os.getenv("RETENTION_BATCH_SIZE", "5000"))
+# Parquet codec: zstd, snappy, gzip, ... or none
+ARCHIVE_COMPRESSION = os.getenv("ARCHIVE_COMPRESSION", "zstd")
+
+ARCHIVED_TABLES: Dict[str, HistoryTable] = {
+    history.table: history for history in (INTERACTIONS, CATEGORIZATION_LOG, CATEGORIZED_EXPENSES)
+}
+
+logger = get_logger(__name__)
+
+
+def arrow_schema(conn: sqlite3.Connection, history: HistoryTable, timestamps: bool = False) -> "pa.Schema":
+    """
+    The table's columns as Arrow fields. TEXT columns are strings; DATETIME
+    columns stay strings as stored, or become timestamp[s] with timestamps=True.
+    """
+    import pyarrow as pa
+
+    types = {"INTEGER": pa.int64(), "REAL": pa.float64()}
+    if timestamps:
+        types["DATETIME"] = pa.timestamp("s")
+    columns = conn.execute(f"PRAGMA table_info({history.table})").fetchall()
+    return pa.schema([(column[1], types.get(column[2].upper(), pa.string())) for column in columns])
+
+
+def _write_file(path: str, table: "pa.Table", compression: str):
+    """Writes to a dot-prefixed temporary file first, which dataset readers skip, then renames it."""
+    import pyarrow.parquet as pq
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary = os.path.join(os.path.dirname(path), "." + os.path.basename(path))
+    pq.write_table(table, temporary, compression=compression)
+    os.replace(temporary, path)
+
+
+def _write_days(history: HistoryTable, schema: "pa.Schema", rows: List[tuple], archive_dir: str, compression: str):
+    import pyarrow as pa
+
+    timestamp = schema.get_field_index("timestamp")
+    row_id = schema.get_field_index(history.id_column)
+    days: Dict[str, List[tuple]] = {}
+    for row in rows:
+        days.setdefault(row[timestamp][:10], []).append(row)
+    for day, day_rows in days.items():
+        table = pa.table(
+            [pa.array([row[i] for row in day_rows], type=field.type) for i, field in enumerate(schema)],
+            schema=schema,
+        )
+        name = f"{day_rows[0][row_id]}-{day_rows[-1][row_id]}.parquet"
+        _write_file(os.path.join(archive_dir, history.table, f"day={day}", name), table, compression)
+
+
+def archive_batch(conn: sqlite3.Connection, history: HistoryTable, cutoff: str, archive_dir: str = ARCHIVE_DIR,
+                  batch_size: int = RETENTION_BATCH_SIZE, compression: str = ARCHIVE_COMPRESSION) -> int:
+    """Moves up to batch_size of the oldest rows with timestamp before cutoff; returns how many moved."""
+    if conn.in_transaction:
+        conn.commit()
+    schema = arrow_schema(conn, history)
+    columns = ", ".join(schema.names)
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        rows = [tuple(row) for row in conn.execute(
+            f"SELECT {columns} FROM {history.table} WHERE timestamp < ? ORDER BY timestamp, {history.id_column} LIMIT ?",
+            (cutoff, batch_size)
+        )]
+        if rows:
+            _write_days(history, schema, rows, archive_dir, compression)
+            last = rows[-1]
+            conn.execute(
+                f"DELETE FROM {history.table} WHERE timestamp < ? AND (timestamp, {history.id_column}) <= (?, ?)",
+                (cutoff, last[schema.get_field_index("timestamp")], last[schema.get_field_index(history.id_column)])
+            )
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    return len(rows)
+
+
+def reclaim_space(conn: sqlite3.Connection):
+    """Rebuilds the database file without the freed pages and truncates the WAL."""
+    if conn.in_transaction:
+        conn.commit()
+    conn.execute("VACUUM")
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+
+def run_retention(conn: sqlite3.Connection, days: int = RETENTION_DAYS, archive_dir: str = ARCHIVE_DIR,
+                  batch_size: int = RETENTION_BATCH_SIZE, compression: str = ARCHIVE_COMPRESSION,
+                  tables: Optional[Iterable[str]] = None, vacuum: bool = True,
+                  now: Optional[datetime] = None) -> Dict[str, int]:
+    """
+    Archives and deletes every row older than `days` from each table and
+    returns the number of rows moved per table.
+    """
+    cutoff = to_db_timestamp((now or datetime.now(timezone.utc)) - timedelta(days=days))
+    moved: Dict[str, int] = {}
+    for name in tables or ARCHIVED_TABLES:
+        history = ARCHIVED_TABLES[name]
+        total = 0
+        while True:
+            count = archive_batch(conn, history, cutoff, archive_dir, batch_size, compression)
+            total += count
+            if count < batch_size:
+                break
+        moved[name] = total
+        logger.info("Archived %d %s rows older than %s.", total, name, cutoff)
+    if vacuum and any(moved.values()):
+        reclaim_space(conn)
+    return moved
+
+
+def archive_dataset(table: str, archive_dir: str = ARCHIVE_DIR) -> Optional["ds.Dataset"]:
+    """The table's archive as a pyarrow dataset (with a `day` partition column), or None if nothing is archived."""
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    path = os.path.join(archive_dir, ARCHIVED_TABLES[table].table)
+    if not os.path.isdir(path):
+        return None
+    partitioning = ds.partitioning(pa.schema([("day", pa.string())]), flavor="hive")
+    return ds.dataset(path, format="parquet", partitioning=partitioning)
+
+
+def archive_filter(since: Optional[datetime] = None, until: Optional[datetime] = None,
+                   session_id: Optional[str] = None) -> Optional["pc.Expression"]:
+    """Timestamps in [since, until) and optionally one session; the day bounds let whole partitions be skipped."""
+    import pyarrow.dataset as ds
+
+    conditions = []
+    if since is not None:
+        start = to_db_timestamp(since)
+        conditions += [ds.field("day") >= start[:10], ds.field("timestamp") >= start]
+    if until is not None:
+        end = to_db_timestamp(until)
+        conditions += [ds.field("day") <= end[:10], ds.field("timestamp") < end]
+    if session_id is not None:
+        conditions.append(ds.field("session_id") == session_id)
+    expression = None
+    for condition in conditions:
+        expression = condition if expression is None else expression & condition
+    return expression
+
+
+def read_archive(table: str, since: Optional[datetime] = None, until: Optional[datetime] = None,
+                 session_id: Optional[str] = None, archive_dir: str = ARCHIVE_DIR) -> Optional["pa.Table"]:
+    """Archived rows of table in [since, until), as one Arrow table (call .to_pandas() for a DataFrame)."""
+    dataset = archive_dataset(table, archive_dir)
+    if dataset is None:
+        return None
+    return dataset.to_table(filter=archive_filter(since, until, session_id)).drop_columns(["day"])
+
+
+def iter_archive(table: str, since: Optional[datetime] = None, until: Optional[datetime] = None,
+                 session_id: Optional[str] = None, archive_dir: str = ARCHIVE_DIR) -> Iterator[dict]:
+    """Yields archived rows one record batch at a time, so memory stays bounded by the batch size."""
+    dataset = archive_dataset(table, archive_dir)
+    if dataset is None:
+        return
+    columns = [name for name in dataset.schema.names if name != "day"]
+    for batch in dataset.to_batches(columns=columns, filter=archive_filter(since, until, session_id)):
+        yield from batch.to_pylist()
+
+
+def main(argv: List[str] = None) -> int:
+    from app import db
+    from app.migrations import migrate
+
+    parser = argparse.ArgumentParser(prog="python -m app.retention",
+                                     description="Moves old audit rows from SQLite to Parquet files.")
+    parser.add_argument("--db", default=db.DB_PATH, help=f"database file (default: {db.DB_PATH})")
+    parser.add_argument("--days", type=int, default=RETENTION_DAYS, help="archive rows older than this many days")
+    parser.add_argument("--archive-dir", default=ARCHIVE_DIR, help="where the Parquet files go")
+    parser.add_argument("--batch-size", type=int, default=RETENTION_BATCH_SIZE, help="rows moved per transaction")
+    parser.add_argument("--table", action="append", choices=sorted(ARCHIVED_TABLES), help="only this table (repeatable)")
+    parser.add_argument("--no-vacuum", action="store_true", help="skip VACUUM after moving rows")
+    args = parser.parse_args(argv)
+
+    db.configure(args.db)
+    conn = db.get_connection()
+    migrate(conn)
+    moved = run_retention(conn, args.days, args.archive_dir, args.batch_size, tables=args.table, vacuum=not args.no_vacuum)
+    for table, count in moved.items():
+        print(f"{table:<22} {count:>10,} rows archived")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,7 +4,7 @@ from twilio.rest import Client
 import os
 from dotenv import load_dotenv
 
-from app.agent import run_categorizer
+from app.agent import arun_categorizer
 
 load_dotenv()
 
@@ -12,11 +12,18 @@ TWILIO_ACCOUNT_SID = os.getenv("TWILIO_ACCOUNT_SID")
 TWILIO_AUTH_TOKEN = os.getenv("TWILIO_AUTH_TOKEN")
 TWILIO_PHONE_NUMBER = os.getenv("TWILIO_PHONE_NUMBER")
 
-if not all([TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN, TWILIO_PHONE_NUMBER]):
-    raise ValueError("Twilio environment variables (TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN, TWILIO_PHONE_NUMBER) not set.")
-
 router = APIRouter()
-twilio_client = Client(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
+
+_twilio_client = None
+
+def get_twilio_client() -> Client:
+    """Creates the Twilio client on first use; raises if the Twilio environment variables are not set."""
+    global _twilio_client
+    if _twilio_client is None:
+        if not all([TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN, TWILIO_PHONE_NUMBER]):
+            raise ValueError("Twilio environment variables (TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN, TWILIO_PHONE_NUMBER) not set.")
+        _twilio_client = Client(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
+    return _twilio_client
 
 @router.post("/sms_webhook")
 async def sms_webhook(request: Request):
@@ -30,7 +37,7 @@ async def sms_webhook(request: Request):
 
         # Use the existing categorization logic
         # For SMS, we'll use the 'From' number as a pseudo user_id
-        result = run_categorizer(message_body, user_id=from_number)
+        result = await arun_categorizer(message_body, user_id=from_number)
 
         category = result.get("category", "Unknown")
         reasoning = result.get("reasoning", "No reasoning provided.")
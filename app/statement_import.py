@@ -0,0 +1,141 @@
+import csv
+import os
+import re
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Dict, Iterable, Iterator, Optional
+
+from app import agent
+
+# Maximum number of rows waiting on the LLM at once while importing a statement
+STATEMENT_LLM_CONCURRENCY = int(os.getenv("STATEMENT_LLM_CONCURRENCY", "4"))
+
+# Column names tried, in order, when reading CSV statements
+DESCRIPTION_COLUMNS = ["description", "narration", "details", "memo", "payee", "name", "transaction"]
+AMOUNT_COLUMNS = ["amount", "debit", "credit", "value"]
+
+_OFX_TAG = re.compile(r'<(/?)([A-Za-z0-9.]+)>([^<]*)')
+
+
+def _parse_amount(value: Optional[str]) -> Optional[float]:
+    if value is None:
+        return None
+    cleaned = re.sub(r'[^0-9.\-]', '', value)
+    try:
+        return float(cleaned)
+    except ValueError:
+        return None
+
+
+def _pick(row: Dict[str, str], columns) -> Optional[str]:
+    lowered = {(key or "").strip().lower(): value for key, value in row.items()}
+    for column in columns:
+        if lowered.get(column):
+            return lowered[column]
+    return None
+
+
+def iter_csv_rows(lines: Iterable[str]) -> Iterator[dict]:
+    """Yields {"description", "amount"} for each CSV row that has a description."""
+    for row in csv.DictReader(lines):
+        description = _pick(row, DESCRIPTION_COLUMNS)
+        if description:
+            yield {"description": description, "amount": _parse_amount(_pick(row, AMOUNT_COLUMNS))}
+
+
+def iter_ofx_rows(lines: Iterable[str]) -> Iterator[dict]:
+    """Yields {"description", "amount"} for each <STMTTRN> block of an OFX/QFX statement."""
+    transaction = None
+    for line in lines:
+        for closing, tag, value in _OFX_TAG.findall(line):
+            tag = tag.upper()
+            if tag == "STMTTRN":
+                if not closing:
+                    transaction = {}
+                elif transaction is not None:
+                    description = " ".join(filter(None, [transaction.get("NAME"), transaction.get("MEMO")]))
+                    if description:
+                        yield {"description": description, "amount": _parse_amount(transaction.get("TRNAMT"))}
+                    transaction = None
+            elif transaction is not None and not closing and value.strip():
+                transaction[tag] = value.strip()
+
+
+def iter_statement_rows(lines: Iterable[str]) -> Iterator[dict]:
+    """Detects the statement format from its first non-empty line and parses it lazily."""
+    lines = iter(lines)
+    first = ""
+    for first in lines:
+        if first.strip():
+            break
+
+    def replay():
+        yield first
+        yield from lines
+
+    if "OFXHEADER" in first.upper() or "<OFX>" in first.upper():
+        return iter_ofx_rows(replay())
+    return iter_csv_rows(replay())
+
+
+def categorize_statement(rows: Iterable[dict], user_id: Optional[str] = None,
+                         max_in_flight: int = STATEMENT_LLM_CONCURRENCY) -> Iterator[dict]:
+    """
+    Categorizes statement rows as they are parsed.
+
+    Rows settled by the DB or regex tier are emitted straight away. Rows that
+    need the LLM are dispatched to a small thread pool and emitted as they
+    complete, so output order follows completion order; every result carries
+    its source row number. At most max_in_flight rows wait on the LLM at once,
+    which keeps memory flat regardless of statement size. A final summary
+    record reports row counts and the time to first result.
+    """
+    started = time.monotonic()
+    first_result_at = None
+    total = llm_rows = 0
+    in_flight: Dict[Future, dict] = {}
+
+    def emit(item: dict, update: dict) -> dict:
+        nonlocal first_result_at
+        if first_result_at is None:
+            first_result_at = time.monotonic()
+        return {
+            **item,
+            "category": update.get("category") or "Unknown",
+            "reasoning": update.get("reasoning"),
+            "confidence_score": update.get("confidence_score"),
+        }
+
+    def drain(futures) -> Iterator[dict]:
+        for future in futures:
+            yield emit(in_flight.pop(future), future.result())
+
+    with ThreadPoolExecutor(max_workers=max_in_flight) as executor:
+        for row_number, row in enumerate(rows, start=1):
+            total += 1
+            item = {"row": row_number, "description": row["description"], "amount": row.get("amount")}
+            state = {"input_text": agent.normalize(row["description"]), "user_id": user_id}
+            update = agent.run_deterministic_tiers(state)
+            if update.get("category"):
+                yield emit(item, update)
+            else:
+                llm_rows += 1
+                in_flight[executor.submit(agent.llm_categorizer_node, state)] = item
+
+            finished = [future for future in in_flight if future.done()]
+            if len(in_flight) - len(finished) >= max_in_flight:
+                finished = wait(in_flight, return_when=FIRST_COMPLETED).done
+            yield from drain(finished)
+
+        while in_flight:
+            yield from drain(wait(in_flight, return_when=FIRST_COMPLETED).done)
+
+    elapsed = time.monotonic() - started
+    yield {
+        "summary": {
+            "rows": total,
+            "llm_rows": llm_rows,
+            "time_to_first_result_ms": round((first_result_at - started) * 1000, 2) if first_result_at else None,
+            "elapsed_ms": round(elapsed * 1000, 2),
+        }
+    }
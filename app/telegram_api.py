@@ -4,19 +4,27 @@ from telegram.ext import ApplicationBuilder, CommandHandler, MessageHandler, fil
 import os
 from dotenv import load_dotenv
 
-from app.agent import run_categorizer
+from app.agent import arun_categorizer
 
 load_dotenv()
 
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 
-if not TELEGRAM_BOT_TOKEN:
-    raise ValueError("TELEGRAM_BOT_TOKEN environment variable not set.")
-
 router = APIRouter()
 
-# Initialize the bot application
-application = ApplicationBuilder().token(TELEGRAM_BOT_TOKEN).build()
+_application = None
+
+def get_application():
+    """Builds the bot application on first use; raises if TELEGRAM_BOT_TOKEN is not set."""
+    global _application
+    if _application is None:
+        if not TELEGRAM_BOT_TOKEN:
+            raise ValueError("TELEGRAM_BOT_TOKEN environment variable not set.")
+        application = ApplicationBuilder().token(TELEGRAM_BOT_TOKEN).build()
+        application.add_handler(CommandHandler("start", start))
+        application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, categorize_expense_telegram))
+        _application = application
+    return _application
 
 async def start(update: Update, context):
     await update.message.reply_text("Hi! I'm your Expense Categorizer bot. Send me an expense description to categorize.")
@@ -26,7 +34,7 @@ async def categorize_expense_telegram(update: Update, context):
     user_id = str(update.effective_user.id)
     
     # Use the existing categorization logic
-    result = run_categorizer(input_text, user_id=user_id)
+    result = await arun_categorizer(input_text, user_id=user_id)
     
     category = result.get("category", "Unknown")
     reasoning = result.get("reasoning", "No reasoning provided.")
@@ -43,14 +51,11 @@ async def categorize_expense_telegram(update: Update, context):
         # Log the error, but don't prevent the webhook from returning 200 OK
         print(f"ERROR: Failed to send Telegram response: {e}")
 
-# Add handlers to the application
-application.add_handler(CommandHandler("start", start))
-application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, categorize_expense_telegram))
-
 @router.post("/telegram_webhook")
 async def telegram_webhook(request: Request):
     try:
         # Process the Telegram update
+        application = get_application()
         update_json = await request.json()
         update = Update.de_json(update_json, application.bot)
         await application.initialize() # Initialize the application
@@ -1,25 +1,123 @@
 import sqlite3
-import re
-from typing import Optional, Dict, List
+import threading
+from typing import Callable, Optional, Dict, List, NamedTuple
 from langchain_core.tools import BaseTool
 from pydantic import PrivateAttr
 
+from app.tools.keyword_index import KeywordIndex
+
+
+class KeywordSnapshot(NamedTuple):
+    """
+    An immutable, compiled view of the keyword_category table. version moves on
+    every load; global_version only when the global keywords changed, so
+    per-user additions don't invalidate what is built from the global ones.
+    """
+    version: int
+    global_index: KeywordIndex
+    user_indexes: Dict[str, KeywordIndex]
+    global_version: int
+
+
+class KeywordDBIndex:
+    """
+    Long-lived, in-memory index of the keyword_category table.
+
+    The table is read once and compiled into one KeywordIndex for global keywords
+    and one per user. Readers always see a complete snapshot; refresh() rebuilds
+    it and bumps the version, and should be called whenever the table changes.
+    """
+
+    def __init__(self, db_path: Optional[str] = "data/keywords.db",
+                 connection_factory: Optional[Callable[[], sqlite3.Connection]] = None):
+        self.db_path = db_path
+        self.connection_factory = connection_factory
+        self._lock = threading.Lock()
+        self._snapshot: Optional[KeywordSnapshot] = None
+
+    @classmethod
+    def from_connection(cls, conn: sqlite3.Connection) -> "KeywordDBIndex":
+        """Builds an index that is loaded from an already open connection."""
+        index = cls(db_path=None)
+        index.load(conn)
+        return index
+
+    @property
+    def version(self) -> int:
+        return self.snapshot().version
+
+    def snapshot(self) -> KeywordSnapshot:
+        """Returns the current snapshot, loading it from the database on first use."""
+        snapshot = self._snapshot
+        if snapshot is None:
+            self.refresh()
+            snapshot = self._snapshot
+        return snapshot
+
+    def load(self, conn: sqlite3.Connection):
+        """
+        Reads every keyword row through conn and swaps in a new snapshot.
+        Loads run one at a time from read to swap, so a slower, older read can
+        never replace a newer snapshot; readers keep using the current one meanwhile.
+        """
+        with self._lock:
+            rows = conn.execute(
+                "SELECT user_id, keyword, category FROM keyword_category ORDER BY id"
+            ).fetchall()
+
+            global_entries = []
+            user_entries: Dict[str, list] = {}
+            for user_id, keyword, category in rows:
+                if user_id is None:
+                    global_entries.append((category, keyword))
+                else:
+                    user_entries.setdefault(user_id, []).append((category, keyword))
+
+            global_index = KeywordIndex(global_entries)
+            user_indexes = {user_id: KeywordIndex(entries) for user_id, entries in user_entries.items()}
+
+            previous = self._snapshot
+            version = previous.version + 1 if previous else 1
+            global_version = version
+            if previous is not None and previous.global_index.entries() == global_index.entries():
+                global_version = previous.global_version
+            self._snapshot = KeywordSnapshot(version, global_index, user_indexes, global_version)
+
+    def refresh(self):
+        """Reloads the index through connection_factory if given, otherwise from db_path."""
+        if self.connection_factory is not None:
+            self.load(self.connection_factory())
+            return
+        if self.db_path is None:
+            raise ValueError("This index was built from a connection and has no db_path to refresh from.")
+        conn = sqlite3.connect(self.db_path)
+        try:
+            self.load(conn)
+        finally:
+            conn.close()
+
+
 class KeywordDBMatcherTool(BaseTool):
     """
     KeywordDBMatcherTool is a LangChain-compatible tool that connects to a SQLite database
     to categorize transaction text based on stored keyword patterns, optionally filtered by user_id.
+    Matching runs against an in-memory KeywordDBIndex, so lookups never touch SQLite.
     """
     name: str = "keyword_db_matcher"
     description: str = "Uses a database to match transaction text to known category keywords and returns the category. Input is the transaction text."
 
-    _conn: sqlite3.Connection = PrivateAttr()
+    _index: KeywordDBIndex = PrivateAttr()
     _user_id: Optional[str] = PrivateAttr()
 
-    def __init__(self, conn: sqlite3.Connection, user_id: Optional[str] = None, **kwargs):
+    def __init__(self, conn: Optional[sqlite3.Connection] = None, user_id: Optional[str] = None,
+                 index: Optional[KeywordDBIndex] = None, **kwargs):
         super().__init__(**kwargs)
-        object.__setattr__(self, '_conn', conn)
+        if index is None:
+            if conn is None:
+                raise ValueError("KeywordDBMatcherTool needs either a connection or a KeywordDBIndex.")
+            index = KeywordDBIndex.from_connection(conn)
+        object.__setattr__(self, '_index', index)
         object.__setattr__(self, '_user_id', user_id)
-        self._conn.row_factory = sqlite3.Row
 
     def _normalize_text(self, text: str) -> str:
         """
@@ -27,13 +125,6 @@ class KeywordDBMatcherTool(BaseTool):
         """
         return text.strip().lower()
 
-    def _execute_query(self, query: str, params: tuple) -> list[sqlite3.Row]:
-        """
-        Helper to execute a query and fetch all results.
-        """
-        cursor = self._conn.execute(query, params)
-        return cursor.fetchall()
-
     def _run(self, input_text: str) -> Optional[str]:
         """
         Main execution method required by BaseTool.
@@ -41,27 +132,19 @@ class KeywordDBMatcherTool(BaseTool):
         Prioritizes user-specific keywords if user_id is provided, then falls back to global.
         """
         normalized = self._normalize_text(input_text)
-        
+        snapshot = self._index.snapshot()
+
         # Try user-specific keywords first
-        if self._user_id:
-            user_keywords = self._execute_query(
-                "SELECT keyword, category FROM keyword_category WHERE user_id = ?",
-                (self._user_id,)
-            )
-            for row in user_keywords:
-                pattern = r'\b' + re.escape(row['keyword'].lower()) + r'\b'
-                if re.search(pattern, normalized):
-                    return row['category']
+        user_index = snapshot.user_indexes.get(self._user_id) if self._user_id else None
+        if user_index is not None:
+            hits = user_index.find(normalized)
+            if hits:
+                return hits[0][0]
 
         # Fallback to global keywords (where user_id IS NULL)
-        global_keywords = self._execute_query(
-            "SELECT keyword, category FROM keyword_category WHERE user_id IS NULL",
-            ()
-        )
-        for row in global_keywords:
-            pattern = r'\b' + re.escape(row['keyword'].lower()) + r'\b'
-            if re.search(pattern, normalized):
-                return row['category']
+        hits = snapshot.global_index.find(normalized)
+        if hits:
+            return hits[0][0]
 
         return None
 
@@ -77,30 +160,20 @@ class KeywordDBMatcherTool(BaseTool):
         Prioritizes user-specific keywords if user_id is provided, then falls back to global.
         """
         normalized_text = self._normalize_text(input_text)
+        snapshot = self._index.snapshot()
         matches: Dict[str, List[str]] = {}
 
         # Collect user-specific matches first
-        if self._user_id:
-            user_keywords = self._execute_query(
-                "SELECT keyword, category FROM keyword_category WHERE user_id = ?",
-                (self._user_id,)
-            )
-            for row in user_keywords:
-                pattern = r'\b' + re.escape(row['keyword'].lower()) + r'\b'
-                if re.search(pattern, normalized_text):
-                    matches.setdefault(row['category'], []).append(row['keyword'])
+        user_index = snapshot.user_indexes.get(self._user_id) if self._user_id else None
+        if user_index is not None:
+            matches = user_index.matches(normalized_text)
 
         # Collect global matches
-        global_keywords = self._execute_query(
-            "SELECT keyword, category FROM keyword_category WHERE user_id IS NULL",
-            ()
-        )
-        for row in global_keywords:
-            pattern = r'\b' + re.escape(row['keyword'].lower()) + r'\b'
-            if re.search(pattern, normalized_text):
-                # Only add global match if no user-specific match for the same category exists
-                if row['category'] not in matches:
-                    matches.setdefault(row['category'], []).append(row['keyword'])
+        user_categories = set(matches)
+        for category, keywords in snapshot.global_index.matches(normalized_text).items():
+            # Only add global match if no user-specific match for the same category exists
+            if category not in user_categories:
+                matches[category] = keywords
 
         return matches
 
@@ -116,4 +189,4 @@ class KeywordDBMatcherTool(BaseTool):
         
         best_category = max(all_matches.keys(), 
                             key=lambda cat: len(all_matches[cat]))
-        return best_category
\ No newline at end of file
+        return best_category
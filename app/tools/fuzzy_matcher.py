@@ -0,0 +1,290 @@
+import os
+import threading
+from collections import Counter
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from langchain_core.tools import BaseTool
+from pydantic import PrivateAttr
+
+from app.tools.db_matcher import KeywordDBIndex
+
+# Candidates scoring below this (1 - edit distance / keyword length) are ignored
+FUZZY_MIN_SIMILARITY = float(os.getenv("FUZZY_MIN_SIMILARITY", "0.7"))
+# Terms shorter than this are only matched through their consonant skeleton
+FUZZY_MIN_EDIT_LENGTH = 5
+
+VOWELS = set("aeiou")
+
+
+class FuzzyCandidate(NamedTuple):
+    category: str
+    keyword: str
+    term: str
+    score: float
+
+
+def levenshtein(a: str, b: str, max_distance: Optional[int] = None) -> int:
+    """
+    Edit distance between a and b. With max_distance, stops early and returns
+    max_distance + 1 as soon as the distance is known to exceed it.
+    """
+    if len(a) < len(b):
+        a, b = b, a
+    if max_distance is not None and len(a) - len(b) > max_distance:
+        return max_distance + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, start=1):
+        current = [i]
+        for j, char_b in enumerate(b, start=1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        if max_distance is not None and min(current) > max_distance:
+            return max_distance + 1
+        previous = current
+    return previous[-1]
+
+
+def max_edit_distance(term: str) -> int:
+    """Edit budget for a term: none below FUZZY_MIN_EDIT_LENGTH, one up to 7 characters, two above."""
+    if len(term) < FUZZY_MIN_EDIT_LENGTH:
+        return 0
+    return 1 if len(term) <= 7 else 2
+
+
+def consonant_skeleton(term: str) -> str:
+    """Drops every vowel after the first character, e.g. "spotify" -> "sptfy", "uber" -> "ubr"."""
+    return term[:1] + "".join(char for char in term[1:] if char not in VOWELS)
+
+
+def bigrams(word: str) -> Counter:
+    """Multiset of the character bigrams of word."""
+    return Counter(word[i:i + 2] for i in range(len(word) - 1))
+
+
+class BigramIndex:
+    """
+    Edit-distance search through an inverted index of character bigrams.
+
+    Each deletion, insertion or substitution destroys at most two of a word's
+    bigrams, so two words within edit distance k share at least
+    threshold = len(query) - 1 - 2k bigram occurrences. Any word sharing that
+    many must appear in the posting lists of the query's rarest bigrams
+    covering all but threshold - 1 of its occurrences, so a search only reads
+    those short lists. Each candidate of a close enough length then has its
+    exact bigram overlap checked against the bound for the longer of the two
+    words before a bounded levenshtein runs on it. Queries too short for the
+    filter to exclude anything fall back to the words of nearby lengths.
+    """
+
+    def __init__(self, words: Iterable[str] = ()):
+        self._words: List[str] = []
+        self._grams: List[Counter] = []
+        self._ids: Dict[str, int] = {}
+        self._postings: Dict[str, List[int]] = {}
+        self._by_length: Dict[int, List[int]] = {}
+        for word in words:
+            self.add(word)
+
+    def __len__(self) -> int:
+        return len(self._words)
+
+    def add(self, word: str):
+        if word in self._ids:
+            return
+        word_id = len(self._words)
+        self._ids[word] = word_id
+        self._words.append(word)
+        self._grams.append(bigrams(word))
+        self._by_length.setdefault(len(word), []).append(word_id)
+        for gram in self._grams[word_id]:
+            self._postings.setdefault(gram, []).append(word_id)
+
+    def _candidates(self, word: str, max_distance: int) -> Iterable[int]:
+        threshold = len(word) - 1 - 2 * max_distance
+        if threshold <= 0:
+            return [word_id for length in range(len(word) - max_distance, len(word) + max_distance + 1)
+                    for word_id in self._by_length.get(length, ())]
+        grams = sorted(bigrams(word).items(), key=lambda gram: len(self._postings.get(gram[0], ())))
+        uncovered = sum(count for _, count in grams) - threshold + 1
+        candidates = set()
+        for gram, count in grams:
+            if uncovered <= 0:
+                break
+            candidates.update(self._postings.get(gram, ()))
+            uncovered -= count
+        return sorted(word_id for word_id in candidates if abs(len(self._words[word_id]) - len(word)) <= max_distance)
+
+    def search(self, word: str, max_distance: int) -> List[Tuple[str, int]]:
+        """Returns every (word, distance) within max_distance of word, in the order the words were added."""
+        found = []
+        grams = bigrams(word).items()
+        for word_id in self._candidates(word, max_distance):
+            candidate = self._words[word_id]
+            threshold = max(len(word), len(candidate)) - 1 - 2 * max_distance
+            if threshold > 0:
+                candidate_grams = self._grams[word_id]
+                if sum(min(count, candidate_grams[gram]) for gram, count in grams) < threshold:
+                    continue
+            distance = levenshtein(word, candidate, max_distance)
+            if distance <= max_distance:
+                found.append((candidate, distance))
+        return found
+
+
+class FuzzyKeywordIndex:
+    """
+    Typo-tolerant lookup over (category, keyword) pairs.
+
+    Keywords (including multi-word phrases) go into a BigramIndex, and every
+    window of up to the longest phrase's word count is searched with an edit
+    budget that grows with its length. Vowel-less terms such as "ubr" or
+    "sptfy" are also looked up by consonant skeleton, which catches the
+    abbreviations common in bank and SMS descriptors.
+    """
+
+    def __init__(self, entries: Iterable[Tuple[str, str]]):
+        self._categories: Dict[str, List[str]] = {}
+        for category, keyword in entries:
+            key = " ".join(keyword.lower().split())
+            if key and category not in self._categories.setdefault(key, []):
+                self._categories[key].append(category)
+        self._bigrams = BigramIndex(self._categories)
+        self._skeletons: Dict[str, List[str]] = {}
+        for keyword in self._categories:
+            if " " not in keyword:
+                skeleton = consonant_skeleton(keyword)
+                if len(skeleton) >= 3 and skeleton != keyword:
+                    self._skeletons.setdefault(skeleton, []).append(keyword)
+        self._max_words = max((keyword.count(" ") + 1 for keyword in self._categories), default=0)
+
+    def __len__(self) -> int:
+        return len(self._categories)
+
+    def _score(self, term: str, keyword: str, distance: int) -> float:
+        return 1 - distance / max(len(term), len(keyword))
+
+    def lookup(self, term: str) -> List[Tuple[str, float]]:
+        """Returns (keyword, score) pairs for one word or phrase."""
+        matches: Dict[str, float] = {}
+        budget = max_edit_distance(term)
+        if budget:
+            for keyword, distance in self._bigrams.search(term, budget):
+                matches[keyword] = self._score(term, keyword, distance)
+        elif term in self._categories:
+            matches[term] = 1.0
+        if consonant_skeleton(term) == term:
+            for keyword in self._skeletons.get(term, []):
+                matches.setdefault(keyword, self._score(term, keyword, levenshtein(term, keyword)))
+        return list(matches.items())
+
+    def candidates(self, text: str, min_similarity: float = FUZZY_MIN_SIMILARITY) -> List[FuzzyCandidate]:
+        """Returns every candidate at or above min_similarity, best score first."""
+        words = text.lower().split()
+        found: Dict[Tuple[str, str], FuzzyCandidate] = {}
+        for start in range(len(words)):
+            for size in range(1, self._max_words + 1):
+                if start + size > len(words):
+                    break
+                term = " ".join(words[start:start + size])
+                for keyword, score in self.lookup(term):
+                    if score < min_similarity:
+                        continue
+                    for category in self._categories[keyword]:
+                        previous = found.get((category, keyword))
+                        if previous is None or score > previous.score:
+                            found[(category, keyword)] = FuzzyCandidate(category, keyword, term, score)
+        return sorted(found.values(), key=lambda candidate: -candidate.score)
+
+
+class FuzzyMatcherTool(BaseTool):
+    """
+    FuzzyMatcherTool is a LangChain-compatible tool that settles misspelled or
+    truncated merchant names ("NETFLX", "UBR TRIP") against every global DB
+    keyword and categories.yaml keyword. Its FuzzyKeywordIndex is only built
+    on the request path when there is none yet; after the global keywords
+    change, lookups keep using the current index while a background thread
+    builds the new one. refresh() builds it in the caller's thread instead.
+    """
+    name: str = "fuzzy_matcher"
+    description: str = "Matches misspelled or abbreviated transaction text to known category keywords"
+    category_map: Dict[str, List[str]]
+    min_similarity: float = FUZZY_MIN_SIMILARITY
+
+    _keyword_index: Optional[KeywordDBIndex] = PrivateAttr()
+    _fuzzy_index: Optional[FuzzyKeywordIndex] = PrivateAttr()
+    _built_for: Optional[Tuple[Optional[int], Dict[str, List[str]]]] = PrivateAttr()
+    _lock: threading.Lock = PrivateAttr()
+    _rebuild_lock: threading.Lock = PrivateAttr()
+    _rebuilding: bool = PrivateAttr()
+
+    def __init__(self, keyword_index: Optional[KeywordDBIndex] = None, **kwargs):
+        super().__init__(**kwargs)
+        object.__setattr__(self, '_keyword_index', keyword_index)
+        object.__setattr__(self, '_fuzzy_index', None)
+        object.__setattr__(self, '_built_for', None)
+        object.__setattr__(self, '_lock', threading.Lock())
+        object.__setattr__(self, '_rebuild_lock', threading.Lock())
+        object.__setattr__(self, '_rebuilding', False)
+
+    def reload(self, category_map: Dict[str, List[str]]):
+        """Replaces the category map; the index is rebuilt on the next lookup."""
+        object.__setattr__(self, 'category_map', category_map)
+        object.__setattr__(self, '_fuzzy_index', None)
+
+    def _global_version(self) -> Optional[int]:
+        snapshot = self._keyword_index.snapshot() if self._keyword_index is not None else None
+        return snapshot.global_version if snapshot is not None else None
+
+    def _is_current(self, version: Optional[int]) -> bool:
+        built_for = self._built_for
+        return (self._fuzzy_index is not None and built_for is not None
+                and built_for[0] == version and built_for[1] is self.category_map)
+
+    def refresh(self) -> FuzzyKeywordIndex:
+        """Builds the index unless it is already current for the global keywords and category map."""
+        with self._lock:
+            snapshot = self._keyword_index.snapshot() if self._keyword_index is not None else None
+            version = snapshot.global_version if snapshot is not None else None
+            if self._is_current(version):
+                return self._fuzzy_index
+            category_map = self.category_map
+            entries = [(category, keyword) for category, keywords in category_map.items() for keyword in keywords]
+            if snapshot is not None:
+                entries += snapshot.global_index.entries()
+            index = FuzzyKeywordIndex(entries)
+            object.__setattr__(self, '_fuzzy_index', index)
+            object.__setattr__(self, '_built_for', (version, category_map))
+        return index
+
+    def _refresh_in_background(self):
+        try:
+            self.refresh()
+        finally:
+            object.__setattr__(self, '_rebuilding', False)
+
+    def _index(self) -> FuzzyKeywordIndex:
+        index = self._fuzzy_index
+        if index is None:
+            return self.refresh()
+        if not self._is_current(self._global_version()):
+            # Only the flag is guarded here; _lock is held for the whole build
+            with self._rebuild_lock:
+                start = not self._rebuilding
+                object.__setattr__(self, '_rebuilding', True)
+            if start:
+                threading.Thread(target=self._refresh_in_background, name="fuzzy-index-rebuild", daemon=True).start()
+        return index
+
+    def get_candidates(self, input_text: str) -> List[FuzzyCandidate]:
+        return self._index().candidates(input_text, self.min_similarity)
+
+    def match(self, input_text: str) -> Optional[FuzzyCandidate]:
+        """Returns the best-scoring candidate, or None if nothing is close enough."""
+        candidates = self.get_candidates(input_text)
+        return candidates[0] if candidates else None
+
+    def _run(self, input_text: str) -> Optional[str]:
+        match = self.match(input_text)
+        return match.category if match else None
+
+    def get_best_match(self, input_text: str) -> Optional[str]:
+        return self._run(input_text)
@@ -0,0 +1,70 @@
+import re
+from typing import Dict, Iterable, List, Tuple
+
+# Every position where `\b` would match, computed once per input text.
+_WORD_BOUNDARY = re.compile(r'\b')
+
+
+class KeywordIndex:
+    """
+    Multi-keyword matcher compiled once from (label, keyword) pairs.
+
+    Finds every word-bounded keyword hit in a single pass over the text,
+    returning the same hits as running `r'\\b' + re.escape(keyword) + r'\\b'`
+    for each keyword in turn. Keywords are looked up in a hash table by the
+    text between two word boundaries, so the cost of a lookup depends on the
+    length of the text, not on the number of keywords.
+    """
+
+    def __init__(self, entries: Iterable[Tuple[str, str]]):
+        # lowered keyword -> [(entry order, label, original keyword)]
+        self._table: Dict[str, List[Tuple[int, str, str]]] = {}
+        self._max_len = 0
+        self._size = 0
+        for order, (label, keyword) in enumerate(entries):
+            key = keyword.lower()
+            self._table.setdefault(key, []).append((order, label, keyword))
+            self._max_len = max(self._max_len, len(key))
+            self._size += 1
+
+    def __len__(self) -> int:
+        return self._size
+
+    def entries(self) -> List[Tuple[str, str]]:
+        """Returns every (label, keyword) entry in entry order."""
+        entries = [entry for bucket in self._table.values() for entry in bucket]
+        entries.sort()
+        return [(label, keyword) for _, label, keyword in entries]
+
+    def find(self, text: str) -> List[Tuple[str, str]]:
+        """
+        Returns every (label, keyword) entry found in the text, in entry order.
+        The text is expected to be lowercased already.
+        """
+        if not self._table:
+            return []
+
+        boundaries = [m.start() for m in _WORD_BOUNDARY.finditer(text)]
+        hits: List[Tuple[int, str, str]] = []
+        seen = set()
+        for i, start in enumerate(boundaries):
+            for end in boundaries[i:]:
+                if end - start > self._max_len:
+                    break
+                key = text[start:end]
+                if key in self._table and key not in seen:
+                    seen.add(key)
+                    hits.extend(self._table[key])
+
+        hits.sort()
+        return [(label, keyword) for _, label, keyword in hits]
+
+    def matches(self, text: str) -> Dict[str, List[str]]:
+        """
+        Groups the hits by label. Labels appear in the order of their first
+        entry and keywords keep their entry order within a label.
+        """
+        grouped: Dict[str, List[str]] = {}
+        for label, keyword in self.find(text):
+            grouped.setdefault(label, []).append(keyword)
+        return grouped
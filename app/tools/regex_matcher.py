@@ -1,30 +1,54 @@
 from typing import Dict, List, Optional
 from langchain_core.tools import BaseTool
-import re
+from pydantic import PrivateAttr
+
+from app.tools.keyword_index import KeywordIndex
 
 # TODO: Handle multiple matching categories, maybe rank by confidence.
 class RegexMatcherTool(BaseTool):
     """
     RegexMatcherTool is a LangChain-compatible tool that scans a transaction text
     and returns a category based on pre-defined keyword patterns loaded from config.
+    The category map is compiled once into a KeywordIndex, so every keyword of
+    every category is checked in a single pass over the text.
     """
     name: str = "regex_matcher"
     description: str = "Uses regex to match transaction text to known category keywords"
     category_map: Dict[str, List[str]]
 
+    _index: KeywordIndex = PrivateAttr()
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._compile()
+
+    def _compile(self):
+        """Compiles the category map into a single keyword index."""
+        entries = [
+            (category, keyword)
+            for category, keywords in self.category_map.items()
+            for keyword in keywords
+        ]
+        object.__setattr__(self, '_index', KeywordIndex(entries))
+
+    @property
+    def keyword_index(self) -> KeywordIndex:
+        """The compiled index of the current category map."""
+        return self._index
+
+    def reload(self, category_map: Dict[str, List[str]]):
+        """Replaces the category map and recompiles the keyword index."""
+        object.__setattr__(self, 'category_map', category_map)
+        self._compile()
+
     def _run(self, input_text: str) -> Optional[str]:
         """
         Main execution method required by BaseTool.
         Scans input text against category keywords and returns first match.
         """
-        normalized_text = self._normalize_text(input_text)
-
-        for category, keywords in self.category_map.items():
-            for keyword in keywords:
-                # Use word boundaries to avoid partial matches
-                pattern = r'\b' + re.escape(keyword.lower()) + r'\b'
-                if re.search(pattern, normalized_text):
-                    return category
+        hits = self._index.find(self._normalize_text(input_text))
+        if hits:
+            return hits[0][0]
         return None
 
     def _normalize_text(self, text: str) -> str:
@@ -36,20 +60,7 @@ class RegexMatcherTool(BaseTool):
         Enhanced method to return all matching categories with their keywords.
         Useful for handling multiple matches and confidence ranking.
         """
-        normalized_text = self._normalize_text(input_text)
-        matches = {}
-        
-        for category, keywords in self.category_map.items():
-            matched_keywords = []
-            for keyword in keywords:
-                pattern = r'\b' + re.escape(keyword.lower()) + r'\b'
-                if re.search(pattern, normalized_text):
-                    matched_keywords.append(keyword)
-            
-            if matched_keywords:
-                matches[category] = matched_keywords
-        
-        return matches
+        return self._index.matches(self._normalize_text(input_text))
 
     def get_best_match(self, input_text: str) -> Optional[str]:
         """
@@ -64,4 +75,4 @@ class RegexMatcherTool(BaseTool):
         # Find category with most matched keywords
         best_category = max(all_matches.keys(), 
                           key=lambda cat: len(all_matches[cat]))
-        return best_category
\ No newline at end of file
+        return best_category
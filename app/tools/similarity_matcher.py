@@ -0,0 +1,281 @@
+import os
+import sqlite3
+import threading
+import zlib
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+from langchain_core.tools import BaseTool
+from pydantic import PrivateAttr
+
+from app.tools.text_normalizer import normalize_text
+
+# Width of the hashed character n-gram vectors
+SIMILARITY_FEATURES = int(os.getenv("SIMILARITY_FEATURES", "2048"))
+SIMILARITY_NGRAM = 3
+# Minimum cosine similarity for a neighbour to count, and how many neighbours vote
+SIMILARITY_THRESHOLD = float(os.getenv("SIMILARITY_THRESHOLD", "0.5"))
+SIMILARITY_TOP_K = int(os.getenv("SIMILARITY_TOP_K", "5"))
+# Past categorizations used as labeled examples: minimum confidence and how many of the latest are kept
+SIMILARITY_MIN_LOG_CONFIDENCE = float(os.getenv("SIMILARITY_MIN_LOG_CONFIDENCE", "0.8"))
+SIMILARITY_MAX_LOG_ROWS = int(os.getenv("SIMILARITY_MAX_LOG_ROWS", "5000"))
+# IDF weights are recomputed once the example count grows by this factor
+IDF_REFRESH_GROWTH = 1.1
+# Learned examples may exceed max_log_rows by this fraction before the oldest are evicted in one pass
+LEARNED_EVICTION_SLACK = 0.1
+
+# Owner id of examples every user sees
+_GLOBAL = 0
+
+
+def ngram_counts(text: str, n_features: int = SIMILARITY_FEATURES) -> np.ndarray:
+    """Hashed character n-gram counts of text, padded with a space at both ends."""
+    padded = f" {text.strip().lower()} "
+    grams = [padded[i:i + SIMILARITY_NGRAM] for i in range(len(padded) - SIMILARITY_NGRAM + 1)]
+    buckets = [zlib.crc32(gram.encode("utf-8")) % n_features for gram in grams]
+    return np.bincount(buckets, minlength=n_features).astype(np.float32)
+
+
+class SimilarityIndex:
+    """
+    In-memory nearest-neighbour index over labeled descriptions.
+
+    Each example is stored as a row of hashed character n-gram counts in a
+    NumPy matrix; queries are TF-IDF weighted and scored against every row
+    with one matrix-vector product. add() appends rows in place (the matrix
+    grows by doubling), and the IDF weights and row norms are only recomputed
+    once the example count has grown by IDF_REFRESH_GROWTH.
+
+    Examples come from global keyword_category rows, the categories.yaml map
+    and recent high-confidence categorizations. Categorizations are learned
+    examples: at most max_log_rows of them are kept (the oldest are evicted),
+    and one made for a user is only matched for that user, since the user's
+    own keywords may have decided it.
+
+    Writers are serialized by a write lock and do their O(rows x features)
+    work outside the read lock, which only guards swapping in new arrays, so
+    queries never wait for a recomputation.
+    """
+
+    def __init__(self, category_map: Optional[Dict[str, List[str]]] = None,
+                 connection_factory: Optional[Callable[[], sqlite3.Connection]] = None,
+                 n_features: int = SIMILARITY_FEATURES,
+                 min_log_confidence: float = SIMILARITY_MIN_LOG_CONFIDENCE,
+                 max_log_rows: int = SIMILARITY_MAX_LOG_ROWS):
+        self.category_map = category_map or {}
+        self.connection_factory = connection_factory
+        self.n_features = n_features
+        self.min_log_confidence = min_log_confidence
+        self.max_log_rows = max_log_rows
+        self._lock = threading.RLock()
+        self._write_lock = threading.Lock()
+        self._loaded = False
+        self._reset()
+
+    def _reset(self):
+        self._counts = np.zeros((64, self.n_features), dtype=np.float32)
+        self._norms = np.zeros(64, dtype=np.float32)
+        self._owners = np.zeros(64, dtype=np.int32)
+        self._doc_freq = np.zeros(self.n_features, dtype=np.float32)
+        self._idf = np.ones(self.n_features, dtype=np.float32)
+        self._idf_rows = 0
+        self._labels: List[str] = []
+        self._texts: List[str] = []
+        self._learned: List[bool] = []
+        self._learned_count = 0
+        self._owner_ids: Dict[str, int] = {}
+        self._seen: Set[Tuple[str, str, int]] = set()
+
+    def __len__(self) -> int:
+        self._ensure_loaded()
+        return len(self._labels)
+
+    def _ensure_loaded(self):
+        if not self._loaded:
+            self.refresh()
+
+    def load(self, conn: Optional[sqlite3.Connection] = None):
+        """Rebuilds the index from the category map and, if given, the database behind conn."""
+        rows = [(keyword, category, None) for category, keywords in self.category_map.items() for keyword in keywords]
+        log_rows = []
+        if conn is not None:
+            rows += [(keyword, category, None) for keyword, category in conn.execute(
+                "SELECT keyword, category FROM keyword_category WHERE user_id IS NULL ORDER BY id"
+            ).fetchall()]
+            log_rows = conn.execute(
+                "SELECT input_text, final_category, user_id FROM categorization_log "
+                "WHERE confidence_score >= ? AND final_category != 'Unknown' ORDER BY id DESC LIMIT ?",
+                (self.min_log_confidence, self.max_log_rows)
+            ).fetchall()
+            # Oldest first, so eviction later drops the oldest
+            log_rows = [(normalize_text(text), category, user_id) for text, category, user_id in reversed(log_rows)]
+        with self._write_lock, self._lock:
+            self._reset()
+            self._loaded = True
+            self._add_rows(rows, learned=False)
+            self._add_rows(log_rows, learned=True)
+            self._refresh_weights()
+
+    def refresh(self):
+        """Reloads every example through connection_factory (or only the category map without one)."""
+        self.load(self.connection_factory() if self.connection_factory is not None else None)
+
+    def add(self, text: str, category: str, user_id: Optional[str] = None, learned: bool = False) -> bool:
+        """Adds one labeled example; returns False if it was already indexed or is empty."""
+        return self.add_many([(text, category)], user_id, learned) == 1
+
+    def add_many(self, rows: Iterable[Tuple[str, str]], user_id: Optional[str] = None, learned: bool = False) -> int:
+        """
+        Adds labeled examples without rebuilding the matrix; returns how many
+        were new. Learned examples (past categorizations) count against
+        max_log_rows, and with a user_id they are only matched for that user.
+        """
+        self._ensure_loaded()
+        with self._write_lock:
+            added = self._add_rows([(text, category, user_id) for text, category in rows], learned)
+            if self._learned_count > self.max_log_rows * (1 + LEARNED_EVICTION_SLACK):
+                self._evict_oldest_learned()
+            elif len(self._labels) > self._idf_rows * IDF_REFRESH_GROWTH:
+                self._refresh_weights()
+            return added
+
+    def _owner_id(self, user_id: Optional[str]) -> int:
+        if user_id is None:
+            return _GLOBAL
+        return self._owner_ids.setdefault(user_id, len(self._owner_ids) + 1)
+
+    def _add_rows(self, rows: Iterable[Tuple[str, str, Optional[str]]], learned: bool) -> int:
+        """Appends rows past the published ones; the caller holds the write lock."""
+        added = 0
+        for text, category, user_id in rows:
+            text = (text or "").strip().lower()
+            owner = self._owner_id(user_id)
+            if not text or (text, category, owner) in self._seen:
+                continue
+            self._seen.add((text, category, owner))
+            n = len(self._labels)
+            if n == len(self._counts):
+                grown = (np.concatenate([self._counts, np.zeros_like(self._counts)]),
+                         np.concatenate([self._norms, np.zeros_like(self._norms)]),
+                         np.concatenate([self._owners, np.zeros_like(self._owners)]))
+                with self._lock:
+                    self._counts, self._norms, self._owners = grown
+            counts = ngram_counts(text, self.n_features)
+            self._counts[n] = counts
+            self._doc_freq += counts > 0
+            self._norms[n] = np.linalg.norm(counts * self._idf)
+            self._owners[n] = owner
+            self._learned.append(learned)
+            self._learned_count += learned
+            # Publishing the label makes row n visible to queries
+            with self._lock:
+                self._texts.append(text)
+                self._labels.append(category)
+            added += 1
+        return added
+
+    def _evict_oldest_learned(self):
+        """Drops the oldest learned examples down to max_log_rows, rebuilding the matrix once."""
+        n = len(self._labels)
+        learned = np.flatnonzero(self._learned[:n])
+        keep = np.ones(n, dtype=bool)
+        keep[learned[:len(learned) - self.max_log_rows]] = False
+        kept = np.flatnonzero(keep)
+
+        capacity = max(len(kept), 64)
+        counts = np.zeros((capacity, self.n_features), dtype=np.float32)
+        counts[:len(kept)] = self._counts[kept]
+        owners = np.zeros(capacity, dtype=np.int32)
+        owners[:len(kept)] = self._owners[kept]
+        labels = [self._labels[i] for i in kept]
+        texts = [self._texts[i] for i in kept]
+        self._learned = [self._learned[i] for i in kept]
+        self._learned_count = sum(self._learned)
+        self._seen = {(texts[i], labels[i], int(owners[i])) for i in range(len(kept))}
+        self._doc_freq = (counts[:len(kept)] > 0).sum(axis=0).astype(np.float32)
+        idf, norms = self._weights(counts, len(kept))
+        with self._lock:
+            self._counts, self._owners, self._labels, self._texts = counts, owners, labels, texts
+            self._idf, self._norms, self._idf_rows = idf, norms, len(kept)
+
+    def _weights(self, counts: np.ndarray, n: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Smoothed IDF weights and the norms of the first n rows of counts under them."""
+        idf = (np.log((1 + n) / (1 + self._doc_freq)) + 1).astype(np.float32)
+        norms = np.zeros(len(counts), dtype=np.float32)
+        norms[:n] = np.sqrt(np.square(counts[:n]) @ np.square(idf))
+        return idf, norms
+
+    def _refresh_weights(self):
+        """Recomputes the IDF weights and every row norm, then swaps them in for queries."""
+        n = len(self._labels)
+        idf, norms = self._weights(self._counts, n)
+        with self._lock:
+            self._idf, self._norms, self._idf_rows = idf, norms, n
+
+    def query(self, text: str, k: int = SIMILARITY_TOP_K, user_id: Optional[str] = None) -> List[Tuple[str, str, float]]:
+        """
+        Returns up to k (category, example text, cosine similarity) tuples, most
+        similar first, among the global examples and those learned for user_id.
+        """
+        self._ensure_loaded()
+        with self._lock:
+            n = len(self._labels)
+            counts, norms, idf, owners = self._counts, self._norms, self._idf, self._owners
+            labels, texts = self._labels, self._texts
+            owner = self._owner_ids.get(user_id, -1) if user_id is not None else _GLOBAL
+        if n == 0 or not text.strip():
+            return []
+
+        query = ngram_counts(text, self.n_features) * idf
+        query_norm = np.linalg.norm(query)
+        if query_norm == 0:
+            return []
+        # Rows below n are never written again, so they can be read outside the lock
+        scores = (counts[:n] @ (query * idf)) / (np.maximum(norms[:n], 1e-9) * query_norm)
+        visible = (owners[:n] == _GLOBAL) | (owners[:n] == owner)
+        scores = np.where(visible, scores, -np.inf)
+        k = min(k, int(visible.sum()))
+        if k == 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(labels[i], texts[i], float(scores[i])) for i in top]
+
+
+class SimilarityMatcherTool(BaseTool):
+    """
+    SimilarityMatcherTool is a LangChain-compatible tool that categorizes a
+    transaction by its nearest labeled examples in a SimilarityIndex. The top-k
+    neighbours above the threshold vote with their similarity scores.
+    """
+    name: str = "similarity_matcher"
+    description: str = "Matches transaction text to the most similar known, labeled descriptions"
+    threshold: float = SIMILARITY_THRESHOLD
+    top_k: int = SIMILARITY_TOP_K
+
+    _index: SimilarityIndex = PrivateAttr()
+
+    def __init__(self, index: SimilarityIndex, **kwargs):
+        super().__init__(**kwargs)
+        object.__setattr__(self, '_index', index)
+
+    def _run(self, input_text: str) -> Optional[str]:
+        match = self.match(input_text)
+        return match[0] if match else None
+
+    def match(self, input_text: str, user_id: Optional[str] = None) -> Optional[Tuple[str, float]]:
+        """Returns (category, best similarity for that category), or None below the threshold."""
+        votes: Dict[str, float] = {}
+        best: Dict[str, float] = {}
+        for category, _, score in self._index.query(input_text, self.top_k, user_id):
+            if score < self.threshold:
+                break
+            votes[category] = votes.get(category, 0.0) + score
+            best[category] = max(best.get(category, 0.0), score)
+        if not votes:
+            return None
+        category = max(votes, key=votes.get)
+        return category, best[category]
+
+    def get_best_match(self, input_text: str) -> Optional[str]:
+        return self._run(input_text)
@@ -1,48 +1,123 @@
+import os
 import re
+from functools import lru_cache
+from typing import Dict, List
 
-def normalize_text(text: str) -> str:
+# Number of distinct raw descriptions whose normalized form is memoized
+NORMALIZE_CACHE_SIZE = int(os.getenv("NORMALIZE_CACHE_SIZE", "65536"))
+
+# Currency codes and noise tokens stripped anywhere in the text (no word boundaries)
+NOISE_TOKENS = [
+    'pos trxn', 'usd', 'ghs', 'kes', 'eur', 'gbp', 'jpy', 'aud', 'cad', 'chf', 'cny', 'sek', 'nzd', 'mxn', 'sgd',
+    'hkd', 'nok', 'krw', 'try', 'rub', 'inr', 'brl', 'zar', 'dkk', 'pln', 'thb', 'myr', 'php', 'idr', 'czk',
+    'huf', 'ils', 'clp', 'aed', 'cop', 'sar', 'twd', 'vnd', 'uah', 'ron', 'egp', 'ngn', 'kwd', 'bhd', 'omr',
+    'qtr', 'bgn', 'hrk', 'isk', 'mdl', 'mkd', 'rsd', 'sll', 'srd', 'syp', 'tjs', 'tmt', 'uzs', 'xaf', 'xcd',
+    'xof', 'xpf', 'yer', 'zmw', 'zwl',
+]
+
+# Currency symbols, deleted with str.translate
+_CURRENCY_SYMBOLS = str.maketrans('', '', '€$£¥₹')
+
+# Word-bounded aliases rewritten to a canonical token
+ALIASES: Dict[str, str] = {
+    'momo': 'mobile_money', 'mobile money': 'mobile_money',
+    'airtel': 'telecom', 'vodafone': 'telecom', 'mtn': 'telecom', 'glo': 'telecom',
+    'uber eats': 'uber_eats', 'ubereats': 'uber_eats',
+    'kfc': 'fast_food', 'mcdonalds': 'fast_food', 'burger king': 'fast_food',
+}
+
+# Card/bank terms and transaction verbs/phrases removed as whole words
+STOP_WORDS = [
+    'visa', 'mastercard', 'card', 'bank', 'acct', 'account',
+    'payment', 'purchase', 'transfer', 'withdrawal', 'deposit', 'paid for', 'bought', 'from',
+]
+
+
+def _trie_pattern(words: List[str]) -> str:
     """
-    Normalizes expense descriptions by:
-    - Converting to lowercase.
-    - Removing common noise (e.g., 'POS TRXN', 'USD', currency symbols).
-    - Replacing common abbreviations or variations with a standard form.
-    - Removing extra whitespace.
+    Builds a regex alternation that branches on shared prefixes, so the engine
+    tries one branch per character instead of every word at every position.
+    Matches the same strings as a flat alternation when no word is a prefix of another.
     """
+    trie: dict = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def render(node: dict) -> str:
+        branches = [re.escape(char) + render(child) for char, child in sorted(node.items()) if char]
+        if '' in node:
+            branches.append('')
+        if len(branches) == 1:
+            return branches[0]
+        return '(?:' + '|'.join(branches) + ')'
+
+    return render(trie)
+
+
+_NOISE = re.compile(_trie_pattern(NOISE_TOKENS))
+_ALIASES = re.compile(r'\b(?:' + '|'.join(re.escape(alias) for alias in ALIASES) + r')\b')
+# e.g., TRXN ID: 12345, Ref: ABCDE
+_REFERENCES = re.compile(r'\b(?:trxn id|ref|auth|transaction|trans|id)\b\s*\S*')
+_HAS_DIGIT = re.compile(r'\d')
+# e.g., 07-25-2023, 07/25/23
+_NUMERIC_DATES = re.compile(r'\d{1,2}[-/.]\d{1,2}[-/.]\d{2,4}')
+# e.g., Jul 25, 2023
+_MONTH_DATES = re.compile(r'\b(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)\b\s*\d{1,2}(?:st|nd|rd|th)?(?:,\s*\d{4})?')
+# e.g., 14:30, 2:30 PM
+_TIMES = re.compile(r'\d{1,2}:\d{2}(?:\s*[ap]m)?')
+# Stop words and every character that is not a letter or whitespace, in one pass
+_STOP_WORDS_AND_SYMBOLS = re.compile(r'\b(?:' + '|'.join(re.escape(word) for word in STOP_WORDS) + r')\b|[^a-z\s]')
+
+
+def _replace_alias(match: re.Match) -> str:
+    return ALIASES[match.group(0)]
+
+
+def _normalize(text: str) -> str:
     text = text.lower()
 
-    # Remove common noise patterns (currencies, transaction types, telecom, food chains)
-    text = re.sub(r'pos trxn|usd|ghs|kes|eur|gbp|jpy|aud|cad|chf|cny|sek|nzd|mxn|sgd|hkd|nok|krw|try|rub|inr|brl|zar|dkk|pln|thb|myr|php|idr|czk|huf|ils|clp|aed|cop|sar|twd|vnd|uah|ron|egp|ngn|kwd|bhd|omr|qtr|bgn|hrk|isk|mdl|mkd|rsd|sll|srd|syp|tjs|tmt|uzs|xaf|xcd|xof|xpf|yer|zmw|zwl', '', text)
-    text = re.sub(r'\b(?:momo|mobile money)\b', 'mobile_money', text)
-    text = re.sub(r'\b(?:airtel|vodafone|mtn|glo)\b', 'telecom', text)
-    text = re.sub(r'\b(?:uber eats|ubereats)\b', 'uber_eats', text)
-    text = re.sub(r'\b(?:kfc|mcdonalds|burger king)\b', 'fast_food', text)
+    # Remove common noise patterns (currencies, transaction types)
+    text = _NOISE.sub('', text)
+
+    # Replace telecom, mobile money and food chain aliases with a standard form
+    text = _ALIASES.sub(_replace_alias, text)
 
     # Remove currency symbols
-    text = re.sub(r'[€$£¥₹]', '', text)
+    text = text.translate(_CURRENCY_SYMBOLS)
 
     # Remove common transaction identifiers and references
-    text = re.sub(r'\b(?:trxn id|ref|auth|transaction|trans|id)\b\s*\S*', '', text) # e.g., TRXN ID: 12345, Ref: ABCDE
-    
-    # Remove dates (various formats)
-    text = re.sub(r'\d{1,2}[-/.]\d{1,2}[-/.]\d{2,4}', '', text) # e.g., 07-25-2023, 07/25/23
-    text = re.sub(r'\b(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)\b\s*\d{1,2}(?:st|nd|rd|th)?(?:,\s*\d{4})?', '', text) # e.g., Jul 25, 2023
+    if 'id' in text or 'ref' in text or 'auth' in text or 'trans' in text:
+        text = _REFERENCES.sub('', text)
 
-    # Remove times (various formats)
-    text = re.sub(r'\d{1,2}:\d{2}(?:\s*[ap]m)?', '', text) # e.g., 14:30, 2:30 PM
+    # Remove dates and times; every pattern needs a digit
+    if _HAS_DIGIT.search(text):
+        text = _NUMERIC_DATES.sub('', text)
+        text = _MONTH_DATES.sub('', text)
+        text = _TIMES.sub('', text)
 
-    # Remove card/bank related terms
-    text = re.sub(r'\b(?:visa|mastercard|card|bank|acct|account)\b', '', text)
+    # Remove card/bank terms and transaction verbs, then keep only letters and spaces
+    text = _STOP_WORDS_AND_SYMBOLS.sub('', text)
 
-    # Remove common transaction verbs/phrases
-    text = re.sub(r'\b(?:payment|purchase|transfer|withdrawal|deposit|paid for|bought|from)\b', '', text)
+    # Remove extra whitespace
+    return ' '.join(text.split())
 
-    # Remove special characters and numbers, keep only letters and spaces
-    text = re.sub(r'[^a-z\s]', '', text)
 
-    # Remove extra whitespace
-    text = re.sub(r'\s+', ' ', text).strip()
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def normalize_text(text: str) -> str:
+    """
+    Normalizes expense descriptions by:
+    - Converting to lowercase.
+    - Removing common noise (e.g., 'POS TRXN', 'USD', currency symbols).
+    - Replacing common abbreviations or variations with a standard form.
+    - Removing extra whitespace.
 
-    return text
+    Passes whose effects are independent share one precompiled pattern, and
+    results are memoized for repeated merchant strings.
+    """
+    return _normalize(text)
 
 if __name__ == "__main__":
     test_cases = [
@@ -0,0 +1,207 @@
+"""
+Column-at-a-time normalization and matching for offline imports.
+
+normalize_series() runs each pass of normalize_text once over the column's
+values joined into one string, and match_series() runs the keyword DB and
+regex (categories.yaml) tiers over the column as joins between every
+candidate span of every description and the keyword tables, instead of a
+lookup per row. Both only process the distinct values of the column, so a
+merchant repeated on every other statement line is paid for once.
+
+The results are identical to normalize_text and to the DB and regex tiers of
+run_categorizer. Rows that neither tier matches come back with category
+None; settle those with run_categorizer / run_categorizer_batch, which go on
+to the fuzzy, similarity and LLM tiers.
+"""
+import re
+from typing import List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from app.tools.db_matcher import KeywordDBIndex, KeywordSnapshot
+from app.tools.keyword_index import KeywordIndex
+from app.tools.regex_matcher import RegexMatcherTool
+from app.tools.text_normalizer import (
+    _ALIASES, _CURRENCY_SYMBOLS, _MONTH_DATES, _NOISE, _NUMERIC_DATES, _REFERENCES, _STOP_WORDS_AND_SYMBOLS, _TIMES,
+    _replace_alias, normalize_text,
+)
+
+_WORD_BOUNDARY = re.compile(r'\b')
+
+# Distinct values normalized per joined string
+NORMALIZE_CHUNK_SIZE = 10000
+# Joins the values of a chunk; it is not a word character, so \b sees it like the end of a string
+_SEPARATOR = '\x00'
+
+
+def _excluding_separator(pattern: re.Pattern, part: str, replacement: str) -> re.Pattern:
+    """pattern with the one part that could match the separator rewritten not to."""
+    if part not in pattern.pattern:
+        raise ValueError(f"{part!r} is not in {pattern.pattern!r}; check the joined normalization passes")
+    return re.compile(pattern.pattern.replace(part, replacement), pattern.flags)
+
+
+# The other passes only match letters, digits, spaces and punctuation, so they never cross a separator
+_JOINED_REFERENCES = _excluding_separator(_REFERENCES, r'\S*', r'[^\s\x00]*')
+_JOINED_STOP_WORDS_AND_SYMBOLS = _excluding_separator(_STOP_WORDS_AND_SYMBOLS, r'[^a-z\s]', r'[^a-z\s\x00]')
+
+# Sources of a DB match, in the order KeywordDBMatcherTool prefers them
+_USER, _GLOBAL = 0, 1
+
+
+def _distinct(texts: pd.Series):
+    """(codes, distinct values) of a column as an object Series, so .str runs Python's re like the scalar path."""
+    codes, uniques = pd.factorize(texts.astype(object))
+    return codes, pd.Series(uniques, dtype=object)
+
+
+def _expand(codes: np.ndarray, values: np.ndarray, index: pd.Index, name=None) -> pd.Series:
+    """Maps per-distinct-value results back onto the rows (missing inputs stay missing)."""
+    result = np.empty(len(codes), dtype=object)
+    result[:] = None
+    present = codes >= 0
+    result[present] = values[codes[present]]
+    return pd.Series(result, index=index, name=name, dtype=object)
+
+
+def _normalize_joined(texts: List[str]) -> List[str]:
+    """
+    The passes of text_normalizer._normalize, in the same order, each run as
+    one scan over the texts joined by _SEPARATOR, which none of the texts contain.
+    """
+    # _normalize skips the reference and date passes when the text cannot match them; running them anyway is equivalent
+    text = _SEPARATOR.join(texts).lower()
+    text = _NOISE.sub('', text)
+    text = _ALIASES.sub(_replace_alias, text)
+    text = text.translate(_CURRENCY_SYMBOLS)
+    text = _JOINED_REFERENCES.sub('', text)
+    text = _NUMERIC_DATES.sub('', text)
+    text = _MONTH_DATES.sub('', text)
+    text = _TIMES.sub('', text)
+    text = _JOINED_STOP_WORDS_AND_SYMBOLS.sub('', text)
+    return [' '.join(value.split()) for value in text.split(_SEPARATOR)]
+
+
+def _normalize_distinct(texts: pd.Series) -> np.ndarray:
+    """normalize_text for a column of distinct values; anything but a string becomes None."""
+    result = np.empty(len(texts), dtype=object)
+    result[:] = None
+    joinable = [(i, text) for i, text in enumerate(texts) if isinstance(text, str) and _SEPARATOR not in text]
+    for start in range(0, len(joinable), NORMALIZE_CHUNK_SIZE):
+        chunk = joinable[start:start + NORMALIZE_CHUNK_SIZE]
+        result[[i for i, _ in chunk]] = _normalize_joined([text for _, text in chunk])
+    for i, text in enumerate(texts):
+        if isinstance(text, str) and _SEPARATOR in text:
+            result[i] = normalize_text(text)
+    return result
+
+
+def normalize_series(texts: pd.Series) -> pd.Series:
+    """normalize_text for every row of texts; missing values stay None."""
+    codes, distinct = _distinct(texts)
+    return _expand(codes, _normalize_distinct(distinct), texts.index, texts.name)
+
+
+def _spans(texts: Sequence[str], max_len: int) -> pd.DataFrame:
+    """
+    (row, key) for every distinct substring between two word boundaries of
+    each text, up to max_len long: the spans KeywordIndex.find looks up.
+    """
+    rows: List[int] = []
+    keys: List[str] = []
+    for row, text in enumerate(texts):
+        boundaries = [m.start() for m in _WORD_BOUNDARY.finditer(text)]
+        for i, start in enumerate(boundaries):
+            for end in boundaries[i:]:
+                if end - start > max_len:
+                    break
+                rows.append(row)
+                keys.append(text[start:end])
+    return pd.DataFrame({"row": rows, "key": keys}).drop_duplicates()
+
+
+def _entries(index: KeywordIndex) -> pd.DataFrame:
+    """One row per index entry: its lowered keyword, entry order and label (category)."""
+    entries = index.entries()
+    return pd.DataFrame({
+        "key": [keyword.lower() for _, keyword in entries],
+        "order": np.arange(len(entries)),
+        "label": [label for label, _ in entries],
+    })
+
+
+def _label_counts(spans: pd.DataFrame, index: KeywordIndex, source: int = 0) -> pd.DataFrame:
+    """
+    Per (row, label): how many entries of the label were hit (the length of
+    KeywordIndex.matches()[label]) and the order of its first hit entry.
+    """
+    hits = spans.merge(_entries(index), on="key")
+    counts = hits.groupby(["row", "label"], sort=False).agg(count=("order", "size"), first=("order", "min")).reset_index()
+    counts["source"] = source
+    return counts
+
+
+def _best_labels(counts: pd.DataFrame, rows: int) -> np.ndarray:
+    """
+    get_best_match for every row: the label with the most hits, ties going to
+    the label matches() lists first (by source, then first hit entry).
+    """
+    best = np.empty(rows, dtype=object)
+    best[:] = None
+    if len(counts):
+        ranked = counts.sort_values(["row", "count", "source", "first"], ascending=[True, False, True, True])
+        winners = ranked.drop_duplicates("row")
+        best[winners["row"].to_numpy()] = winners["label"].to_numpy()
+    return best
+
+
+def _db_matches(spans: pd.DataFrame, rows: int, snapshot: KeywordSnapshot, user_id: Optional[str]) -> np.ndarray:
+    counts = _label_counts(spans, snapshot.global_index, _GLOBAL)
+    user_index = snapshot.user_indexes.get(user_id) if user_id else None
+    if user_index is not None:
+        user_counts = _label_counts(spans, user_index, _USER)
+        # A category the user has keywords for ignores the global keywords of that category
+        overridden = counts.merge(user_counts[["row", "label"]], on=["row", "label"], how="left", indicator=True)
+        counts = pd.concat([user_counts, counts[(overridden["_merge"] == "left_only").to_numpy()]], ignore_index=True)
+    return _best_labels(counts, rows)
+
+
+def match_series(texts: pd.Series, user_id: Optional[str] = None, normalized: bool = False,
+                 keyword_index: Optional[KeywordDBIndex] = None,
+                 regex_tool: Optional[RegexMatcherTool] = None) -> pd.DataFrame:
+    """
+    Runs the DB and regex tiers over every row of texts (normalized first
+    unless normalized=True). Returns a frame with the same index and the
+    columns category, matching_method ("DB", "Regex" or None) and
+    confidence_score (NaN where neither tier matched). The DB tier uses the
+    shared keyword index and the regex tier the active categories.yaml
+    snapshot unless keyword_index / regex_tool are given.
+    """
+    from app import agent
+
+    snapshot = (keyword_index or agent.keyword_db_index).snapshot()
+    regex_index = (regex_tool or agent.category_config.active().regex_tool).keyword_index
+
+    codes, distinct = _distinct(texts if normalized else normalize_series(texts))
+    # The tools lowercase and strip their input once more
+    values = distinct.str.strip().str.lower().tolist()
+
+    user_index = snapshot.user_indexes.get(user_id) if user_id else None
+    indexes = [index for index in (snapshot.global_index, user_index, regex_index) if index is not None]
+    max_len = max((len(keyword) for index in indexes for _, keyword in index.entries()), default=0)
+    spans = _spans(values, max_len)
+
+    db = _db_matches(spans, len(values), snapshot, user_id)
+    regex = _best_labels(_label_counts(spans, regex_index), len(values))
+    by_db, by_regex = pd.notna(db), pd.notna(regex)
+
+    category = np.where(by_db, db, regex)
+    method = np.where(by_db, "DB", np.where(by_regex, "Regex", None)).astype(object)
+    confidence = np.where(by_db, agent.DB_MATCH_CONFIDENCE, np.where(by_regex, agent.REGEX_MATCH_CONFIDENCE, np.nan))
+
+    return pd.DataFrame({
+        "category": _expand(codes, category, texts.index),
+        "matching_method": _expand(codes, method, texts.index),
+        "confidence_score": _expand(codes, confidence.astype(object), texts.index).astype(float),
+    })
@@ -0,0 +1,93 @@
+"""
+Throughput benchmark for app.tools.text_normalizer.
+
+Compares the original sequential re.sub implementation (kept below as
+legacy_normalize_text) with the compiled engine, both uncached and memoized.
+
+    python -m benchmarks.bench_normalizer
+"""
+import json
+import os
+import re
+import time
+
+from app.tools.text_normalizer import _normalize, normalize_text
+
+GOLDEN_CORPUS = os.path.join(os.path.dirname(__file__), "..", "tests", "data", "normalizer_golden.json")
+
+
+def legacy_normalize_text(text: str) -> str:
+    """
+    Normalizes expense descriptions by:
+    - Converting to lowercase.
+    - Removing common noise (e.g., 'POS TRXN', 'USD', currency symbols).
+    - Replacing common abbreviations or variations with a standard form.
+    - Removing extra whitespace.
+    """
+    text = text.lower()
+
+    # Remove common noise patterns (currencies, transaction types, telecom, food chains)
+    text = re.sub(r'pos trxn|usd|ghs|kes|eur|gbp|jpy|aud|cad|chf|cny|sek|nzd|mxn|sgd|hkd|nok|krw|try|rub|inr|brl|zar|dkk|pln|thb|myr|php|idr|czk|huf|ils|clp|aed|cop|sar|twd|vnd|uah|ron|egp|ngn|kwd|bhd|omr|qtr|bgn|hrk|isk|mdl|mkd|rsd|sll|srd|syp|tjs|tmt|uzs|xaf|xcd|xof|xpf|yer|zmw|zwl', '', text)
+    text = re.sub(r'\b(?:momo|mobile money)\b', 'mobile_money', text)
+    text = re.sub(r'\b(?:airtel|vodafone|mtn|glo)\b', 'telecom', text)
+    text = re.sub(r'\b(?:uber eats|ubereats)\b', 'uber_eats', text)
+    text = re.sub(r'\b(?:kfc|mcdonalds|burger king)\b', 'fast_food', text)
+
+    # Remove currency symbols
+    text = re.sub(r'[€$£¥₹]', '', text)
+
+    # Remove common transaction identifiers and references
+    text = re.sub(r'\b(?:trxn id|ref|auth|transaction|trans|id)\b\s*\S*', '', text) # e.g., TRXN ID: 12345, Ref: ABCDE
+    
+    # Remove dates (various formats)
+    text = re.sub(r'\d{1,2}[-/.]\d{1,2}[-/.]\d{2,4}', '', text) # e.g., 07-25-2023, 07/25/23
+    text = re.sub(r'\b(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)\b\s*\d{1,2}(?:st|nd|rd|th)?(?:,\s*\d{4})?', '', text) # e.g., Jul 25, 2023
+
+    # Remove times (various formats)
+    text = re.sub(r'\d{1,2}:\d{2}(?:\s*[ap]m)?', '', text) # e.g., 14:30, 2:30 PM
+
+    # Remove card/bank related terms
+    text = re.sub(r'\b(?:visa|mastercard|card|bank|acct|account)\b', '', text)
+
+    # Remove common transaction verbs/phrases
+    text = re.sub(r'\b(?:payment|purchase|transfer|withdrawal|deposit|paid for|bought|from)\b', '', text)
+
+    # Remove special characters and numbers, keep only letters and spaces
+    text = re.sub(r'[^a-z\s]', '', text)
+
+    # Remove extra whitespace
+    text = re.sub(r'\s+', ' ', text).strip()
+
+    return text
+
+
+
+def throughput(func, texts, repeat: int = 5) -> float:
+    """Returns the best calls-per-second over `repeat` passes through texts."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for text in texts:
+            func(text)
+        best = min(best, time.perf_counter() - start)
+    return len(texts) / best
+
+
+def main():
+    with open(GOLDEN_CORPUS) as f:
+        texts = [case["input"] for case in json.load(f)]
+
+    mismatches = [text for text in texts if legacy_normalize_text(text) != normalize_text(text)]
+    print(f"Corpus: {len(texts)} descriptions, {len(mismatches)} mismatches against the legacy implementation")
+
+    normalize_text.cache_clear()
+    legacy = throughput(legacy_normalize_text, texts)
+    compiled = throughput(_normalize, texts)
+    memoized = throughput(normalize_text, texts)
+    print(f"legacy (sequential re.sub): {legacy:>12,.0f} texts/s")
+    print(f"compiled engine:            {compiled:>12,.0f} texts/s  ({compiled / legacy:.1f}x)")
+    print(f"compiled + memo (warm):     {memoized:>12,.0f} texts/s  ({memoized / legacy:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
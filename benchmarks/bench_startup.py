@@ -0,0 +1,63 @@
+"""
+Cold-start benchmark for API workers and CLI tools.
+
+Each measurement runs in a fresh interpreter and reports how long it takes
+to import app.agent (what CLI tools pay), to import app.main (what an API
+worker pays before serving), to run the warm-up hook, and to serve the
+first /api/categorize request.
+
+    python -m benchmarks.bench_startup [--runs 5]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+PROBE = """
+import json, os, time
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+start = time.perf_counter()
+import app.agent
+agent_import = time.perf_counter() - start
+import app.main
+main_import = time.perf_counter() - start
+from app.agent import warm_up
+warm_start = time.perf_counter()
+warm_up()
+warm = time.perf_counter() - warm_start
+from fastapi.testclient import TestClient
+client = TestClient(app.main.app)
+request_start = time.perf_counter()
+client.post("/api/categorize", json={"input_text": "Paid for Uber ride"}, params={"session_id": "startup-benchmark"})
+first_request = time.perf_counter() - request_start
+print(json.dumps({"import app.agent": agent_import, "import app.main": main_import,
+                  "warm_up()": warm, "first request (warm)": first_request}))
+"""
+
+
+def run_probe() -> dict:
+    env = {key: value for key, value in os.environ.items()
+           if not key.startswith(("TELEGRAM_", "TWILIO_"))}
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE], cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    runs = [run_probe() for _ in range(args.runs)]
+    for name in runs[0]:
+        median = statistics.median(run[name] for run in runs)
+        print(f"{name:<24} {median * 1000:>10,.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
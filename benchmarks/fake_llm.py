@@ -0,0 +1,68 @@
+"""
+Deterministic stand-in for the OpenAI chains used by app.agent.
+
+The fake answers with a category picked from a stable hash of the
+description, optionally after a fixed delay, so benchmarks measure our own
+overhead rather than network latency.
+"""
+import asyncio
+import hashlib
+import time
+from typing import List
+
+from langchain_core.runnables import RunnableLambda
+
+from app.llm_batcher import LLMMicroBatcher
+
+
+def fake_category(description: str, categories: List[str]) -> str:
+    digest = hashlib.md5(description.encode("utf-8")).digest()
+    return categories[digest[0] % len(categories)]
+
+
+def make_fake_chains(latency_ms: float = 0.0):
+    """
+    Returns (single_chain, batch_chain) runnables with the real chains' inputs
+    and outputs, answering from the categories listed in each prompt.
+    """
+    delay = latency_ms / 1000
+
+    def single_answer(inputs: dict) -> str:
+        return fake_category(inputs["expense_description"], inputs["categories"].split(", "))
+
+    def single(inputs: dict) -> str:
+        if delay:
+            time.sleep(delay)
+        return single_answer(inputs)
+
+    async def asingle(inputs: dict) -> str:
+        if delay:
+            await asyncio.sleep(delay)
+        return single_answer(inputs)
+
+    def batch_answer(inputs: dict) -> str:
+        categories = inputs["categories"].split(", ")
+        lines = inputs["expense_descriptions"].splitlines()
+        descriptions = [line.split(". ", 1)[1].strip('"') for line in lines]
+        return "\n".join(f"{i}. {fake_category(text, categories)}" for i, text in enumerate(descriptions, start=1))
+
+    def batch(inputs: dict) -> str:
+        if delay:
+            time.sleep(delay)
+        return batch_answer(inputs)
+
+    async def abatch(inputs: dict) -> str:
+        if delay:
+            await asyncio.sleep(delay)
+        return batch_answer(inputs)
+
+    return RunnableLambda(single, afunc=asingle), RunnableLambda(batch, afunc=abatch)
+
+
+def install_fake_llm(agent_module, latency_ms: float = 0.0, window_ms: int = 0):
+    """Points agent_module's LLM tier at the fake chains."""
+    single_chain, batch_chain = make_fake_chains(latency_ms)
+    categories = agent_module.category_config.current().categories
+    agent_module.llm_chain = single_chain
+    agent_module.batch_llm_chain = batch_chain
+    agent_module.llm_batcher = LLMMicroBatcher(single_chain, batch_chain, categories, window_ms=window_ms)
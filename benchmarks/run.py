@@ -0,0 +1,214 @@
+"""
+Micro-benchmark suite for the categorization pipeline.
+
+Times the normalizer, both matchers, the compiled graph and the
+/api/categorize route against synthetic data and a deterministic fake LLM,
+using a throwaway database so data/keywords.db is never touched.
+
+    python -m benchmarks.run                        # print results
+    python -m benchmarks.run --save                 # write benchmarks/baselines/baseline.json
+    python -m benchmarks.run --check                # compare against it, exit 1 on regressions
+    python -m benchmarks.run --keywords 10000 --only matcher
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Sequence
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+from benchmarks.fake_llm import install_fake_llm
+from benchmarks.synthetic import generate_category_map, generate_keyword_table, generate_transactions
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baselines", "baseline.json")
+
+
+def measure(func: Callable, inputs: Sequence, min_time: float = 0.3, repeat: int = 5,
+            setup: Callable = None) -> Dict[str, float]:
+    """
+    Calls func over inputs (cycling) in `repeat` rounds of at least min_time/repeat
+    seconds each and reports the median time per call.
+    """
+    per_round = min_time / repeat
+    timings: List[float] = []
+    calls = 0
+    for _ in range(repeat):
+        if setup:
+            setup()
+        n = 0
+        start = time.perf_counter()
+        while True:
+            func(inputs[n % len(inputs)])
+            n += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= per_round and n >= len(inputs) // 10 + 1:
+                break
+        timings.append(elapsed / n)
+        calls += n
+    per_op = statistics.median(timings)
+    return {"per_op_us": round(per_op * 1e6, 3), "ops_per_sec": round(1 / per_op, 1), "calls": calls}
+
+
+def prepare_database(path: str, keywords: int):
+    """Creates the schema in a scratch database and fills keyword_category."""
+    from app import db
+    from app.migrations import migrate
+
+    db.configure(path)
+    conn = db.get_connection()
+    migrate(conn)
+    conn.executemany(
+        "INSERT INTO keyword_category (user_id, keyword, category) VALUES (NULL, ?, ?)",
+        generate_keyword_table(keywords)
+    )
+    conn.commit()
+
+
+def run_suite(keywords: int, transactions: int, min_time: float, only: str = None) -> Dict[str, dict]:
+    workdir = tempfile.mkdtemp(prefix="categorizer-bench-")
+    prepare_database(os.path.join(workdir, "bench.db"), keywords)
+
+    from app import agent
+    from app.db import get_connection
+    from app.tools.db_matcher import KeywordDBIndex, KeywordDBMatcherTool
+    from app.tools.regex_matcher import RegexMatcherTool
+    from app.tools.text_normalizer import _normalize, normalize_text
+
+    install_fake_llm(agent)
+    agent.keyword_db_index.refresh()
+    # Time the pipeline itself; run_categorizer[result_cache] measures repeated descriptions with the cache on
+    agent.result_cache.max_size = 0
+
+    texts = generate_transactions(transactions)
+    normalized = [normalize_text(text) for text in texts]
+    regex_tool = RegexMatcherTool(category_map=generate_category_map(keywords))
+    db_tool = KeywordDBMatcherTool(index=KeywordDBIndex.from_connection(get_connection()))
+
+    db_hits = [text for text in normalized if db_tool.get_best_match(text)]
+    llm_misses = [f"unmatched vendor {i}" for i in range(transactions)]
+
+    cases = {
+        "normalize_text[cold]": lambda: measure(_normalize, texts, min_time),
+        "normalize_text[memo]": lambda: measure(normalize_text, texts, min_time),
+        "regex_matcher.get_best_match": lambda: measure(regex_tool.get_best_match, normalized, min_time),
+        "db_matcher.get_best_match": lambda: measure(db_tool.get_best_match, normalized, min_time),
+        "graph.invoke[db_hit]": lambda: measure(lambda text: agent.graph.invoke({"input_text": text, "user_id": None}), db_hits, min_time),
+        "graph.invoke[llm_miss]": lambda: measure(
+            lambda text: agent.graph.invoke({"input_text": text, "user_id": None}), llm_misses, min_time,
+            setup=agent.category_config.current().llm_cache.clear
+        ),
+        "run_categorizer[db_hit]": lambda: measure(agent.run_categorizer, db_hits, min_time),
+        "run_categorizer": lambda: measure(agent.run_categorizer, texts, min_time),
+        "api.post /api/categorize": lambda: _bench_api(texts, min_time),
+        "run_categorizer[result_cache]": lambda: _bench_result_cache(agent, texts, min_time),
+    }
+
+    results = {}
+    for name, case in cases.items():
+        if only and only not in name:
+            continue
+        results[name] = case()
+        print(f"{name:<32} {results[name]['per_op_us']:>12,.1f} us/op {results[name]['ops_per_sec']:>12,.0f} ops/s")
+    return results
+
+
+def _bench_result_cache(agent, texts: List[str], min_time: float) -> Dict[str, float]:
+    from app.result_cache import RESULT_CACHE_SIZE
+
+    agent.result_cache.max_size = RESULT_CACHE_SIZE
+    try:
+        for text in texts:
+            agent.run_categorizer(text)
+        return measure(agent.run_categorizer, texts, min_time)
+    finally:
+        agent.result_cache.max_size = 0
+        agent.result_cache.clear()
+
+
+def _bench_api(texts: List[str], min_time: float) -> Dict[str, float]:
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from app.agent_api import create_session, router
+    from app.audit_log import audit_log
+
+    api = FastAPI()
+    api.include_router(router, prefix="/api")
+    client = TestClient(api)
+    session_id = create_session(user_id="benchmark")
+
+    def post(text: str):
+        response = client.post("/api/categorize", json={"input_text": text}, params={"session_id": session_id})
+        response.raise_for_status()
+
+    result = measure(post, texts, min_time)
+    audit_log.flush()
+    return result
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], tolerance: float) -> List[str]:
+    """Returns a message for every case that is more than `tolerance` slower than the baseline."""
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        ratio = result["per_op_us"] / previous["per_op_us"]
+        if ratio > 1 + tolerance:
+            regressions.append(
+                f"{name}: {previous['per_op_us']:.1f} -> {result['per_op_us']:.1f} us/op ({(ratio - 1) * 100:+.0f}%)"
+            )
+    return regressions
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--keywords", type=int, default=1000, help="keyword rows in the DB table and regex map")
+    parser.add_argument("--transactions", type=int, default=2000, help="synthetic transactions to cycle through")
+    parser.add_argument("--min-time", type=float, default=0.5, help="seconds spent timing each case")
+    parser.add_argument("--only", help="only run cases whose name contains this text")
+    parser.add_argument("--save", nargs="?", const=DEFAULT_BASELINE, help="write results as a JSON baseline")
+    parser.add_argument("--check", nargs="?", const=DEFAULT_BASELINE, help="compare against a JSON baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown before a case is flagged")
+    args = parser.parse_args(argv)
+
+    results = run_suite(args.keywords, args.transactions, args.min_time, args.only)
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, "w") as f:
+            json.dump({
+                "meta": {
+                    "created_at": datetime.now(timezone.utc).isoformat(),
+                    "python": platform.python_version(),
+                    "machine": platform.machine(),
+                    "keywords": args.keywords,
+                    "transactions": args.transactions,
+                },
+                "results": results,
+            }, f, indent=2)
+        print(f"Saved baseline to {args.save}")
+
+    if args.check:
+        with open(args.check) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.tolerance)
+        unchecked = [name for name in results if name not in baseline]
+        if unchecked:
+            print(f"Not in {args.check}, so not checked (re-run with --save): {', '.join(unchecked)}")
+        if regressions:
+            print("Performance regressions:")
+            for message in regressions:
+                print(f"  {message}")
+            return 1
+        print(f"No regressions beyond {args.tolerance:.0%} against {args.check}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
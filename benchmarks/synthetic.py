@@ -0,0 +1,88 @@
+"""
+Synthetic transaction and keyword generators for the benchmark suite.
+
+Everything is driven by a seeded random.Random, so the same arguments always
+produce the same data.
+"""
+import random
+from typing import Dict, List, Tuple
+
+CATEGORY_NAMES = [
+    "Food", "Transport", "Entertainment", "Shopping", "Electronics", "Online Services", "Utilities",
+    "Rent", "Salary", "Donations", "Healthcare", "Education", "Travel", "Personal Care", "Insurance",
+]
+
+# Real-looking merchants; these always match the regex map built by generate_category_map
+KNOWN_MERCHANTS = {
+    "Food": ["kfc", "pizza", "groceries", "restaurant"],
+    "Transport": ["uber", "bolt", "fuel", "bus fare"],
+    "Entertainment": ["netflix", "spotify", "youtube"],
+    "Shopping": ["amazon", "walmart", "target"],
+    "Utilities": ["electricity", "water bill", "internet"],
+}
+
+# (template, share) pairs modelled on bank statement and mobile money SMS lines
+TEMPLATES = [
+    ("POS TRXN - {merchant} USD {amount}", 4),
+    ("{merchant} {city} GHS {amount}", 3),
+    ("VISA Card Payment at {merchant} {date} {time}", 2),
+    ("Momo payment for {merchant} Ref: {ref}", 2),
+    ("TRXN ID: {ref} - Online Purchase {merchant} {date}", 1),
+    ("Paid for {merchant} via mobile money", 1),
+    ("{merchant}*{ref} {amount}", 1),
+]
+
+CITIES = ["ACCRA", "KUMASI", "LAGOS", "NAIROBI", "LONDON", "TAKORADI"]
+SYLLABLES = ["ka", "lo", "mi", "zu", "ren", "tor", "vex", "qui", "bra", "don", "sal", "pek"]
+
+
+def _word(rng: random.Random, syllables: int = 3) -> str:
+    return "".join(rng.choice(SYLLABLES) for _ in range(syllables))
+
+
+def generate_keyword_table(size: int, seed: int = 7) -> List[Tuple[str, str]]:
+    """Returns `size` unique (keyword, category) rows, including the known merchants."""
+    rng = random.Random(seed)
+    rows = [(keyword, category) for category, keywords in KNOWN_MERCHANTS.items() for keyword in keywords]
+    seen = {keyword for keyword, _ in rows}
+    while len(rows) < size:
+        keyword = _word(rng, rng.randint(2, 4))
+        if rng.random() < 0.2:
+            keyword = f"{keyword} {_word(rng, 2)}"
+        if keyword not in seen:
+            seen.add(keyword)
+            rows.append((keyword, rng.choice(CATEGORY_NAMES)))
+    return rows[:size]
+
+
+def generate_category_map(size: int, seed: int = 11) -> Dict[str, List[str]]:
+    """Returns a categories.yaml-style map holding `size` keywords in total."""
+    category_map: Dict[str, List[str]] = {category: [] for category in CATEGORY_NAMES}
+    for keyword, category in generate_keyword_table(size, seed):
+        category_map[category].append(keyword)
+    return {category: keywords for category, keywords in category_map.items() if keywords}
+
+
+def generate_transactions(count: int, seed: int = 42, known_share: float = 0.7) -> List[str]:
+    """
+    Returns `count` raw transaction descriptions. About `known_share` of them
+    mention a known merchant; the rest use made-up merchant names.
+    """
+    rng = random.Random(seed)
+    templates = [template for template, share in TEMPLATES for _ in range(share)]
+    known = [keyword for keywords in KNOWN_MERCHANTS.values() for keyword in keywords]
+    transactions = []
+    for _ in range(count):
+        if rng.random() < known_share:
+            merchant = rng.choice(known)
+        else:
+            merchant = _word(rng).upper()
+        transactions.append(rng.choice(templates).format(
+            merchant=merchant.upper() if rng.random() < 0.5 else merchant.title(),
+            city=rng.choice(CITIES),
+            amount=f"{rng.uniform(1, 500):.2f}",
+            date=f"{rng.randint(1, 12):02d}/{rng.randint(1, 28):02d}/{rng.choice([23, 24, 2024])}",
+            time=f"{rng.randint(0, 23)}:{rng.randint(0, 59):02d}",
+            ref=f"{rng.choice('ABCDEFXYZ')}{rng.randint(1000, 999999)}",
+        ))
+    return transactions
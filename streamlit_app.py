@@ -3,7 +3,6 @@ from app.agent import run_categorizer
 import requests
 import yaml
 import os, sys
-import sqlite3
 import pandas as pd
 
 # Add the project root to the Python path
@@ -51,12 +50,6 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Database connection for analytics
-def get_db_connection():
-    conn = sqlite3.connect("data/keywords.db")
-    conn.row_factory = sqlite3.Row
-    return conn
-
 # Function to get all categories from config
 def get_all_categories():
     try:
@@ -263,81 +256,58 @@ def show_analytics_page():
     st.title("📊 Expense Categorization Analytics")
     st.write("Insights into your expense categorization.")
 
-    conn = get_db_connection()
-    df_log = pd.read_sql_query("SELECT * FROM categorization_log", conn)
-    df_feedback = pd.read_sql_query("SELECT * FROM feedback", conn)
-    df_sessions = pd.read_sql_query("SELECT * FROM sessions", conn)
-    df_interactions = pd.read_sql_query("SELECT * FROM interactions", conn)
-    df_categorized_expenses = pd.read_sql_query("SELECT * FROM categorized_expenses", conn)
-    conn.close()
-
-    st.subheader("Overall Categorization Log")
-    if not df_log.empty:
-        st.dataframe(df_log)
+    # Every chart reads a rollup maintained as rows are written, so rendering does not depend on history size
+    def fetch(path, **params):
+        try:
+            response = requests.get(f"http://localhost:8000/api/analytics/{path}", params=params)
+            response.raise_for_status()
+            return pd.DataFrame(response.json())
+        except requests.exceptions.RequestException as e:
+            st.error(f"Error loading analytics ({path}): {e}")
+            return pd.DataFrame()
+
+    days = st.selectbox("Period", [7, 30, 90, 365], index=1, format_func=lambda d: f"Last {d} days")
+
+    st.subheader("Most Common Categories")
+    df_categories = fetch("categories", days=days)
+    if not df_categories.empty:
+        st.bar_chart(df_categories.rename(columns={"category": "Category", "count": "Count"}).set_index("Category"))
     else:
         st.info("No categorization log data available yet.")
 
-    st.subheader("Sessions Overview")
-    if not df_sessions.empty:
-        st.dataframe(df_sessions)
-    else:
-        st.info("No session data available yet.")
-
-    st.subheader("Interactions Log")
-    if not df_interactions.empty:
-        st.dataframe(df_interactions)
-    else:
-        st.info("No interaction data available yet.")
-
-    st.subheader("Categorized Expenses Log")
-    if not df_categorized_expenses.empty:
-        st.dataframe(df_categorized_expenses)
-
-        st.subheader("Most Common Categories (from Categorized Expenses)")
-        category_counts = df_categorized_expenses['category'].value_counts().reset_index()
-        category_counts.columns = ['Category', 'Count']
-        st.bar_chart(category_counts.set_index('Category'))
-
-        st.subheader("Total Amount by Category")
-        if 'amount' in df_categorized_expenses.columns:
-            amount_by_category = df_categorized_expenses.groupby('category')['amount'].sum().reset_index()
-            amount_by_category.columns = ['Category', 'Total Amount']
-            st.bar_chart(amount_by_category.set_index('Category'))
-        else:
-            st.info("Amount column not available in categorized expenses for this analysis.")
-
+    st.subheader("Matching Methods")
+    df_methods = fetch("methods", days=days)
+    if not df_methods.empty:
+        st.dataframe(df_methods.rename(columns={"matching_method": "Matching Method", "count": "Count"}))
+
+    st.subheader("Categorizations per Day")
+    df_daily = fetch("daily", days=days)
+    if not df_daily.empty:
+        st.line_chart(df_daily.pivot_table(index="day", columns="category", values="count", fill_value=0))
+
+    st.subheader("Total Amount by Category")
+    df_amounts = fetch("amounts")
+    if not df_amounts.empty:
+        amount_by_category = df_amounts[["category", "total_amount"]]
+        amount_by_category.columns = ['Category', 'Total Amount']
+        st.bar_chart(amount_by_category.set_index('Category'))
     else:
-        st.info("No feedback data available yet.")
-
-    if not df_feedback.empty:
-        st.subheader("Frequent Keyword Misses (Corrections)")
-        # Filter for actual corrections (where predicted != corrected)
-        corrections = df_feedback[df_feedback['predicted_category'] != df_feedback['corrected_category']]
-
-        if not corrections.empty:
-            # Group by input_text and count occurrences
-            missed_inputs = corrections['input_text'].value_counts().reset_index()
-            missed_inputs.columns = ['Expense Description', 'Correction Count']
-            st.write("Top expense descriptions that required correction:")
-            st.dataframe(missed_inputs)
-
-            st.write("\nTop predicted categories that were frequently corrected:")
-            missed_categories = corrections['predicted_category'].value_counts().reset_index()
-            missed_categories.columns = ['Predicted Category', 'Correction Count']
-            st.dataframe(missed_categories)
-        else:
-            st.info("No corrections recorded yet. All categorizations were accurate or no feedback was provided.")
-
-        st.subheader("User Correction Patterns")
-        if not corrections.empty:
-            correction_patterns = corrections.groupby(['predicted_category', 'corrected_category']).size().reset_index(name='Count')
-            correction_patterns = correction_patterns.sort_values(by='Count', ascending=False)
-            st.write("How users corrected categories:")
-            st.dataframe(correction_patterns)
-        else:
-            st.info("No correction patterns to display.")
+        st.info("No categorized expenses available yet.")
+
+    st.subheader("User Correction Patterns")
+    df_corrections = fetch("corrections")
+    if not df_corrections.empty:
+        st.write("Top predicted categories that were frequently corrected:")
+        missed_categories = df_corrections.groupby("predicted_category")["count"].sum().sort_values(ascending=False).reset_index()
+        missed_categories.columns = ['Predicted Category', 'Correction Count']
+        st.dataframe(missed_categories)
+
+        st.write("How users corrected categories:")
+        st.dataframe(df_corrections.rename(columns={
+            "predicted_category": "Predicted Category", "corrected_category": "Corrected Category", "count": "Count"
+        }))
     else:
-        st.info("No feedback data available yet.")
+        st.info("No corrections recorded yet. All categorizations were accurate or no feedback was provided.")
 
 # --- Main App Logic ---
 # Removed st.sidebar.selectbox and replaced with buttons
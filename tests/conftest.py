@@ -0,0 +1,60 @@
+import sqlite3
+import pytest
+
+
+def use_database(path: str):
+    """Points the pool, the audit log writer and the in-memory indexes at another database file."""
+    from app import agent, db
+    from app.audit_log import audit_log
+    audit_log.flush()
+    db.configure(path)
+    agent.keyword_db_index.refresh()
+    agent.similarity_index.refresh()
+
+
+@pytest.fixture(scope="session", autouse=True)
+def isolated_database(tmp_path_factory):
+    """The suite runs against a copy of data/keywords.db, so no test writes to the shipped database."""
+    from app import db
+    from app.audit_log import audit_log
+    from app.migrations import migrate
+    shipped = db.pool.db_path
+    path = str(tmp_path_factory.mktemp("db") / "keywords.db")
+    source, copy = sqlite3.connect(shipped), sqlite3.connect(path)
+    source.backup(copy)
+    source.close()
+    # As app.main does on startup
+    migrate(copy)
+    copy.close()
+    use_database(path)
+    with pytest.MonkeyPatch.context() as patch:
+        # Subprocesses started by tests pick the copy up through the environment
+        patch.setenv("KEYWORDS_DB_PATH", path)
+        yield path
+    audit_log.flush()
+    db.configure(shipped)
+
+
+@pytest.fixture
+def app_db(tmp_path):
+    """A fresh, migrated database with data/seed.sql for one test; the suite's copy is restored afterwards."""
+    from app import db
+    from app.migrations import migrate_database
+    previous = db.pool.db_path
+    path = str(tmp_path / "app.db")
+    migrate_database(path)
+    conn = sqlite3.connect(path)
+    with open("data/seed.sql", encoding="utf-8") as f:
+        conn.executescript(f.read())
+    conn.close()
+    use_database(path)
+    yield path
+    use_database(previous)
+
+
+@pytest.fixture(autouse=True)
+def clear_result_cache():
+    """Results cached by one test (often with a faked tier) must not answer another."""
+    from app.agent import result_cache
+    result_cache.clear()
+    yield
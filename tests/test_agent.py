@@ -1,5 +1,9 @@
+import sqlite3
+from contextlib import contextmanager
 import pytest
 from app.agent import run_categorizer
+from app.llm_cache import LLMCache
+from app.migrations import migrate
 
 @pytest.mark.parametrize("input_text, expected_category", [
     ("Bought pizza at Domino's", "Food"),
@@ -14,3 +18,256 @@ def test_agent_categorization(input_text, expected_category):
     assert "reasoning" in result
 
     assert result["category"] == expected_category
+
+def test_batch_categorization_deduplicates_llm_calls(monkeypatch):
+    import app.agent as agent
+    calls = []
+
+    def fake_llm_node(state):
+        calls.append(state["input_text"])
+        return {"category": "Unknown", "reasoning": "Matched using LLM", "confidence_score": 0.0}
+
+    monkeypatch.setattr(agent, "llm_categorizer_node", fake_llm_node)
+    inputs = ["Paid for Uber ride", "Mystery charge 12.00", "paid for uber ride", "MYSTERY CHARGE 99.10"]
+    results = agent.run_categorizer_batch(inputs)
+
+    assert [r["category"] for r in results] == ["Transport", "Unknown", "Transport", "Unknown"]
+    assert calls == ["mystery charge"]
+    assert results[0] == run_categorizer(inputs[0])
+
+@pytest.mark.parametrize("input_text", ["Bought pizza at Domino's", "Paid for Uber ride", "Monthly Netflix subscription"])
+def test_async_categorization_matches_sync(input_text):
+    import asyncio
+    from app.agent import arun_categorizer
+    assert asyncio.run(arun_categorizer(input_text)) == run_categorizer(input_text)
+
+def test_async_batch_awaits_llm_misses_together(monkeypatch):
+    import asyncio
+    import app.agent as agent
+    calls = []
+
+    async def fake_llm_node(state):
+        calls.append(state["input_text"])
+        await asyncio.sleep(0.05)
+        return {"category": "Shopping", "reasoning": "Matched using LLM", "confidence_score": 0.6}
+
+    monkeypatch.setattr(agent, "allm_categorizer_node", fake_llm_node)
+    inputs = ["Paid for Uber ride", "Zorblax store", "Quixo shop", "ZORBLAX STORE"]
+    results = asyncio.run(agent.arun_categorizer_batch(inputs))
+
+    assert [r["category"] for r in results] == ["Transport", "Shopping", "Shopping", "Shopping"]
+    assert calls == ["zorblax store", "quixo shop"]
+
+def test_similarity_tier_catches_near_misses_before_llm(monkeypatch):
+    import app.agent as agent
+    from app.tools.similarity_matcher import SimilarityIndex, SimilarityMatcherTool
+
+    def fail_llm_node(state):
+        raise AssertionError("LLM tier should not be reached")
+
+    from app.tools.fuzzy_matcher import FuzzyMatcherTool
+
+    index = SimilarityIndex(category_map={"Utilities": ["electricity"]})
+    monkeypatch.setattr(agent, "similarity_tool", SimilarityMatcherTool(index=index))
+    monkeypatch.setattr(agent, "llm_categorizer_node", fail_llm_node)
+    snapshot = agent.category_config.current()._replace(fuzzy_tool=FuzzyMatcherTool(category_map={}))
+    with agent.category_config.pin(snapshot):
+        result = agent.run_categorizer_batch(["Electricty GHS 25.00"])[0]
+
+    assert result["category"] == "Utilities"
+    assert result["reasoning"].startswith("Matched using similarity")
+    assert 0 < result["confidence_score"] < 0.7
+
+@pytest.mark.parametrize("input_text, expected_category", [
+    ("NETFLX MONTHLY", "Entertainment"),
+    ("UBR TRIP 14.20", "Transport"),
+    ("SPOTFY PREMIUM", "Entertainment"),
+])
+def test_fuzzy_tier_settles_typos_locally(monkeypatch, input_text, expected_category):
+    import app.agent as agent
+
+    def fail_llm_node(state):
+        raise AssertionError("LLM tier should not be reached")
+
+    monkeypatch.setattr(agent, "llm_categorizer_node", fail_llm_node)
+    result = agent.run_categorizer_batch([input_text])[0]
+
+    assert result["category"] == expected_category
+    assert result["reasoning"].startswith("Matched using fuzzy keyword")
+
+def _run_python(code, **env_overrides):
+    import os
+    import subprocess
+    import sys
+    env = {key: value for key, value in os.environ.items() if not key.startswith(("TELEGRAM_", "TWILIO_"))}
+    env.update(env_overrides)
+    return subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True).stdout
+
+def test_importing_agent_defers_llm_client_and_graph():
+    output = _run_python(
+        "import sys, app.agent\n"
+        "print(sorted(m for m in ('langchain_openai', 'langgraph.graph') if m in sys.modules))"
+    )
+    assert output.strip() == "[]"
+
+def test_importing_the_app_defers_pyarrow():
+    # Only the export and archive routes need it
+    output = _run_python("import sys, app.main\nprint('pyarrow' in sys.modules)")
+    assert output.strip() == "False"
+
+def test_warm_up_builds_graphs_and_llm_client():
+    output = _run_python(
+        "import sys, app.agent as agent\n"
+        "agent.warm_up()\n"
+        "print('langchain_openai' in sys.modules, agent.graph is agent.get_graph())"
+    )
+    assert output.strip() == "True True"
+
+def test_channel_routers_are_mounted_only_when_configured():
+    code = "from app.main import app\nprint(sorted({p.split('/')[1] for p in app.openapi()['paths']}))"
+    unconfigured = _run_python(code)
+    assert "telegram" not in unconfigured and "sms" not in unconfigured
+    configured = _run_python(
+        code, TELEGRAM_BOT_TOKEN="123:abc", TWILIO_ACCOUNT_SID="ACx", TWILIO_AUTH_TOKEN="x", TWILIO_PHONE_NUMBER="1"
+    )
+    assert "'telegram'" in configured and "'sms'" in configured
+
+class FakeBatcher:
+    """Stands in for the LLM micro-batcher; answer() resolves every pending call."""
+    def __init__(self):
+        self.futures = []
+
+    def submit(self, text, categories=None):
+        from concurrent.futures import Future
+        future = Future()
+        self.futures.append((text, future))
+        return future
+
+    def answer(self, category):
+        for _, future in self.futures:
+            if future.set_running_or_notify_cancel():
+                future.set_result(category)
+
+def test_speculative_llm_call_is_cancelled_when_a_later_tier_matches(monkeypatch):
+    import app.agent as agent
+    batcher = FakeBatcher()
+    monkeypatch.setattr(agent, "llm_batcher", batcher)
+
+    result = agent.run_categorizer("NETFLX MONTHLY")
+
+    assert result["category"] == "Entertainment"
+    assert [text for text, _ in batcher.futures] == ["netflx monthly"]
+    assert batcher.futures[0][1].cancelled()
+    assert "speculative_llm" not in result and "deadline" not in result
+
+def test_speculative_llm_call_is_reused_by_the_llm_tier(monkeypatch):
+    import threading
+    import app.agent as agent
+    batcher = FakeBatcher()
+    monkeypatch.setattr(agent, "llm_batcher", batcher)
+
+    timer = threading.Timer(0.05, batcher.answer, args=("Shopping",))
+    timer.start()
+    with empty_llm_cache():
+        result = agent.run_categorizer("Quorblen wexmart")
+    timer.join()
+
+    assert result["category"] == "Shopping"
+    assert len(batcher.futures) == 1
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_exhausted_budget_returns_unknown_instead_of_waiting(monkeypatch, use_async):
+    import asyncio
+    import time
+    import app.agent as agent
+    batcher = FakeBatcher()
+    monkeypatch.setattr(agent, "llm_batcher", batcher)
+
+    start = time.monotonic()
+    with empty_llm_cache():
+        if use_async:
+            result = asyncio.run(agent.arun_categorizer("Zintrax plovder", budget_seconds=0.1))
+        else:
+            result = agent.run_categorizer("Zintrax plovder", budget_seconds=0.1)
+
+    assert time.monotonic() - start < 2
+    assert result["category"] == "Unknown"
+    assert result["confidence_score"] == 0.0
+    assert result["reasoning"].startswith("Latency budget exhausted")
+    assert all(future.cancelled() for _, future in batcher.futures)
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_llm_construction_failure_answers_unknown(monkeypatch, use_async):
+    import asyncio
+    import app.agent as agent
+
+    def broken_batcher():
+        raise RuntimeError("OPENAI_API_KEY is not set")
+
+    monkeypatch.setattr(agent, "get_llm_batcher", broken_batcher)
+    with empty_llm_cache():
+        if use_async:
+            result = asyncio.run(agent.arun_categorizer("Zintrax plovder"))
+        else:
+            result = agent.run_categorizer("Zintrax plovder")
+
+    assert result["category"] == "Unknown"
+    assert result["reasoning"] == agent.LLM_FAILED_REASONING
+
+def test_batch_calls_wait_for_the_llm_without_a_budget(monkeypatch):
+    import asyncio
+    import threading
+    import app.agent as agent
+    batcher = FakeBatcher()
+    monkeypatch.setattr(agent, "llm_batcher", batcher)
+    monkeypatch.setattr(agent, "CATEGORIZE_BUDGET_SECONDS", 0.05)
+
+    timer = threading.Timer(0.3, batcher.answer, args=("Shopping",))
+    timer.start()
+    with empty_llm_cache():
+        results = asyncio.run(agent.arun_categorizer_batch(["Quorblen wexmart", "Zintrax plovder"]))
+    timer.join()
+
+    assert [result["category"] for result in results] == ["Shopping", "Shopping"]
+
+class AnsweringBatcher(FakeBatcher):
+    def submit(self, text, categories=None):
+        future = super().submit(text, categories)
+        future.set_result("Shopping")
+        return future
+
+@contextmanager
+def empty_llm_cache():
+    """Pins the categories snapshot with a private in-memory LLM cache, leaving the shared cache alone."""
+    import app.agent as agent
+    snapshot = agent.category_config.current()
+    conn = sqlite3.connect(":memory:", check_same_thread=False)
+    migrate(conn)
+    cache = LLMCache(snapshot.llm_cache.fingerprint, connection_factory=lambda: conn)
+    with agent.category_config.pin(snapshot._replace(llm_cache=cache)):
+        yield cache
+    conn.close()
+
+@pytest.mark.parametrize("input_text", [
+    "Paid for Uber ride", "Vorplex gadget store", "NETFLX MONTHLY", "Zorblax quimby",
+])
+def test_fast_path_matches_graph(monkeypatch, input_text):
+    import app.agent as agent
+    monkeypatch.setattr(agent, "llm_batcher", AnsweringBatcher())
+
+    # Each run gets an empty cache, so neither answers from the other's LLM result
+    state = {"input_text": agent.normalize(input_text), "user_id": None, "deadline": None}
+    with empty_llm_cache():
+        expected = agent.finish_request(agent.get_graph().invoke(state))
+    with empty_llm_cache():
+        assert agent.run_categorizer(input_text, budget_seconds=0) == expected
+
+def test_stale_llm_answers_are_purged_for_the_active_categories():
+    import app.agent as agent
+    with empty_llm_cache() as cache:
+        stale = LLMCache("an-earlier-categories-yaml", connection_factory=cache.connection_factory)
+        stale.put("kfc order", "Food")
+        cache.put("uber trip", "Transport")
+        agent.purge_stale_llm_answers(agent.category_config.active())
+        conn = cache.connection_factory()
+        assert conn.execute("SELECT input_text FROM llm_cache").fetchall() == [("uber trip",)]
@@ -0,0 +1,52 @@
+import sqlite3
+import pytest
+from app import analytics
+from app.migrations import migrate
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(":memory:")
+    migrate(conn)
+    yield conn
+    conn.close()
+
+def log(conn, category, method, timestamp="2024-05-01 10:00:00"):
+    conn.execute(
+        "INSERT INTO categorization_log (timestamp, input_text, final_category, matching_method) VALUES (?, 'x', ?, ?)",
+        (timestamp, category, method)
+    )
+
+def test_existing_rows_are_backfilled_once():
+    conn = sqlite3.connect(":memory:")
+    migrate(conn, target=2)
+    log(conn, "Food", "DB")
+    log(conn, "Food", None)
+    conn.commit()
+    assert migrate(conn, target=3) == [3]
+    assert migrate(conn, target=3) == []
+    assert analytics.category_counts(conn) == [{"category": "Food", "count": 2}]
+    assert analytics.method_counts(conn) == [{"matching_method": "DB", "count": 1}, {"matching_method": "Unknown", "count": 1}]
+
+def test_triggers_maintain_rollups_on_insert(conn):
+    log(conn, "Food", "DB", "2024-05-01 10:00:00")
+    log(conn, "Transport", "Regex", "2024-05-02 09:00:00")
+    log(conn, "Food", "DB", "2024-05-02 11:00:00")
+    conn.execute("INSERT INTO categorized_expenses (session_id, description, amount, category) VALUES ('s', 'kfc', 12.5, 'Food')")
+    conn.execute("INSERT INTO categorized_expenses (session_id, description, amount, category) VALUES ('s', 'kfc', NULL, 'Food')")
+    conn.execute("INSERT INTO feedback (input_text, predicted_category, corrected_category) VALUES ('a', 'Food', 'Transport')")
+    conn.execute("INSERT INTO feedback (input_text, predicted_category, corrected_category) VALUES ('a', 'Food', 'Food')")
+
+    assert analytics.category_counts(conn) == [{"category": "Food", "count": 2}, {"category": "Transport", "count": 1}]
+    assert analytics.category_counts(conn, since="2024-05-02") == [{"category": "Food", "count": 1}, {"category": "Transport", "count": 1}]
+    assert analytics.daily_counts(conn) == [
+        {"day": "2024-05-01", "category": "Food", "count": 1},
+        {"day": "2024-05-02", "category": "Food", "count": 1},
+        {"day": "2024-05-02", "category": "Transport", "count": 1},
+    ]
+    assert analytics.amount_totals(conn) == [{"category": "Food", "count": 2, "total_amount": 12.5}]
+    assert analytics.correction_counts(conn) == [{"predicted_category": "Food", "corrected_category": "Transport", "count": 1}]
+
+def test_rollups_keep_counts_after_history_is_deleted(conn):
+    log(conn, "Food", "DB")
+    conn.execute("DELETE FROM categorization_log")
+    assert analytics.category_counts(conn) == [{"category": "Food", "count": 1}]
@@ -21,3 +21,131 @@ def test_categorize_endpoint_empty_text():
     assert response.status_code == 200  # You may return 400 if validation added
     data = response.json()
     assert data["category"] in ["Unknown", ""]  # Depends on fallback logic
+
+def test_categorize_batch_endpoint_keeps_order():
+    payload = {"descriptions": ["Paid for Uber ride", "Monthly Netflix subscription", "paid for uber ride"]}
+    response = client.post("/api/categorize/batch", json=payload, params={"user_id": "test_user"})
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [r["category"] for r in results] == ["Transport", "Entertainment", "Transport"]
+
+def test_categorize_statement_streams_ndjson():
+    import json
+    statement = "Description,Amount\nUber ride,-12.00\nNetflix subscription,-9.99\n"
+    response = client.post(
+        "/api/categorize/statement",
+        files={"file": ("statement.csv", statement, "text/csv")},
+        params={"user_id": "test_user"},
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["category"] for line in lines[:-1]] == ["Transport", "Entertainment"]
+    assert lines[-1]["summary"]["rows"] == 2
+
+def test_metrics_endpoint_reports_tier_results():
+    client.post("/api/categorize", json={"input_text": "Paid for Uber ride"}, params={"user_id": "test_user"})
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'categorizer_tier_results_total{tier="db",result="hit"}' in response.text
+    assert 'categorizer_stage_duration_seconds_count{stage="normalize"}' in response.text
+    assert 'db_operation_duration_seconds_count{operation="log_categorization"}' in response.text
+    assert "categorizer_fallthrough_ratio" in response.text
+
+def test_result_cache_is_invalidated_when_the_users_keywords_change(app_db):
+    user_id = "result-cache-user"
+    params = {"session_id": "result-cache-session", "user_id": user_id}
+    first = client.post("/api/categorize", json={"input_text": "Bought pizza at Zibbleco"}, params=params).json()
+    hits = client.get("/api/result_cache/stats").json()["hits"]
+    again = client.post("/api/categorize", json={"input_text": "Bought pizza at Zibbleco"}, params=params).json()
+    assert again == first
+    assert client.get("/api/result_cache/stats").json()["hits"] == hits + 1
+
+    response = client.post("/api/keywords", json={"keyword": "zibbleco", "category": "Shopping", "user_id": user_id})
+    assert response.status_code == 200, response.text
+    updated = client.post("/api/categorize", json={"input_text": "Bought pizza at Zibbleco"}, params=params).json()
+    assert first["category"] == "Food"
+    assert updated["category"] == "Shopping"
+
+def test_analytics_endpoints_follow_new_rows(app_db):
+    from app.audit_log import audit_log
+    from app.db import get_connection
+
+    window = {"days": 1}
+    before = {row["category"]: row["count"] for row in client.get("/api/analytics/categories", params=window).json()}
+    amounts = {row["category"]: row for row in client.get("/api/analytics/amounts").json()}
+    corrections = {(row["predicted_category"], row["corrected_category"]): row["count"]
+                   for row in client.get("/api/analytics/corrections").json()}
+
+    audit_log.submit(
+        "INSERT INTO categorization_log (input_text, final_category, matching_method, confidence_score) VALUES (?, ?, ?, ?)",
+        ("analytics test", "Rollup Test", "DB", 1.0)
+    )
+    audit_log.submit(
+        "INSERT INTO categorized_expenses (session_id, description, amount, category) VALUES (?, ?, ?, ?)",
+        ("analytics-session", "analytics test", 12.5, "Rollup Test")
+    )
+    with get_connection() as conn:
+        conn.execute("INSERT INTO feedback (input_text, predicted_category, corrected_category) VALUES (?, ?, ?)",
+                     ("analytics test", "Rollup Test", "Food"))
+
+    after = {row["category"]: row["count"] for row in client.get("/api/analytics/categories", params=window).json()}
+    assert after["Rollup Test"] == before.get("Rollup Test", 0) + 1
+    assert any(row["matching_method"] == "DB" for row in client.get("/api/analytics/methods", params=window).json())
+    assert any(row["category"] == "Rollup Test" for row in client.get("/api/analytics/daily", params=window).json())
+    amount = {row["category"]: row for row in client.get("/api/analytics/amounts").json()}["Rollup Test"]
+    previous = amounts.get("Rollup Test", {"count": 0, "total_amount": 0})
+    assert (amount["count"], amount["total_amount"]) == (previous["count"] + 1, previous["total_amount"] + 12.5)
+    pairs = {(row["predicted_category"], row["corrected_category"]): row["count"]
+             for row in client.get("/api/analytics/corrections").json()}
+    assert pairs[("Rollup Test", "Food")] == corrections.get(("Rollup Test", "Food"), 0) + 1
+
+def test_history_endpoints_paginate_with_a_cursor():
+    import json
+    import uuid
+    session_id = client.post("/api/sessions", params={"user_id": "history-user"}).json()["session_id"]
+    for i in range(5):
+        client.post("/api/categorize", json={"input_text": f"Paid for Uber ride {i}"}, params={"session_id": session_id})
+
+    first = client.get(f"/api/categorized_expenses/{session_id}", params={"limit": 3})
+    assert len(first.json()) == 3
+    rest = client.get(f"/api/categorized_expenses/{session_id}", params={"limit": 3, "cursor": first.headers["X-Next-Cursor"]})
+    assert len(rest.json()) == 2
+    assert "X-Next-Cursor" not in rest.headers
+    ids = [row["expense_id"] for row in first.json() + rest.json()]
+    assert ids == sorted(set(ids))
+
+    streamed = client.get(f"/api/interactions/{session_id}", params={"format": "ndjson"})
+    assert streamed.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in streamed.text.splitlines()]
+    assert len(rows) == 10
+    assert client.get(f"/api/interactions/{uuid.uuid4()}", params={"cursor": "bogus"}).status_code == 400
+
+def test_archive_endpoint_streams_ndjson_and_rejects_session_filter_on_the_log():
+    response = client.get("/api/archive/categorization_log", params={"session_id": "s1"})
+    assert response.status_code == 400
+
+    response = client.get("/api/archive/interactions", params={"session_id": "no-such-session"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+
+def test_export_endpoint_streams_arrow():
+    import pyarrow.ipc as ipc
+    session_id = client.post("/api/sessions", params={"user_id": "export_user"}).json()["session_id"]
+    client.post("/api/categorize", json={"input_text": "Paid for Uber ride"},
+                params={"session_id": session_id, "user_id": "export_user"})
+
+    response = client.get("/api/export/categorized_expenses", params={"format": "arrow", "session_id": session_id})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/vnd.apache.arrow.stream"
+    table = ipc.open_stream(response.content).read_all()
+    assert table.column("description").to_pylist() == ["Paid for Uber ride"]
+
+    response = client.get("/api/export/categorization_log", params={"format": "arrow", "user_id": "export_user"})
+    assert response.status_code == 200
+    assert ipc.open_stream(response.content).read_all().column("input_text").to_pylist() == ["Paid for Uber ride"]
+    assert client.get("/api/export/categorization_log", params={"session_id": session_id}).status_code == 400
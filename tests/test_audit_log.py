@@ -0,0 +1,81 @@
+import pytest
+from app.db import ConnectionPool
+from app.audit_log import AuditLogWriter
+
+INSERT = "INSERT INTO events (name) VALUES (?)"
+TOUCH = "UPDATE counters SET hits = hits + 1 WHERE name = ?"
+
+@pytest.fixture
+def pool(tmp_path):
+    pool = ConnectionPool(str(tmp_path / "audit.db"))
+    with pool.transaction() as conn:
+        conn.execute("CREATE TABLE events (id INTEGER PRIMARY KEY, name TEXT)")
+        conn.execute("CREATE TABLE counters (name TEXT PRIMARY KEY, hits INTEGER)")
+        conn.execute("INSERT INTO counters VALUES ('s1', 0)")
+    yield pool
+    pool.close_all()
+
+class CountingWriter(AuditLogWriter):
+    batches = None
+
+    def _write(self, batch):
+        self.batches.append(len(batch))
+        super()._write(batch)
+
+def make_writer(pool, **kwargs):
+    writer = CountingWriter(connection_factory=pool.connection, **kwargs)
+    writer.batches = []
+    return writer
+
+def count(pool, table):
+    return pool.connection().execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+def test_flush_writes_all_pending_rows(pool):
+    writer = make_writer(pool, batch_size=1000, flush_interval_ms=10_000)
+    for i in range(50):
+        writer.submit(INSERT, (f"e{i}",))
+    assert writer.flush(timeout=5)
+    assert count(pool, "events") == 50
+    assert writer.batches == [50]
+    writer.close()
+
+def test_batches_are_bounded_by_size(pool):
+    writer = make_writer(pool, batch_size=10, flush_interval_ms=10_000)
+    for i in range(25):
+        writer.submit(INSERT, (f"e{i}",))
+    writer.flush(timeout=5)
+    assert writer.batches == [10, 10, 5]
+    writer.close()
+
+def test_interval_flushes_without_explicit_flush(pool):
+    import time
+    writer = make_writer(pool, batch_size=1000, flush_interval_ms=20)
+    writer.submit(INSERT, ("late",))
+    time.sleep(0.3)
+    assert writer.batches == [1]
+    writer.close()
+
+def test_coalesced_writes_applied_once_per_batch(pool):
+    writer = make_writer(pool, batch_size=1000, flush_interval_ms=10_000)
+    for _ in range(5):
+        writer.submit(TOUCH, ("s1",), coalesce=True)
+    writer.flush(timeout=5)
+    assert pool.connection().execute("SELECT hits FROM counters").fetchone()[0] == 1
+    writer.close()
+
+def test_close_flushes_remaining_rows(pool):
+    writer = make_writer(pool, batch_size=1000, flush_interval_ms=10_000)
+    writer.submit(INSERT, ("last",))
+    writer.close(timeout=5)
+    assert count(pool, "events") == 1
+
+def test_a_bad_row_does_not_drop_the_rest_of_its_batch(pool):
+    writer = make_writer(pool, batch_size=1000, flush_interval_ms=10_000)
+    writer.submit(INSERT, ("before",))
+    writer.submit("INSERT INTO missing (name) VALUES (?)", ("lost",))
+    writer.submit(INSERT, ("after",))
+    writer.submit(TOUCH, ("s1",), coalesce=True)
+    writer.flush(timeout=5)
+    assert [row[0] for row in pool.connection().execute("SELECT name FROM events ORDER BY id")] == ["before", "after"]
+    assert pool.connection().execute("SELECT hits FROM counters").fetchone()[0] == 1
+    writer.close()
@@ -0,0 +1,40 @@
+from benchmarks.run import compare, measure
+from benchmarks.synthetic import KNOWN_MERCHANTS, generate_category_map, generate_keyword_table, generate_transactions
+
+
+def test_generators_are_deterministic():
+    assert generate_transactions(200) == generate_transactions(200)
+    assert generate_transactions(50, seed=1) != generate_transactions(50, seed=2)
+    assert generate_keyword_table(300) == generate_keyword_table(300)
+
+
+def test_keyword_table_is_unique_and_includes_known_merchants():
+    rows = generate_keyword_table(500)
+    keywords = [keyword for keyword, _ in rows]
+    assert len(rows) == 500
+    assert len(set(keywords)) == 500
+    assert "netflix" in keywords
+    assert sum(len(v) for v in generate_category_map(500).values()) == 500
+
+
+def test_transactions_mix_known_and_unknown_merchants():
+    known = [k for keywords in KNOWN_MERCHANTS.values() for k in keywords]
+    transactions = generate_transactions(1000, known_share=0.7)
+    share = sum(any(k in t.lower() for k in known) for t in transactions) / len(transactions)
+    assert 0.6 < share < 0.8
+
+
+def test_measure_reports_per_op_time():
+    calls = []
+    result = measure(calls.append, [1, 2, 3], min_time=0.01, repeat=2)
+    assert result["calls"] == len(calls) > 0
+    assert result["per_op_us"] > 0
+    assert result["ops_per_sec"] > 0
+
+
+def test_compare_flags_only_slowdowns_beyond_tolerance():
+    baseline = {"a": {"per_op_us": 10.0}, "b": {"per_op_us": 10.0}, "c": {"per_op_us": 10.0}}
+    results = {"a": {"per_op_us": 12.0}, "b": {"per_op_us": 14.0}, "c": {"per_op_us": 5.0}, "new": {"per_op_us": 1.0}}
+    regressions = compare(results, baseline, tolerance=0.25)
+    assert len(regressions) == 1
+    assert regressions[0].startswith("b:")
@@ -0,0 +1,90 @@
+import os
+import threading
+
+import pytest
+
+from app.category_config import CategoryConfig
+from app.agent import build_category_snapshot
+
+
+def write(path, content):
+    path.write_text(content)
+    # Make sure the mtime changes even on filesystems with coarse timestamps
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+@pytest.fixture
+def config(tmp_path):
+    path = tmp_path / "categories.yaml"
+    write(path, 'Food:\n  - "kfc"\n')
+    return CategoryConfig(str(path), build_category_snapshot), path
+
+
+def test_initial_load_compiles_a_snapshot(config):
+    config, _ = config
+    snapshot = config.current()
+    assert snapshot.version == 1
+    assert snapshot.categories == ["Food", "Unknown"]
+    assert snapshot.regex_tool.get_best_match("kfc order") == "Food"
+
+
+def test_reload_swaps_in_changed_content(config):
+    config, path = config
+    old = config.current()
+    write(path, 'Food:\n  - "kfc"\nTransport:\n  - "uber"\n')
+
+    assert config.reload()
+    new = config.current()
+    assert new.version == 2
+    assert new.categories == ["Food", "Transport", "Unknown"]
+    assert new.regex_tool.get_best_match("uber trip") == "Transport"
+    assert new.llm_cache.fingerprint != old.llm_cache.fingerprint
+    assert old.regex_tool.get_best_match("uber trip") is None
+
+
+def test_touch_without_changes_keeps_snapshot(config):
+    config, path = config
+    snapshot = config.current()
+    write(path, path.read_text())
+    assert not config.reload()
+    assert config.current() is snapshot
+
+
+def test_invalid_file_keeps_previous_snapshot(config):
+    config, path = config
+    snapshot = config.current()
+    write(path, "Food: not-a-list\n")
+    assert not config.reload()
+    assert config.current() is snapshot
+
+
+def test_missing_file_at_startup_gives_empty_map(tmp_path):
+    config = CategoryConfig(str(tmp_path / "missing.yaml"), build_category_snapshot)
+    assert config.current().categories == ["Unknown"]
+
+
+def test_pinned_requests_keep_their_snapshot_across_a_reload(config):
+    config, path = config
+    with config.pin() as pinned:
+        write(path, 'Travel:\n  - "flight"\n')
+        assert config.reload()
+        assert config.active() is pinned
+        assert config.current() is not pinned
+
+        seen = []
+        thread = threading.Thread(target=lambda: seen.append(config.active()))
+        thread.start()
+        thread.join()
+        assert seen == [config.current()]
+    assert config.active() is config.current()
+
+
+def test_listeners_run_after_swap(config):
+    config, path = config
+    config.current()
+    versions = []
+    config.add_listener(lambda snapshot: versions.append(snapshot.version))
+    write(path, 'Travel:\n  - "flight"\n')
+    config.reload()
+    assert versions == [2]
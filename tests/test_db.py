@@ -0,0 +1,36 @@
+import threading
+import pytest
+from app.db import ConnectionPool
+
+@pytest.fixture
+def pool(tmp_path):
+    pool = ConnectionPool(str(tmp_path / "test.db"))
+    with pool.transaction() as conn:
+        conn.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)")
+    yield pool
+    pool.close_all()
+
+def test_connection_reused_within_thread(pool):
+    assert pool.connection() is pool.connection()
+
+def test_each_thread_gets_its_own_connection(pool):
+    other = []
+    thread = threading.Thread(target=lambda: other.append(pool.connection()))
+    thread.start()
+    thread.join()
+    assert other[0] is not pool.connection()
+
+def test_connection_uses_wal_and_busy_timeout(pool):
+    conn = pool.connection()
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == pool.busy_timeout_ms
+
+def test_transaction_commits_and_rolls_back(pool):
+    with pool.transaction() as conn:
+        conn.execute("INSERT INTO items (name) VALUES (?)", ("kept",))
+    with pytest.raises(RuntimeError):
+        with pool.transaction() as conn:
+            conn.execute("INSERT INTO items (name) VALUES (?)", ("dropped",))
+            raise RuntimeError("boom")
+    rows = pool.connection().execute("SELECT name FROM items").fetchall()
+    assert [row["name"] for row in rows] == ["kept"]
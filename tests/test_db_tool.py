@@ -1,7 +1,7 @@
 import os
 import sqlite3
 import pytest
-from app.tools.db_matcher import KeywordDBMatcherTool
+from app.tools.db_matcher import KeywordDBIndex, KeywordDBMatcherTool
 
 # Setup: create in-memory DB for isolated tests
 @pytest.fixture(scope="function")
@@ -55,3 +55,66 @@ def test_multiple_matches_returns_most_relevant(matcher_tool):
 
 def test_no_match_returns_none(matcher_tool):
     assert matcher_tool.get_best_match("Went hiking and camping") is None
+
+# --- Keyword index ---
+
+def test_user_keywords_take_precedence(test_db):
+    test_db.execute("INSERT INTO keyword_category (user_id, keyword, category) VALUES (?, ?, ?)", ("u1", "uber", "Business Travel"))
+    test_db.commit()
+    assert KeywordDBMatcherTool(conn=test_db, user_id="u1").get_best_match("uber ride") == "Business Travel"
+    assert KeywordDBMatcherTool(conn=test_db, user_id="u2").get_best_match("uber ride") == "Transport"
+    assert KeywordDBMatcherTool(conn=test_db).get_best_match("uber ride") == "Transport"
+
+def test_index_does_not_query_after_load(test_db):
+    index = KeywordDBIndex.from_connection(test_db)
+    test_db.close()
+    tool = KeywordDBMatcherTool(index=index)
+    assert tool.get_best_match("fuel and uber") == "Transport"
+    assert tool.get_all_matches("fuel and uber") == {"Transport": ["uber", "fuel"]}
+
+def test_index_load_bumps_version(test_db):
+    index = KeywordDBIndex.from_connection(test_db)
+    tool = KeywordDBMatcherTool(index=index)
+    assert tool.get_best_match("netflix") is None
+    assert index.version == 1
+
+    test_db.execute("INSERT INTO keyword_category (user_id, keyword, category) VALUES (?, ?, ?)", (None, "netflix", "Entertainment"))
+    test_db.commit()
+    index.load(test_db)
+    assert index.version == 2
+    assert tool.get_best_match("netflix") == "Entertainment"
+
+def test_concurrent_loads_never_install_an_older_read():
+    import threading
+
+    class SlowConnection:
+        """Returns rows read before the table changed, after the newer load has started."""
+        def __init__(self, rows, release=None):
+            self.rows, self.release, self.reading = rows, release, threading.Event()
+
+        def execute(self, sql):
+            self.reading.set()
+            if self.release is not None:
+                self.release.wait(5)
+            return self
+
+        def fetchall(self):
+            return self.rows
+
+    index = KeywordDBIndex(db_path=None)
+    release = threading.Event()
+    stale = SlowConnection([(None, "netflix", "Shopping")], release)
+    fresh = SlowConnection([(None, "netflix", "Entertainment")])
+
+    first = threading.Thread(target=index.load, args=(stale,))
+    first.start()
+    stale.reading.wait(5)
+    second = threading.Thread(target=index.load, args=(fresh,))
+    second.start()
+    second.join(0.1)
+    release.set()
+    first.join()
+    second.join()
+
+    assert index.version == 2
+    assert KeywordDBMatcherTool(index=index).get_best_match("netflix") == "Entertainment"
@@ -0,0 +1,75 @@
+import io
+import sqlite3
+from datetime import datetime
+import pyarrow as pa
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+import pytest
+from app.export import iter_batches, stream_export
+from app.migrations import migrate
+
+@pytest.fixture
+def connection_factory(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / "export.db"))
+    migrate(conn)
+    conn.executemany("INSERT INTO sessions (session_id, user_id, start_time) VALUES (?, ?, ?)", [
+        ("a1", "alice", "2024-05-01 08:00:00"), ("a2", "alice", "2024-05-02 08:00:00"), ("b1", "bob", "2024-05-01 09:00:00"),
+    ])
+    for i in range(12):
+        session = ("a1", "a2", "b1")[i % 3]
+        conn.execute(
+            "INSERT INTO categorized_expenses (session_id, timestamp, description, amount, category) VALUES (?, ?, ?, ?, 'Food')",
+            (session, f"2024-05-{1 + i // 3:02d} 10:00:00", f"item-{i}", float(i))
+        )
+        conn.execute("INSERT INTO categorization_log (timestamp, input_text, final_category, user_id) VALUES (?, ?, 'Food', ?)",
+                     (f"2024-05-{1 + i // 3:02d} 10:00:00", f"item-{i}", "bob" if session == "b1" else "alice"))
+    conn.commit()
+    yield lambda: conn
+    conn.close()
+
+def read(data: bytes, format: str) -> pa.Table:
+    if format == "parquet":
+        return pq.read_table(io.BytesIO(data))
+    return ipc.open_stream(data).read_all()
+
+@pytest.mark.parametrize("format", ["parquet", "arrow"])
+def test_export_round_trips_every_row_in_chunks(connection_factory, format):
+    chunks = list(stream_export(connection_factory, "categorized_expenses", format, chunk_size=5))
+    assert len(chunks) > 2
+
+    table = read(b"".join(chunks), format)
+    assert table.column("description").to_pylist() == [f"item-{i}" for i in range(12)]
+    assert table.column("amount").to_pylist() == [float(i) for i in range(12)]
+    assert pa.types.is_timestamp(table.schema.field("timestamp").type)
+    assert table.column("timestamp")[0].as_py() == datetime(2024, 5, 1, 10, 0, 0)
+
+def test_parquet_gets_a_row_group_per_chunk(connection_factory):
+    data = b"".join(stream_export(connection_factory, "categorization_log", "parquet", chunk_size=5))
+    assert pq.ParquetFile(io.BytesIO(data)).metadata.num_row_groups == 3
+
+def test_filters_by_user_session_and_time(connection_factory):
+    def descriptions(**filters):
+        return [row for batch in iter_batches(connection_factory, "categorized_expenses", chunk_size=2, **filters)
+                for row in batch.column("description").to_pylist()]
+
+    assert descriptions(user_id="alice") == ["item-0", "item-3", "item-6", "item-9", "item-1", "item-4", "item-7", "item-10"]
+    assert descriptions(user_id="alice", session_id="b1") == []
+    assert descriptions(session_id="b1", since=datetime(2024, 5, 2), until=datetime(2024, 5, 4)) == ["item-5", "item-8"]
+    assert descriptions(user_id="nobody") == []
+
+def test_empty_export_is_still_a_valid_file(connection_factory):
+    data = b"".join(stream_export(connection_factory, "categorized_expenses", "parquet", since=datetime(2030, 1, 1)))
+    assert pq.read_table(io.BytesIO(data)).num_rows == 0
+
+def test_categorization_log_filters_by_user_and_time(connection_factory):
+    def inputs(**filters):
+        return [row for batch in iter_batches(connection_factory, "categorization_log", chunk_size=2, **filters)
+                for row in batch.column("input_text").to_pylist()]
+
+    assert inputs(user_id="bob") == ["item-2", "item-5", "item-8", "item-11"]
+    assert inputs(user_id="alice", since=datetime(2024, 5, 3)) == ["item-6", "item-7", "item-9", "item-10"]
+    assert inputs(user_id="nobody") == []
+
+def test_categorization_log_cannot_be_filtered_by_session(connection_factory):
+    with pytest.raises(ValueError):
+        stream_export(connection_factory, "categorization_log", session_id="a1")
@@ -0,0 +1,120 @@
+import sqlite3
+import time
+
+import pytest
+
+from app.tools.db_matcher import KeywordDBIndex
+from app.tools.fuzzy_matcher import BigramIndex, FuzzyKeywordIndex, FuzzyMatcherTool, consonant_skeleton, levenshtein
+
+ENTRIES = [
+    ("Entertainment", "netflix"),
+    ("Entertainment", "spotify"),
+    ("Transport", "uber"),
+    ("Utilities", "water bill"),
+    ("Rent", "rent"),
+]
+
+
+@pytest.mark.parametrize("a, b, distance", [
+    ("netflix", "netflx", 1),
+    ("kitten", "sitting", 3),
+    ("", "abc", 3),
+    ("same", "same", 0),
+])
+def test_levenshtein(a, b, distance):
+    assert levenshtein(a, b) == distance
+    assert levenshtein(b, a) == distance
+
+
+def test_levenshtein_stops_at_bound():
+    assert levenshtein("electricity", "xyz", max_distance=2) == 3
+
+
+def test_bigram_index_matches_linear_scan():
+    words = ["netflix", "netflux", "spotify", "uber", "bolt", "amazon", "amazing", "walmart", "target",
+             "water bill", "electricity bill", "electric boat", "walmart supercenter", "netflix.com"]
+    tree = BigramIndex(words)
+    for query in ["netflx", "amazn", "uber", "tarket", "zzz", "water bil", "electricty bill", "walmrt supercentre"]:
+        for bound in (0, 1, 2):
+            expected = sorted((w, levenshtein(query, w)) for w in words if levenshtein(query, w) <= bound)
+            assert sorted(tree.search(query, bound)) == expected
+
+
+def test_consonant_skeleton():
+    assert consonant_skeleton("spotify") == "sptfy"
+    assert consonant_skeleton("uber") == "ubr"
+
+
+@pytest.mark.parametrize("text, category, keyword", [
+    ("netflx subscription", "Entertainment", "netflix"),
+    ("sptfy", "Entertainment", "spotify"),
+    ("ubr trip", "Transport", "uber"),
+    ("water bil", "Utilities", "water bill"),
+])
+def test_candidates_settle_typos_and_abbreviations(text, category, keyword):
+    candidate = FuzzyKeywordIndex(ENTRIES).candidates(text)[0]
+    assert (candidate.category, candidate.keyword) == (category, keyword)
+    assert 0.7 <= candidate.score < 1.0
+
+
+def test_short_words_need_an_exact_or_skeleton_match():
+    index = FuzzyKeywordIndex(ENTRIES)
+    assert index.candidates("rest at home") == []
+    assert index.candidates("rent")[0].score == 1.0
+
+
+def test_tool_rebuilds_when_keyword_table_changes():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE keyword_category (id INTEGER PRIMARY KEY AUTOINCREMENT, user_id TEXT, keyword TEXT NOT NULL, category TEXT NOT NULL, UNIQUE(user_id, keyword));")
+    keyword_index = KeywordDBIndex.from_connection(conn)
+    tool = FuzzyMatcherTool(category_map={"Transport": ["uber"]}, keyword_index=keyword_index)
+    assert tool.get_best_match("shoprte") is None
+
+    conn.execute("INSERT INTO keyword_category (user_id, keyword, category) VALUES (NULL, 'shoprite', 'Food')")
+    keyword_index.load(conn)
+    tool.refresh()
+    assert tool.get_best_match("shoprte") == "Food"
+
+    tool.reload({"Travel": ["airline"]})
+    assert tool.get_best_match("airlne") == "Travel"
+    assert tool.get_best_match("ubr") is None
+
+
+def test_user_keywords_leave_the_global_version_alone():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE keyword_category (id INTEGER PRIMARY KEY AUTOINCREMENT, user_id TEXT, keyword TEXT NOT NULL, category TEXT NOT NULL, UNIQUE(user_id, keyword));")
+    conn.execute("INSERT INTO keyword_category (user_id, keyword, category) VALUES (NULL, 'shoprite', 'Food')")
+    keyword_index = KeywordDBIndex.from_connection(conn)
+    tool = FuzzyMatcherTool(category_map={}, keyword_index=keyword_index)
+    index = tool.refresh()
+
+    conn.execute("INSERT INTO keyword_category (user_id, keyword, category) VALUES ('alice', 'checkers', 'Food')")
+    keyword_index.load(conn)
+    assert keyword_index.snapshot().version == 2
+    assert keyword_index.snapshot().global_version == 1
+    assert tool.refresh() is index
+
+    conn.execute("INSERT INTO keyword_category (user_id, keyword, category) VALUES (NULL, 'woolworths', 'Food')")
+    keyword_index.load(conn)
+    assert keyword_index.snapshot().global_version == 3
+    assert tool.refresh() is not index
+
+
+def test_lookups_use_the_current_index_while_a_new_one_builds():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE keyword_category (id INTEGER PRIMARY KEY AUTOINCREMENT, user_id TEXT, keyword TEXT NOT NULL, category TEXT NOT NULL, UNIQUE(user_id, keyword));")
+    keyword_index = KeywordDBIndex.from_connection(conn)
+    tool = FuzzyMatcherTool(category_map={"Transport": ["uber"]}, keyword_index=keyword_index)
+    assert tool.get_best_match("shoprte") is None
+
+    conn.execute("INSERT INTO keyword_category (user_id, keyword, category) VALUES (NULL, 'shoprite', 'Food')")
+    keyword_index.load(conn)
+    # Holding the build lock keeps the background rebuild waiting
+    with tool._lock:
+        assert tool.get_best_match("shoprte") is None
+        assert tool.get_best_match("ubr") == "Transport"
+
+    deadline = time.monotonic() + 5
+    while tool.get_best_match("shoprte") is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert tool.get_best_match("shoprte") == "Food"
@@ -0,0 +1,52 @@
+import sqlite3
+from datetime import datetime
+import pytest
+from app.history import INTERACTIONS, decode_cursor, encode_cursor, fetch_page, iter_rows
+from app.migrations import migrate
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    migrate(conn)
+    # Several rows share a timestamp, so the id has to break ties between pages
+    for i in range(25):
+        conn.execute(
+            "INSERT INTO interactions (session_id, timestamp, interaction_type) VALUES (?, ?, ?)",
+            ("s1", f"2024-05-01 10:00:{i // 3:02d}", f"event-{i}")
+        )
+    conn.execute("INSERT INTO interactions (session_id, timestamp, interaction_type) VALUES ('s2', '2024-05-01 10:00:00', 'other')")
+    yield conn
+    conn.close()
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor("2024-05-01 10:00:00", 7)) == ("2024-05-01 10:00:00", 7)
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
+
+def test_pages_cover_every_row_once_in_order(conn):
+    seen, cursor = [], None
+    while True:
+        rows, cursor = fetch_page(conn, INTERACTIONS, "s1", 10, cursor)
+        seen += [row["interaction_type"] for row in rows]
+        if cursor is None:
+            break
+    assert seen == [f"event-{i}" for i in range(25)]
+
+def test_since_and_until_bound_the_timestamps(conn):
+    rows, cursor = fetch_page(conn, INTERACTIONS, "s1", 100, since=datetime(2024, 5, 1, 10, 0, 2), until=datetime(2024, 5, 1, 10, 0, 4))
+    assert [row["interaction_type"] for row in rows] == [f"event-{i}" for i in range(6, 12)]
+    assert cursor is None
+
+def test_iter_rows_streams_in_chunks(conn):
+    rows = list(iter_rows(lambda: conn, INTERACTIONS, "s1", chunk_size=4))
+    assert [row["interaction_type"] for row in rows] == [f"event-{i}" for i in range(25)]
+    assert len(list(iter_rows(lambda: conn, INTERACTIONS, "s1", limit=7, chunk_size=4))) == 7
+
+def test_page_query_uses_the_session_index(conn):
+    plan = " ".join(row[3] for row in conn.execute(
+        "EXPLAIN QUERY PLAN SELECT * FROM interactions WHERE session_id = ? AND (timestamp, interaction_id) > (?, ?) "
+        "ORDER BY timestamp, interaction_id LIMIT 10", ("s1", "", -1)
+    ))
+    assert "idx_interactions_session_time" in plan
+    assert "TEMP B-TREE" not in plan
@@ -56,7 +56,7 @@ def configured_graph(setup_database):
         category = db_tool.get_best_match(state["input_text"])
         if category:
             return {"category": category, "reasoning": "Matched using DB", "confidence_score": 1.0}
-        return {}
+        return {"category": None}
 
     def test_regex_node(state):
         category = regex_tool.get_best_match(state["input_text"])
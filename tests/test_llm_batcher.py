@@ -0,0 +1,79 @@
+from langchain_core.runnables import RunnableLambda
+from app.llm_batcher import LLMMicroBatcher, parse_batch_response
+
+CATEGORIES = ["Food", "Transport", "Unknown"]
+ANSWERS = {"kfc": "Food", "uber": "Transport", "bolt": "Transport", "pizza": "Food"}
+
+def make_batcher(batch_response=None, **kwargs):
+    calls = {"single": [], "batch": []}
+
+    def single(inputs):
+        calls["single"].append(inputs["expense_description"])
+        return ANSWERS.get(inputs["expense_description"], "Unknown")
+
+    def batch(inputs):
+        lines = [line.split(". ", 1)[1].strip('"') for line in inputs["expense_descriptions"].splitlines()]
+        calls["batch"].append(lines)
+        if batch_response is not None:
+            return batch_response
+        return "\n".join(f"{i}. {ANSWERS.get(text, 'Unknown')}" for i, text in enumerate(lines, start=1))
+
+    batcher = LLMMicroBatcher(RunnableLambda(single), RunnableLambda(batch), CATEGORIES, **kwargs)
+    return batcher, calls
+
+def categorize_concurrently(batcher, texts):
+    futures = [batcher.submit(text) for text in texts]
+    return [future.result(timeout=5) for future in futures]
+
+def test_parse_batch_response():
+    assert parse_batch_response("1. Food\n2) Transport\n3: \"Unknown\"", 3) == ["Food", "Transport", "Unknown"]
+    assert parse_batch_response("1. Food\n3. Transport", 3) is None
+    assert parse_batch_response("Food\nTransport", 2) is None
+
+def test_concurrent_requests_share_one_prompt():
+    batcher, calls = make_batcher(window_ms=200)
+    assert categorize_concurrently(batcher, ["kfc", "uber", "bolt"]) == ["Food", "Transport", "Transport"]
+    assert calls["batch"] == [["kfc", "uber", "bolt"]]
+    assert calls["single"] == []
+
+def test_max_batch_size_splits_batches():
+    batcher, calls = make_batcher(window_ms=200, max_batch_size=2)
+    assert categorize_concurrently(batcher, ["kfc", "uber", "pizza"]) == ["Food", "Transport", "Food"]
+    assert calls["batch"] == [["kfc", "uber"]]
+    assert calls["single"] == ["pizza"]
+
+def test_single_request_uses_single_prompt():
+    batcher, calls = make_batcher(window_ms=1)
+    assert batcher.categorize("kfc") == "Food"
+    assert calls["batch"] == []
+    assert calls["single"] == ["kfc"]
+
+def test_unparseable_batch_falls_back_to_single_calls():
+    batcher, calls = make_batcher(batch_response="Food, Transport", window_ms=200)
+    assert categorize_concurrently(batcher, ["kfc", "uber"]) == ["Food", "Transport"]
+    assert sorted(calls["single"]) == ["kfc", "uber"]
+
+def test_invalid_answers_retried_individually():
+    batcher, calls = make_batcher(batch_response="1. Food\n2. Taxi", window_ms=200)
+    assert categorize_concurrently(batcher, ["kfc", "uber"]) == ["Food", "Transport"]
+    assert calls["single"] == ["uber"]
+
+def test_descriptions_with_different_category_lists_are_batched_apart():
+    batcher, calls = make_batcher(window_ms=200)
+    futures = [
+        batcher.submit("kfc"),
+        batcher.submit("uber", ["Food", "Transport", "Travel", "Unknown"]),
+        batcher.submit("pizza"),
+    ]
+    assert [future.result(timeout=5) for future in futures] == ["Food", "Transport", "Food"]
+    assert sorted(calls["batch"]) == [["kfc", "pizza"]]
+    assert calls["single"] == ["uber"]
+
+def test_cancelled_requests_are_not_sent():
+    batcher, calls = make_batcher(window_ms=200)
+    cancelled = batcher.submit("pizza")
+    kept = batcher.submit("kfc")
+    assert cancelled.cancel()
+    assert kept.result(timeout=5) == "Food"
+    assert calls["single"] == ["kfc"]
+    assert calls["batch"] == []
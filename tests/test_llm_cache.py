@@ -0,0 +1,58 @@
+import pytest
+from app.db import ConnectionPool
+from app.llm_cache import LLMCache, cache_fingerprint
+from app.migrations import migrate
+
+@pytest.fixture
+def pool(tmp_path):
+    pool = ConnectionPool(str(tmp_path / "cache.db"))
+    migrate(pool.connection())
+    yield pool
+    pool.close_all()
+
+def make_cache(pool, categories=("Food", "Unknown"), **kwargs):
+    return LLMCache(cache_fingerprint(list(categories), "prompt {expense_description}"), connection_factory=pool.connection, **kwargs)
+
+def test_miss_then_memory_hit(pool):
+    cache = make_cache(pool)
+    assert cache.get("kfc order") is None
+    cache.put("kfc order", "Food")
+    assert cache.get("kfc order") == "Food"
+    stats = cache.stats()
+    assert (stats["misses"], stats["memory_hits"], stats["disk_hits"]) == (1, 1, 0)
+
+def test_survives_restart_through_sqlite(pool):
+    make_cache(pool).put("kfc order", "Food")
+    cache = make_cache(pool)
+    assert cache.get("kfc order") == "Food"
+    assert cache.stats()["disk_hits"] == 1
+
+def test_category_change_invalidates_entries(pool):
+    make_cache(pool).put("kfc order", "Food")
+    cache = make_cache(pool, categories=("Food", "Dining", "Unknown"))
+    assert cache.get("kfc order") is None
+    assert cache.purge_other_fingerprints() == 1
+    assert pool.connection().execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0] == 0
+
+def test_expired_entries_are_misses(pool):
+    cache = make_cache(pool, ttl_seconds=-1)
+    cache.put("kfc order", "Food")
+    assert cache.get("kfc order") is None
+    assert cache.stats()["expired"] == 1
+
+def test_memory_lru_is_bounded(pool):
+    cache = make_cache(pool, memory_size=2)
+    for text in ["a", "b", "c"]:
+        cache.put(text, "Food")
+    stats = cache.stats()
+    assert stats["memory_entries"] == 2
+    assert stats["evictions"] == 1
+    assert cache.get("a") == "Food"
+    assert cache.stats()["disk_hits"] == 1
+
+def test_table_trimmed_to_max_rows(pool):
+    cache = make_cache(pool, max_rows=10)
+    for i in range(100):
+        cache.put(f"text {i}", "Food")
+    assert pool.connection().execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0] == 10
+    assert cache.get("text 99") == "Food"
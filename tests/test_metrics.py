@@ -0,0 +1,80 @@
+import asyncio
+import logging
+
+import pytest
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, LLMResult
+
+from app.log import SamplingFilter
+from app.metrics import (
+    Counter, Histogram, LLM_TOKENS, MetricsRegistry, TIER_RESULTS, TokenUsageCallback, instrument_tier,
+)
+
+
+def test_counter_renders_labelled_samples():
+    registry = MetricsRegistry()
+    counter = registry.register(Counter("requests_total", "Requests.", ["route"]))
+    counter.inc(route="/a")
+    counter.inc(2, route='/b"')
+
+    text = registry.render()
+    assert "# TYPE requests_total counter" in text
+    assert 'requests_total{route="/a"} 1' in text
+    assert 'requests_total{route="/b\\""} 2' in text
+
+
+def test_counter_rejects_wrong_labels():
+    counter = Counter("requests_total", "Requests.", ["route"])
+    with pytest.raises(ValueError):
+        counter.inc(path="/a")
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("latency_seconds", "Latency.", ["stage"], buckets=[0.1, 1.0])
+    for value in (0.05, 0.5, 0.5, 5):
+        histogram.observe(value, stage="db")
+
+    lines = histogram.samples()
+    assert 'latency_seconds_bucket{stage="db",le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{stage="db",le="1.0"} 3' in lines
+    assert 'latency_seconds_bucket{stage="db",le="+Inf"} 4' in lines
+    assert 'latency_seconds_sum{stage="db"} 6.05' in lines
+    assert histogram.count(stage="db") == 4
+
+
+def test_instrument_tier_counts_hits_and_misses():
+    @instrument_tier("test_sync")
+    def node(state):
+        return {"category": state["category"]}
+
+    @instrument_tier("test_async")
+    async def anode(state):
+        return {"category": state["category"]}
+
+    node({"category": "Food"})
+    node({"category": None})
+    asyncio.run(anode({"category": "Unknown"}))
+
+    assert TIER_RESULTS.value(tier="test_sync", result="hit") == 1
+    assert TIER_RESULTS.value(tier="test_sync", result="miss") == 1
+    assert TIER_RESULTS.value(tier="test_async", result="miss") == 1
+
+
+def test_token_usage_callback_reads_llm_output_and_message_metadata():
+    before = LLM_TOKENS.value(type="prompt"), LLM_TOKENS.value(type="completion")
+    callback = TokenUsageCallback()
+    callback.on_llm_end(LLMResult(generations=[], llm_output={"token_usage": {"prompt_tokens": 10, "completion_tokens": 2}}))
+    message = AIMessage(content="Food", usage_metadata={"input_tokens": 5, "output_tokens": 1, "total_tokens": 6})
+    callback.on_llm_end(LLMResult(generations=[[ChatGeneration(message=message)]]))
+
+    assert LLM_TOKENS.value(type="prompt") - before[0] == 15
+    assert LLM_TOKENS.value(type="completion") - before[1] == 3
+
+
+def test_sampling_filter_keeps_warnings():
+    sampling = SamplingFilter(rate=0.0)
+    record = logging.LogRecord("app", logging.DEBUG, __file__, 1, "trace", None, None)
+    warning = logging.LogRecord("app", logging.WARNING, __file__, 1, "warn", None, None)
+    assert not sampling.filter(record)
+    assert sampling.filter(warning)
+    assert SamplingFilter(rate=1.0).filter(record)
@@ -0,0 +1,165 @@
+import re
+import sqlite3
+import pytest
+from app.migrations import current_version, discover, latest_version, migrate, migrate_database
+
+LEGACY_SCHEMA = """
+CREATE TABLE keyword_category (id INTEGER PRIMARY KEY AUTOINCREMENT, user_id TEXT, keyword TEXT NOT NULL, category TEXT NOT NULL, UNIQUE(user_id, keyword));
+CREATE TABLE categorization_log (id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp DATETIME DEFAULT CURRENT_TIMESTAMP, input_text TEXT NOT NULL, final_category TEXT NOT NULL, matching_method TEXT, confidence_score REAL, tags TEXT);
+CREATE TABLE sessions (session_id TEXT PRIMARY KEY, start_time DATETIME DEFAULT CURRENT_TIMESTAMP, last_active_time DATETIME DEFAULT CURRENT_TIMESTAMP, user_id TEXT, metadata TEXT);
+CREATE TABLE interactions (interaction_id INTEGER PRIMARY KEY AUTOINCREMENT, session_id TEXT NOT NULL, timestamp DATETIME DEFAULT CURRENT_TIMESTAMP, interaction_type TEXT NOT NULL, input_data TEXT, output_data TEXT);
+CREATE TABLE categorized_expenses (expense_id INTEGER PRIMARY KEY AUTOINCREMENT, session_id TEXT NOT NULL, timestamp DATETIME DEFAULT CURRENT_TIMESTAMP, description TEXT NOT NULL, amount REAL, category TEXT NOT NULL, confidence_score REAL, raw_input TEXT);
+"""
+
+def objects(conn, kind):
+    return {name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = ? AND name NOT LIKE 'sqlite_%'", (kind,))}
+
+def test_migrations_are_numbered_without_gaps():
+    assert [migration.version for migration in discover()] == list(range(1, latest_version() + 1))
+
+def test_shipped_database_is_current_and_in_wal_mode():
+    """Starting the app against data/keywords.db must not have to migrate it or change its journal mode."""
+    with open("data/keywords.db", "rb") as f:
+        header = f.read(100)
+    # File format read/write versions are 2 in WAL mode; user_version is a big-endian int at offset 60
+    assert header[18:20] == b"\x02\x02"
+    assert int.from_bytes(header[60:64], "big") == latest_version()
+
+def test_fresh_database_gets_every_table_index_and_trigger(tmp_path):
+    path = str(tmp_path / "sub" / "fresh.db")
+    assert migrate_database(path) == list(range(1, latest_version() + 1))
+    assert migrate_database(path) == []
+
+    conn = sqlite3.connect(path)
+    assert current_version(conn) == latest_version()
+    assert {"keyword_category", "feedback", "categorization_log", "sessions", "interactions",
+            "categorized_expenses", "llm_cache", "categorization_daily"} <= objects(conn, "table")
+    assert {"idx_keyword_category_user", "idx_interactions_session_time", "idx_categorization_log_timestamp"} <= objects(conn, "index")
+    assert {"categorization_log_rollup", "categorized_expenses_rollup", "feedback_rollup"} <= objects(conn, "trigger")
+
+def test_legacy_database_keeps_its_rows(tmp_path):
+    path = str(tmp_path / "legacy.db")
+    conn = sqlite3.connect(path)
+    conn.executescript(LEGACY_SCHEMA)
+    conn.execute("INSERT INTO keyword_category (keyword, category) VALUES ('uber', 'Transport')")
+    conn.execute("INSERT INTO categorization_log (input_text, final_category, matching_method) VALUES ('uber', 'Transport', 'DB')")
+    conn.commit()
+
+    assert migrate(conn) == list(range(1, latest_version() + 1))
+    assert conn.execute("SELECT keyword, category FROM keyword_category").fetchall() == [("uber", "Transport")]
+    assert "feedback" in objects(conn, "table")
+    assert conn.execute("SELECT category, count FROM categorization_daily").fetchall() == [("Transport", 1)]
+
+def test_failed_migration_rolls_back_and_keeps_the_version(tmp_path, monkeypatch):
+    directory = tmp_path / "migrations"
+    directory.mkdir()
+    (directory / "0001_ok.sql").write_text("CREATE TABLE a (x INTEGER);")
+    (directory / "0002_broken.sql").write_text("CREATE TABLE b (x INTEGER);\nINSERT INTO missing VALUES (1);")
+    conn = sqlite3.connect(str(tmp_path / "broken.db"))
+
+    with pytest.raises(sqlite3.OperationalError):
+        migrate(conn, directory=str(directory))
+    assert current_version(conn) == 1
+    assert objects(conn, "table") == {"a"}
+
+def test_gap_in_versions_is_rejected(tmp_path):
+    (tmp_path / "0001_a.sql").write_text("SELECT 1;")
+    (tmp_path / "0003_c.sql").write_text("SELECT 1;")
+    with pytest.raises(ValueError):
+        discover(str(tmp_path))
+
+
+# Queries allowed to read a whole table, and why
+FULL_SCAN_ALLOWED = {
+    "SELECT user_id, keyword, category FROM keyword_category ORDER BY id": "KeywordDBIndex loads every keyword into memory",
+    "SELECT input_text, final_category, user_id FROM categorization_log WHERE confidence_score": "newest-first similarity warm-up, bounded by LIMIT",
+    "DELETE FROM llm_cache WHERE fingerprint": "runs once per categories.yaml version",
+    "SELECT category, count, total_amount FROM expense_category_totals": "one row per category",
+    "SELECT predicted_category, corrected_category, count FROM correction_pairs": "one row per category pair",
+}
+
+FULL_SCAN = re.compile(r"\bSCAN (\w+)$")
+
+
+def test_api_queries_use_indexes(tmp_path, monkeypatch):
+    """Runs the API against a fresh database and checks the plan of every query it issued."""
+    from fastapi.testclient import TestClient
+    from app import agent, db
+    from app.audit_log import audit_log
+    from app.main import app
+
+    path = str(tmp_path / "plans.db")
+    migrate_database(path)
+    statements = []
+    connect = db.ConnectionPool._connect
+
+    def traced_connect(pool):
+        conn = connect(pool)
+        conn.set_trace_callback(statements.append)
+        return conn
+
+    previous_path = db.pool.db_path
+    audit_log.flush()
+    monkeypatch.setattr(db.ConnectionPool, "_connect", traced_connect)
+    db.configure(path)
+    try:
+        with db.transaction() as conn:
+            conn.executemany(
+                "INSERT INTO keyword_category (user_id, keyword, category) VALUES (?, ?, ?)",
+                [(None, "uber", "Transport"), (None, "netflix", "Entertainment"), ("plans", "kfc", "Food")]
+            )
+        agent.keyword_db_index.refresh()
+        agent.similarity_index.refresh()
+
+        client = TestClient(app)
+
+        def call(method, url, **kwargs):
+            response = client.request(method, url, **kwargs)
+            assert response.status_code == 200, response.text
+            return response
+
+        session_id = call("POST", "/api/sessions", params={"user_id": "plans"}).json()["session_id"]
+        params = {"session_id": session_id, "user_id": "plans"}
+        call("POST", "/api/categorize", json={"input_text": "Paid for Uber ride"}, params=params)
+        call("POST", "/api/categorize/batch", json={"descriptions": ["Netflix", "kfc"]}, params=params)
+        feedback = {"input_text": "kfc", "predicted_category": "Transport", "corrected_category": "Food",
+                    "reasoning": None, "confidence_score": 0.5}
+        call("POST", "/api/feedback", json=feedback, params=params)
+        call("POST", "/api/feedback", json=feedback)
+        call("POST", "/api/keywords", json={"user_id": "plans", "keyword": "bolt", "category": "Transport"})
+        call("GET", "/api/keywords", params={"user_id": "plans"})
+        call("GET", "/api/keywords")
+        call("GET", f"/api/sessions/{session_id}")
+        for history in ("interactions", "categorized_expenses"):
+            page = call("GET", f"/api/{history}/{session_id}", params={"limit": 1})
+            call("GET", f"/api/{history}/{session_id}", params={"limit": 1, "cursor": page.headers["X-Next-Cursor"]})
+            call("GET", f"/api/{history}/{session_id}", params={"format": "ndjson", "since": "2000-01-01T00:00:00"})
+        for report in ("categories", "methods", "daily"):
+            call("GET", f"/api/analytics/{report}", params={"days": 7})
+        call("GET", "/api/analytics/amounts")
+        call("GET", "/api/analytics/corrections")
+        call("GET", "/api/export/categorized_expenses", params={"user_id": "plans"})
+        call("GET", "/api/export/categorized_expenses", params={"format": "arrow", "since": "2000-01-01T00:00:00"})
+        call("GET", "/api/export/categorization_log")
+        call("GET", "/api/export/categorization_log", params={"user_id": "plans"})
+        audit_log.flush()
+    finally:
+        db.pool.close_all()
+        monkeypatch.undo()
+        db.configure(previous_path)
+        agent.keyword_db_index.refresh()
+        agent.similarity_index.refresh()
+
+    queries = {sql for sql in statements if re.match(r"\s*(SELECT|UPDATE|DELETE|WITH)\b", sql, re.IGNORECASE)}
+    assert any("FROM interactions" in sql for sql in queries)
+
+    conn = sqlite3.connect(path)
+    scans = []
+    for sql in sorted(queries):
+        if any(sql.startswith(prefix) for prefix in FULL_SCAN_ALLOWED):
+            continue
+        for row in conn.execute("EXPLAIN QUERY PLAN " + sql):
+            match = FULL_SCAN.search(row[3])
+            if match:
+                scans.append(f"{match.group(0)}: {sql}")
+    assert scans == []
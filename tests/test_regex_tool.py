@@ -49,3 +49,45 @@ def test_best_match_tie():
 def test_best_match_no_match():
     tool = setup_tool()
     assert tool.get_best_match("Not a match at all") is None
+
+# ---------- Test: compiled keyword index ----------
+
+def reference_all_matches(category_map, text):
+    """Per-keyword regex scan the compiled index must agree with."""
+    import re
+    normalized_text = text.strip().lower()
+    matches = {}
+    for category, keywords in category_map.items():
+        matched = [kw for kw in keywords if re.search(r'\b' + re.escape(kw.lower()) + r'\b', normalized_text)]
+        if matched:
+            matches[category] = matched
+    return matches
+
+def test_overlapping_keywords_all_reported():
+    tool = RegexMatcherTool(category_map={"Food": ["uber eats", "eats"], "Transport": ["uber"]})
+    assert tool.get_all_matches("Uber Eats dinner") == {"Food": ["uber eats", "eats"], "Transport": ["uber"]}
+
+def test_keyword_must_be_word_bounded():
+    tool = RegexMatcherTool(category_map={"Transport": ["bus"]})
+    assert tool.get_best_match("business lunch") is None
+    assert tool.get_best_match("bus-fare") == "Transport"
+
+def test_index_matches_reference_scan():
+    category_map = {
+        "Food": ["kfc", "uber eats", "pizza", "Mc Donalds"],
+        "Transport": ["uber", "bus", "fuel"],
+        "Other": ["c++", "a.b", "eats"],
+    }
+    tool = RegexMatcherTool(category_map=category_map)
+    texts = [
+        "uber eats pizza", "KFC and fuel", "c++ books", "a.b testing", "aXb", "mc donalds",
+        "  bus uber  ", "nothing here", "", "uber-eats", "busfuel", "eats uber eats",
+    ]
+    for text in texts:
+        assert tool.get_all_matches(text) == reference_all_matches(category_map, text)
+
+def test_reload_recompiles_index():
+    tool = setup_tool()
+    tool.reload({"New Category": ["keyword9"]})
+    assert tool.get_best_match("keyword9 here") == "New Category"
+    assert tool.get_best_match("keyword1") is None
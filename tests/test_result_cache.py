@@ -0,0 +1,56 @@
+from app.result_cache import ResultCache
+
+RESULT = {"input_text": "kfc order", "user_id": "alice", "category": "Food", "reasoning": "Matched using DB", "confidence_score": 1.0}
+
+def put(cache, user_id, text, category="Food"):
+    return cache.put(user_id, text, {**RESULT, "user_id": user_id, "input_text": text, "category": category}, cache.token(user_id))
+
+def test_miss_then_hit_returns_a_copy():
+    cache = ResultCache()
+    assert cache.get("alice", "kfc order") is None
+    put(cache, "alice", "kfc order")
+    result = cache.get("alice", "kfc order")
+    assert result["category"] == "Food"
+    result["category"] = "Changed"
+    assert cache.get("alice", "kfc order")["category"] == "Food"
+    assert cache.get("bob", "kfc order") is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (2, 2, 1)
+    assert stats["hit_ratio"] == 0.5
+
+def test_least_recently_used_entries_are_evicted():
+    cache = ResultCache(max_size=2)
+    put(cache, "alice", "kfc order")
+    put(cache, "alice", "uber trip")
+    cache.get("alice", "kfc order")
+    put(cache, "bob", "rent april")
+    assert cache.get("alice", "uber trip") is None
+    assert cache.get("alice", "kfc order") is not None
+    assert cache.stats()["evictions"] == 1
+
+def test_invalidate_user_only_drops_that_users_entries():
+    cache = ResultCache()
+    put(cache, "alice", "kfc order")
+    put(cache, "bob", "kfc order")
+    put(cache, None, "kfc order")
+    cache.invalidate_user("alice")
+    assert cache.get("alice", "kfc order") is None
+    assert cache.get("bob", "kfc order") is not None
+    assert cache.get(None, "kfc order") is not None
+
+def test_clear_drops_everything():
+    cache = ResultCache()
+    put(cache, "alice", "kfc order")
+    put(cache, None, "kfc order")
+    cache.clear()
+    assert len(cache) == 0
+
+def test_result_computed_across_an_invalidation_is_not_stored():
+    cache = ResultCache()
+    alice, bob = cache.token("alice"), cache.token("bob")
+    cache.invalidate_user("alice")
+    assert not cache.put("alice", "kfc order", RESULT, alice)
+    assert cache.put("bob", "kfc order", RESULT, bob)
+    stale = cache.token("bob")
+    cache.clear()
+    assert not cache.put("bob", "kfc order", RESULT, stale)
@@ -0,0 +1,73 @@
+import os
+import sqlite3
+from datetime import datetime
+import pytest
+from app import analytics
+from app.migrations import migrate
+from app.retention import ARCHIVED_TABLES, iter_archive, read_archive, run_retention
+
+NOW = datetime(2024, 6, 1, 12, 0, 0)
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / "retention.db"))
+    conn.row_factory = sqlite3.Row
+    migrate(conn)
+    for i in range(7):
+        day = f"2024-0{3 + i % 3}-1{i % 2}"
+        conn.execute(
+            "INSERT INTO interactions (session_id, timestamp, interaction_type, input_data) VALUES (?, ?, 'request', ?)",
+            (f"s{i % 2}", f"{day} 10:00:0{i}", f"old-{i}")
+        )
+        conn.execute(
+            "INSERT INTO categorization_log (timestamp, input_text, final_category, matching_method, confidence_score) "
+            "VALUES (?, ?, 'Food', 'DB', 1.0)",
+            (f"{day} 10:00:0{i}", f"old-{i}")
+        )
+    conn.execute("INSERT INTO interactions (session_id, timestamp, interaction_type) VALUES ('s0', '2024-05-31 09:00:00', 'recent')")
+    conn.execute("INSERT INTO categorized_expenses (session_id, timestamp, description, amount, category) "
+                 "VALUES ('s0', '2024-02-01 08:00:00', 'kfc', 12.5, 'Food')")
+    conn.commit()
+    yield conn
+    conn.close()
+
+def test_old_rows_move_to_day_partitions(conn, tmp_path):
+    archive = str(tmp_path / "archive")
+    moved = run_retention(conn, days=15, archive_dir=archive, batch_size=3, now=NOW)
+
+    assert moved == {"interactions": 7, "categorization_log": 7, "categorized_expenses": 1}
+    assert [row["interaction_type"] for row in conn.execute("SELECT * FROM interactions")] == ["recent"]
+    assert conn.execute("SELECT COUNT(*) FROM categorization_log").fetchone()[0] == 0
+    assert sorted(os.listdir(os.path.join(archive, "interactions"))) == [
+        "day=2024-03-10", "day=2024-03-11", "day=2024-04-10", "day=2024-04-11", "day=2024-05-10", "day=2024-05-11"
+    ]
+
+    table = read_archive("interactions", archive_dir=archive)
+    assert sorted(table.column("input_data").to_pylist()) == [f"old-{i}" for i in range(7)]
+    assert table.schema.field("interaction_id").type == "int64"
+    expense = next(iter_archive("categorized_expenses", archive_dir=archive))
+    assert expense["amount"] == 12.5 and expense["timestamp"] == "2024-02-01 08:00:00"
+
+def test_archive_filters_by_time_and_session(conn, tmp_path):
+    archive = str(tmp_path / "archive")
+    run_retention(conn, days=15, archive_dir=archive, now=NOW)
+
+    rows = list(iter_archive("interactions", since=datetime(2024, 4, 1), until=datetime(2024, 5, 10), session_id="s0",
+                             archive_dir=archive))
+    assert [row["input_data"] for row in rows] == ["old-4"]
+    assert "day" not in rows[0]
+    assert read_archive("interactions", archive_dir=str(tmp_path / "empty")) is None
+
+def test_second_run_is_a_no_op_and_rollups_keep_their_counts(conn, tmp_path):
+    archive = str(tmp_path / "archive")
+    run_retention(conn, days=15, archive_dir=archive, now=NOW)
+    assert run_retention(conn, days=15, archive_dir=archive, now=NOW) == {table: 0 for table in ARCHIVED_TABLES}
+    assert read_archive("categorization_log", archive_dir=archive).num_rows == 7
+    assert analytics.category_counts(conn) == [{"category": "Food", "count": 7}]
+
+def test_batches_walk_the_timestamp_index(conn):
+    for table, id_column in (("interactions", "interaction_id"), ("categorized_expenses", "expense_id"), ("categorization_log", "id")):
+        plan = " ".join(row[3] for row in conn.execute(
+            f"EXPLAIN QUERY PLAN SELECT * FROM {table} WHERE timestamp < ? ORDER BY timestamp, {id_column} LIMIT 10", ("2024",)
+        ))
+        assert "USING INDEX" in plan and "TEMP B-TREE" not in plan
@@ -0,0 +1,100 @@
+import sqlite3
+
+import pytest
+
+from app.tools.similarity_matcher import SimilarityIndex, SimilarityMatcherTool
+
+CATEGORY_MAP = {
+    "Entertainment": ["netflix", "spotify"],
+    "Transport": ["uber", "bolt"],
+    "Utilities": ["electricity", "water bill"],
+}
+
+
+@pytest.fixture
+def test_db():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE keyword_category (id INTEGER PRIMARY KEY AUTOINCREMENT, user_id TEXT, keyword TEXT NOT NULL, category TEXT NOT NULL, UNIQUE(user_id, keyword));")
+    conn.execute("CREATE TABLE categorization_log (id INTEGER PRIMARY KEY AUTOINCREMENT, input_text TEXT NOT NULL, final_category TEXT NOT NULL, matching_method TEXT, confidence_score REAL, user_id TEXT);")
+    conn.executemany("INSERT INTO keyword_category (user_id, keyword, category) VALUES (?, ?, ?)", [
+        (None, "groceries", "Food"),
+        ("user_1", "gym", "Health"),
+    ])
+    conn.executemany("INSERT INTO categorization_log (input_text, final_category, confidence_score) VALUES (?, ?, ?)", [
+        ("POS TRXN - Shoprite Accra Mall USD 40.00", "Food", 1.0),
+        ("Mystery vendor", "Shopping", 0.6),
+        ("Another thing", "Unknown", 1.0),
+    ])
+    conn.execute("INSERT INTO categorization_log (input_text, final_category, confidence_score, user_id) VALUES (?, ?, ?, ?)",
+                 ("Zibbleco", "Health", 1.0, "user_1"))
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+def test_query_ranks_closest_example_first():
+    index = SimilarityIndex(category_map=CATEGORY_MAP)
+    results = index.query("electricty bill")
+    assert results[0][:2] == ("Utilities", "electricity")
+    assert results[0][2] > results[1][2]
+
+
+def test_tool_applies_threshold():
+    tool = SimilarityMatcherTool(index=SimilarityIndex(category_map=CATEGORY_MAP), threshold=0.5)
+    assert tool.get_best_match("electricty") == "Utilities"
+    assert tool.get_best_match("zorblax quixo") is None
+    category, score = tool.match("electricity")
+    assert category == "Utilities" and score == pytest.approx(1.0, abs=1e-5)
+
+
+def test_load_uses_global_keywords_and_confident_log_rows(test_db):
+    index = SimilarityIndex(category_map=CATEGORY_MAP, connection_factory=lambda: test_db)
+    texts = {text for _, text, _ in index.query("anything", k=100)}
+    assert "groceries" in texts
+    assert "shoprite accra mall" in texts
+    assert "gym" not in texts
+    assert "mystery vendor" not in texts
+    assert "another thing" not in texts
+
+
+def test_add_is_searchable_without_rebuild():
+    index = SimilarityIndex(category_map=CATEGORY_MAP)
+    size = len(index)
+    assert index.add("shoprite accra mall", "Food")
+    assert not index.add("Shoprite Accra Mall", "Food")
+    assert len(index) == size + 1
+    assert index.query("shoprite kumasi mall")[0][0] == "Food"
+
+
+def test_matrix_grows_past_initial_capacity():
+    index = SimilarityIndex()
+    added = index.add_many((f"merchant number {i}", "Shopping") for i in range(200))
+    assert added == 200
+    assert len(index) == 200
+    assert index.query("merchant number 150")[0][1] == "merchant number 150"
+
+
+def test_learned_examples_of_a_user_are_only_matched_for_that_user(test_db):
+    index = SimilarityIndex(category_map=CATEGORY_MAP, connection_factory=lambda: test_db)
+    assert index.query("zibbleco", user_id="user_1")[0][:2] == ("Health", "zibbleco")
+    assert "zibbleco" not in {text for _, text, _ in index.query("zibbleco", k=100)}
+    assert "zibbleco" not in {text for _, text, _ in index.query("zibbleco", k=100, user_id="user_2")}
+
+    assert index.add("quorblen wexmart", "Shopping", user_id="user_2", learned=True)
+    assert index.query("quorblen wexmart", user_id="user_2")[0][0] == "Shopping"
+    assert index.query("quorblen wexmart", user_id="user_1")[0][1] != "quorblen wexmart"
+
+
+def test_learned_examples_are_capped_oldest_first():
+    index = SimilarityIndex(category_map=CATEGORY_MAP, max_log_rows=50)
+    base = len(index)
+    for i in range(300):
+        index.add(f"merchant number {i}", "Shopping", learned=True)
+    index.add("bolt ride", "Transport")
+
+    assert base + 1 + 50 <= len(index) <= base + 1 + 55
+    texts = {text for _, text, _ in index.query("merchant number", k=1000)}
+    assert "merchant number 299" in texts and "merchant number 0" not in texts
+    assert {"netflix", "bolt ride"} <= texts
+    assert len(index._counts) <= 2 * len(index)
+    assert index.query("merchant number 280")[0][1] == "merchant number 280"
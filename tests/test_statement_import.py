@@ -0,0 +1,51 @@
+import time
+import app.agent as agent
+from app.statement_import import categorize_statement, iter_statement_rows
+
+CSV_STATEMENT = """Date,Description,Amount
+2024-05-01,UBER TRIP GHS 25.50,-25.50
+2024-05-02,Mystery vendor 001,-10.00
+2024-05-03,NETFLIX monthly,"-1,009.99"
+"""
+
+OFX_STATEMENT = """OFXHEADER:100
+<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>
+<STMTTRN><TRNTYPE>DEBIT<TRNAMT>-25.50<NAME>UBER TRIP<MEMO>Airport</STMTTRN>
+<STMTTRN>
+<TRNTYPE>DEBIT
+<TRNAMT>-4.00
+<NAME>Spotify
+</STMTTRN>
+</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>
+"""
+
+def test_csv_rows_parsed():
+    rows = list(iter_statement_rows(CSV_STATEMENT.splitlines(keepends=True)))
+    assert rows == [
+        {"description": "UBER TRIP GHS 25.50", "amount": -25.5},
+        {"description": "Mystery vendor 001", "amount": -10.0},
+        {"description": "NETFLIX monthly", "amount": -1009.99},
+    ]
+
+def test_ofx_rows_parsed():
+    rows = list(iter_statement_rows(OFX_STATEMENT.splitlines(keepends=True)))
+    assert rows == [
+        {"description": "UBER TRIP Airport", "amount": -25.5},
+        {"description": "Spotify", "amount": -4.0},
+    ]
+
+def test_deterministic_rows_emitted_before_llm_rows(monkeypatch):
+    def slow_llm_node(state):
+        time.sleep(0.2)
+        return {"category": "Shopping", "reasoning": "Matched using LLM", "confidence_score": 0.6}
+
+    monkeypatch.setattr(agent, "llm_categorizer_node", slow_llm_node)
+    rows = iter_statement_rows(CSV_STATEMENT.splitlines(keepends=True))
+    results = list(categorize_statement(rows))
+
+    summary = results.pop()["summary"]
+    assert [r["row"] for r in results] == [1, 3, 2]
+    assert [r["category"] for r in results] == ["Transport", "Entertainment", "Shopping"]
+    assert summary["rows"] == 3
+    assert summary["llm_rows"] == 1
+    assert summary["time_to_first_result_ms"] < 200
@@ -0,0 +1,30 @@
+import json
+import os
+import pytest
+from app.tools.text_normalizer import normalize_text
+
+# Inputs and outputs recorded from the original sequential re.sub implementation
+with open(os.path.join(os.path.dirname(__file__), "data", "normalizer_golden.json")) as f:
+    GOLDEN_CORPUS = json.load(f)
+
+@pytest.mark.parametrize("case", GOLDEN_CORPUS, ids=lambda case: repr(case["input"])[:40])
+def test_matches_golden_corpus(case):
+    assert normalize_text(case["input"]) == case["expected"]
+
+@pytest.mark.parametrize("input_text, expected", [
+    ("POS TRXN - Groceries USD 50.00", "groceries"),
+    ("Momo payment for electricity bill", "mobilemoney for electricity bill"),
+    ("KFC order via UberEats", "fastfood order via ubereats"),
+    ("VISA Card Payment at SuperMart 07/25/23 10:00 AM", "at supermart"),
+    ("Transfer to John Doe Ref 12345", "to john doe"),
+])
+def test_normalization_rules(input_text, expected):
+    assert normalize_text(input_text) == expected
+
+def test_repeated_inputs_are_memoized():
+    normalize_text.cache_clear()
+    normalize_text("Uber ride to airport GHS 25.50")
+    normalize_text("Uber ride to airport GHS 25.50")
+    info = normalize_text.cache_info()
+    assert (info.hits, info.misses) == (1, 1)
+    assert info.maxsize is not None
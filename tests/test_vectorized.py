@@ -0,0 +1,96 @@
+import sqlite3
+import numpy as np
+import pandas as pd
+import pytest
+from app import agent
+from app.tools.db_matcher import KeywordDBIndex, KeywordDBMatcherTool
+from app.tools.regex_matcher import RegexMatcherTool
+from app.tools.text_normalizer import normalize_text
+from app.vectorized import match_series, normalize_series
+from benchmarks.synthetic import KNOWN_MERCHANTS, generate_transactions
+
+EDGE_CASES = [
+    "",
+    "   ",
+    "POS 12/05/2024 10:32 REF#A12345 UBER *TRIP",
+    "Uber eats and pizza",
+    "pizza netflix",
+    "netflix pizza",
+    "KFC kfc KFC",
+    "Paid £12.50 at Café Nero",
+    "uber-eats",
+    "fuel",
+]
+
+@pytest.fixture
+def keyword_index():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE keyword_category (id INTEGER PRIMARY KEY AUTOINCREMENT, user_id TEXT, keyword TEXT NOT NULL, category TEXT NOT NULL)")
+    rows = [(None, keyword, category) for category, keywords in KNOWN_MERCHANTS.items() for keyword in keywords[::2]]
+    rows += [
+        (None, "pizza", "Food"), (None, "netflix", "Entertainment"), (None, "uber eats", "Food"),
+        # alice files fuel and uber under her own categories
+        ("alice", "fuel", "Car"), ("alice", "uber", "Work"), ("alice", "kfc", "Food"),
+    ]
+    conn.executemany("INSERT INTO keyword_category (user_id, keyword, category) VALUES (?, ?, ?)", rows)
+    index = KeywordDBIndex.from_connection(conn)
+    conn.close()
+    return index
+
+@pytest.fixture
+def regex_tool():
+    return RegexMatcherTool(category_map={category: keywords[1::2] + ["fuel"] for category, keywords in KNOWN_MERCHANTS.items()})
+
+@pytest.fixture
+def texts():
+    return pd.Series(generate_transactions(600) + EDGE_CASES, index=np.arange(1000, 1000 + 600 + len(EDGE_CASES)))
+
+def scalar_match(text, user_id, keyword_index, regex_tool):
+    normalized = normalize_text(text)
+    category = KeywordDBMatcherTool(index=keyword_index, user_id=user_id).get_best_match(normalized)
+    if category:
+        return category, "DB", agent.DB_MATCH_CONFIDENCE
+    category = regex_tool.get_best_match(normalized)
+    if category:
+        return category, "Regex", agent.REGEX_MATCH_CONFIDENCE
+    return None, None, None
+
+def test_normalize_series_matches_normalize_text(texts):
+    result = normalize_series(texts)
+    assert result.index.equals(texts.index)
+    assert result.tolist() == [normalize_text(text) for text in texts]
+
+def test_normalize_series_keeps_neighbouring_values_apart(monkeypatch):
+    # Each value ends where a pass could run on into the next one if they were not kept apart
+    values = ["Transfer ref", "ABC123 lunch", "Paid on Jul", "25, 2024 dinner", "mobile", "money", "at 12",
+              ":30 pm taxi", "nul\x00ref 99 pizza", "trxn id", "", "card"]
+    monkeypatch.setattr("app.vectorized.NORMALIZE_CHUNK_SIZE", 5)
+    assert normalize_series(pd.Series(values)).tolist() == [normalize_text(value) for value in values]
+
+def test_normalize_series_keeps_missing_values():
+    assert normalize_series(pd.Series(["Uber TRIP", None, np.nan])).tolist() == ["uber trip", None, None]
+
+@pytest.mark.parametrize("user_id", [None, "alice", "nobody"])
+def test_match_series_matches_the_scalar_tiers(texts, user_id, keyword_index, regex_tool):
+    result = match_series(texts, user_id=user_id, keyword_index=keyword_index, regex_tool=regex_tool)
+    assert result.index.equals(texts.index)
+
+    expected = [scalar_match(text, user_id, keyword_index, regex_tool) for text in texts]
+    actual = [
+        (category, method, None if np.isnan(confidence) else confidence)
+        for category, method, confidence in result.itertuples(index=False)
+    ]
+    assert actual == expected
+    assert {method for _, method, _ in expected} == {"DB", "Regex", None}
+
+def test_match_series_on_normalized_input(keyword_index, regex_tool):
+    result = match_series(pd.Series(["uber", "fuel", None]), user_id="alice", normalized=True,
+                          keyword_index=keyword_index, regex_tool=regex_tool)
+    assert result["category"].tolist() == ["Work", "Car", None]
+    assert result["matching_method"].tolist() == ["DB", "DB", None]
+    assert np.isnan(result["confidence_score"].iloc[2])
+
+def test_match_series_on_an_empty_column(keyword_index, regex_tool):
+    result = match_series(pd.Series([], dtype=object), keyword_index=keyword_index, regex_tool=regex_tool)
+    assert list(result.columns) == ["category", "matching_method", "confidence_score"]
+    assert len(result) == 0